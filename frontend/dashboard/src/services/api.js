@@ -13,6 +13,7 @@ const apiClient = axios.create({
 apiClient.interceptors.request.use(
   config => {
     const userId = localStorage.getItem('user_id')
+    const token = localStorage.getItem('token')
     // Only add user_id if it exists AND we're not on login/register endpoints
     const isAuthEndpoint = config.url?.includes('/auth/login') || config.url?.includes('/auth/register')
     
@@ -24,6 +25,11 @@ apiClient.interceptors.request.use(
       config.headers = config.headers || {}
       config.headers['X-User-Id'] = userId
     }
+    // Signed token lets the server identify the user without a database lookup
+    if (token && token !== userId && !isAuthEndpoint) {
+      config.headers = config.headers || {}
+      config.headers.Authorization = `Bearer ${token}`
+    }
     return config
   },
   error => Promise.reject(error)
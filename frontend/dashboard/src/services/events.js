@@ -0,0 +1,67 @@
+import apiClient from './api'
+
+const API_BASE_URL = process.env.VUE_APP_API_URL || 'http://localhost:8000/api'
+const RECONNECT_MS = 3000
+
+// Server-sent change feed: keeps the Vuex store in sync without polling.
+// EventSource cannot send the Authorization header, so each connection uses a
+// short-lived stream ticket in its URL instead of the access token. The browser
+// reconnects on its own while the ticket is valid; after that we fetch a new
+// one and resume from the last event id.
+export function subscribeToChanges(store) {
+  if (!localStorage.getItem('token')) return null
+
+  let source = null
+  let lastEventId = null
+  let closed = false
+
+  const track = handler => event => {
+    if (event.lastEventId) lastEventId = event.lastEventId
+    handler(event)
+  }
+  const upsertTask = event => {
+    const { task } = JSON.parse(event.data)
+    if (!task) return
+    const known = store.state.tasks.tasks.some(t => t.id === task.id)
+    store.commit(known ? 'tasks/UPDATE_TASK' : 'tasks/ADD_TASK', task)
+  }
+  const upsertProject = event => {
+    const { project } = JSON.parse(event.data)
+    if (!project) return
+    const known = store.state.projects.projects.some(p => p.id === project.id)
+    store.commit(known ? 'projects/UPDATE_PROJECT' : 'projects/ADD_PROJECT', project)
+  }
+
+  const connect = async () => {
+    let ticket
+    try {
+      ticket = (await apiClient.post('/auth/stream-ticket/')).data.ticket
+    } catch (error) {
+      if (!closed) setTimeout(connect, RECONNECT_MS)
+      return
+    }
+    if (closed) return
+    const params = new URLSearchParams({ ticket })
+    if (lastEventId) params.set('last_event_id', lastEventId)
+    source = new EventSource(`${API_BASE_URL}/async/events/?${params}`)
+
+    ;['task.insert', 'task.update', 'task.replace'].forEach(type => source.addEventListener(type, track(upsertTask)))
+    ;['project.insert', 'project.update', 'project.replace'].forEach(type => source.addEventListener(type, track(upsertProject)))
+    source.addEventListener('task.delete', track(event => store.commit('tasks/DELETE_TASK', JSON.parse(event.data).id)))
+    source.addEventListener('project.delete', track(event => store.commit('projects/DELETE_PROJECT', JSON.parse(event.data).id)))
+    // Too far behind to replay: reload what is on screen
+    source.addEventListener('reset', () => store.dispatch('projects/fetchProjects', localStorage.getItem('user_id')))
+    // the browser gave up (e.g. the ticket expired before a reconnect): start over with a new ticket
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && !closed) setTimeout(connect, RECONNECT_MS)
+    }
+  }
+
+  connect()
+  return {
+    close() {
+      closed = true
+      if (source) source.close()
+    }
+  }
+}
@@ -17,6 +17,13 @@ export const projectService = {
     })
   },
 
+  fetchDashboard(userId, recent = 6) {
+    // Counts and recent tasks for every project in a single request
+    return apiClient.get('/dashboard/', {
+      params: { user_id: userId, recent }
+    })
+  },
+
   fetchAllProjects() {
     return apiClient.get('/projects/')
   },
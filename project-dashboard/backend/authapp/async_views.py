@@ -0,0 +1,61 @@
+import json
+import math
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from backend.db import get_async_collection
+from authapp.models import User
+from authapp.serializers import UserSerializer
+from authapp.hashing import HashingPoolSaturated, averify_password
+from authapp.throttling import IPBucketThrottle, UserBucketThrottle, throttle_wait
+from authapp.tokens import issue_token
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """`LoginView` on the async client; the password check awaits the hashing pool."""
+    throttle_classes = (IPBucketThrottle, UserBucketThrottle)
+    throttle_scope = 'login'
+    throttle_user_fields = ('username', 'email')
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'message': 'invalid JSON body'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'message': 'request body must be a JSON object'}, status=400)
+        request.data = data
+        wait = throttle_wait(self, request)
+        if wait:
+            response = JsonResponse({'detail': f'Request was throttled. Expected available in {math.ceil(wait)} seconds.'},
+                                    status=429)
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+        username = data.get('username')
+        email = data.get('email')
+        password = data.get('password')
+
+        if not password:
+            return JsonResponse({'message': 'password is required'}, status=400)
+        if not username and not email:
+            return JsonResponse({'message': 'username or email is required'}, status=400)
+
+        query = {'username': username} if username else {'email': email}
+        son = await get_async_collection(User).find_one(query)
+        user = User._from_son(son) if son else None
+        try:
+            valid = bool(user) and await averify_password(user.password, password)
+        except HashingPoolSaturated as e:
+            response = JsonResponse({'message': 'server busy, please retry shortly'}, status=503)
+            response['Retry-After'] = str(e.retry_after)
+            return response
+        if not valid:
+            return JsonResponse({'message': 'invalid credentials'}, status=401)
+        # same upgrade as LoginView; it waits on the pool, so off the event loop
+        await sync_to_async(user.rehash_password, thread_sensitive=False)(password)
+
+        serializer = UserSerializer(user)
+        return JsonResponse({'message': 'login successful', 'user': serializer.data, 'token': issue_token(user)}, status=200)
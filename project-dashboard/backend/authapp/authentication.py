@@ -0,0 +1,67 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+from authapp.tokens import InvalidToken, verify_stream_ticket, verify_token
+
+
+class TokenUser:
+    """Identity carried by a verified token; no User document is loaded."""
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, token_version):
+        self.id = user_id
+        self.token_version = token_version
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """`Authorization: Bearer <token>` verified in memory (see authapp.tokens).
+
+    Requests without the header stay anonymous and are rejected by the default
+    IsAuthenticated permission (REST_FRAMEWORK in settings).
+    """
+    keyword = b'bearer'
+
+    def authenticate(self, request):
+        parts = get_authorization_header(request).split()
+        if not parts or parts[0].lower() != self.keyword:
+            return None
+        if len(parts) != 2:
+            raise AuthenticationFailed('invalid authorization header')
+        try:
+            user_id, version = verify_token(parts[1].decode())
+        except (InvalidToken, UnicodeDecodeError) as e:
+            raise AuthenticationFailed(str(e))
+        return TokenUser(user_id, version), parts[1]
+
+    def authenticate_header(self, request):
+        return 'Bearer'
+
+
+def authenticated_user_id(request):
+    """User id from a verified token, or None for unauthenticated requests."""
+    user = getattr(request, 'user', None)
+    return user.id if isinstance(user, TokenUser) else None
+
+
+def request_token_user_id(request, ticket_param=None):
+    """User id from a verified bearer token on a plain Django request (the async views).
+
+    `ticket_param` also accepts a short-lived stream ticket (never an access
+    token) from the query string, for EventSource clients that cannot set
+    headers. Raises InvalidToken when there is no valid token or ticket.
+    """
+    parts = get_authorization_header(request).split()
+    token = None
+    if parts and parts[0].lower() == SignedTokenAuthentication.keyword:
+        if len(parts) != 2:
+            raise InvalidToken('invalid authorization header')
+        try:
+            token = parts[1].decode()
+        except UnicodeDecodeError:
+            raise InvalidToken('invalid authorization header')
+    elif ticket_param and request.GET.get(ticket_param):
+        return verify_stream_ticket(request.GET[ticket_param])
+    if not token:
+        raise InvalidToken('authentication required')
+    user_id, _ = verify_token(token)
+    return user_id
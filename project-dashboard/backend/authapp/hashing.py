@@ -0,0 +1,162 @@
+"""Password hashing on a bounded process pool.
+
+scrypt/pbkdf2 are CPU-bound and hold the GIL, so hashing inline lets a burst of
+logins starve every other request in the worker. Hashes run in a small process
+pool instead; when more than ``MAX_PENDING`` hashes are queued or running, new
+ones are rejected with `HashingPoolSaturated` and the views answer 503.
+
+Workers are started with ``forkserver`` (``spawn`` where that is unavailable),
+not ``fork``: the web process runs pymongo monitor threads and the activity log
+writer, and forking while other threads hold locks can deadlock the child. A
+pool whose worker died is replaced, and the requests it failed get 503.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+
+DEFAULTS = {
+    'WORKERS': 2,
+    'MAX_PENDING': 32,
+    'TIMEOUT': 10,
+    'RETRY_AFTER': 2,
+    # werkzeug method string; changing it makes existing hashes rehash on login
+    'METHOD': 'scrypt:32768:8:1',
+}
+
+
+class HashingPoolSaturated(Exception):
+    def __init__(self, retry_after):
+        super().__init__('password hashing pool is saturated')
+        self.retry_after = retry_after
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class HashingPool:
+    def __init__(self, workers, max_pending, retry_after):
+        self.workers = workers
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context())
+            return self._executor
+
+    def _discard(self, executor):
+        """Drop a broken executor so the next submit starts a fresh pool."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """Queue `fn(*args)` on the pool; raises HashingPoolSaturated instead of waiting."""
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated(self.retry_after)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # a worker died; start a fresh pool on the next call
+            self._slots.release()
+            self._discard(executor)
+            raise HashingPoolSaturated(self.retry_after)
+        except Exception:
+            self._slots.release()
+            raise
+
+        def done(future):
+            self._slots.release()
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._discard(executor)
+
+        future.add_done_callback(done)
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = get_config()
+                _pool = HashingPool(config['WORKERS'], config['MAX_PENDING'], config['RETRY_AFTER'])
+    return _pool
+
+
+# werkzeug is imported in the pool workers on first use rather than at worker boot
+def _generate(password, method):
+    from werkzeug.security import generate_password_hash
+    return generate_password_hash(password, method)
+
+
+def _check(pwhash, password):
+    from werkzeug.security import check_password_hash
+    return check_password_hash(pwhash, password)
+
+
+def submit_hash(password):
+    return get_pool().submit(_generate, password, get_config()['METHOD'])
+
+
+def submit_verify(pwhash, password):
+    return get_pool().submit(_check, pwhash, password)
+
+
+def _wait(future):
+    config = get_config()
+    try:
+        return future.result(timeout=config['TIMEOUT'])
+    except (FutureTimeoutError, BrokenProcessPool):
+        # BrokenProcessPool: a worker died mid-hash; the pool has been replaced
+        raise HashingPoolSaturated(config['RETRY_AFTER'])
+
+
+def hash_password(password):
+    return _wait(submit_hash(password))
+
+
+def verify_password(pwhash, password):
+    return _wait(submit_verify(pwhash, password))
+
+
+async def _await(future):
+    """`_wait` for async views: the event loop keeps serving while the hash runs."""
+    config = get_config()
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), config['TIMEOUT'])
+    except (asyncio.TimeoutError, BrokenProcessPool):
+        raise HashingPoolSaturated(config['RETRY_AFTER'])
+
+
+async def averify_password(pwhash, password):
+    return await _await(submit_verify(pwhash, password))
+
+
+def needs_rehash(pwhash):
+    """True when `pwhash` was made with a different method/cost than configured."""
+    return pwhash.split('$', 1)[0] != get_config()['METHOD']
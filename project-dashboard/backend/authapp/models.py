@@ -1,19 +1,40 @@
-from mongoengine import Document, StringField, EmailField, DateTimeField
-from werkzeug.security import generate_password_hash, check_password_hash
+from mongoengine import BooleanField, Document, StringField, EmailField, DateTimeField, IntField
+from authapp.hashing import HashingPoolSaturated, hash_password, verify_password, needs_rehash
 from datetime import datetime
 
 class User(Document):
     meta = {
         'collection': 'users',
-        'db_alias': 'auth_db'
+        'db_alias': 'auth_db',
+        'index_background': True
     }
-    username = StringField(required=True)
+    username = StringField(required=True, unique=True)
     email = EmailField(required=True, unique=True)
     password = StringField(required=True)
     created_at = DateTimeField(default=datetime.utcnow)
+    # bumped to revoke every access token issued so far (authapp.tokens)
+    token_version = IntField(default=0)
+    # grants the operational /api/*/stats/ endpoints (authapp.permissions.IsStaffUser)
+    is_staff = BooleanField(default=False)
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)    
-    
+        self.password = hash_password(password)
+
     def check_password(self, password):
-        return check_password_hash(self.password, password)
\ No newline at end of file
+        return verify_password(self.password, password)
+
+    def password_needs_rehash(self):
+        return needs_rehash(self.password)
+
+    def rehash_password(self, password):
+        """Upgrade a hash made with older cost parameters while the password is known.
+
+        Best effort: skipped when the hashing pool is saturated.
+        """
+        if not self.password_needs_rehash():
+            return
+        try:
+            self.set_password(password)
+        except HashingPoolSaturated:
+            return
+        User.objects(id=self.id).update_one(set__password=self.password)
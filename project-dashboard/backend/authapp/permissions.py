@@ -0,0 +1,16 @@
+from rest_framework.permissions import BasePermission
+from authapp.authentication import authenticated_user_id
+
+
+class IsStaffUser(BasePermission):
+    """Bearer of a token whose user has ``is_staff`` set, for the operational stats endpoints.
+
+    Unlike the other views this loads the User document, since staff status is
+    not part of the token.
+    """
+    message = 'staff only'
+
+    def has_permission(self, request, view):
+        from authapp.models import User
+        user_id = authenticated_user_id(request)
+        return bool(user_id) and User.objects(id=user_id, is_staff=True).only('id').first() is not None
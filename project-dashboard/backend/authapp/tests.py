@@ -1,3 +1,202 @@
-from django.test import TestCase
+import base64
+import hashlib
+import hmac
+import json
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+from bson import ObjectId
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+from werkzeug.security import generate_password_hash
+from authapp import hashing
+from authapp.models import User
+from authapp.throttling import get_limiter
+from authapp.tokens import (
+    InvalidToken, get_config, issue_stream_ticket, issue_token, verify_stream_ticket, verify_token,
+)
+from projectapp.models import Task
+from projectapp.tests import MongomockTestCase
 
-# Create your tests here.
+
+def encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+class TokenTests(SimpleTestCase):
+    def setUp(self):
+        self.user = User(id=ObjectId(), username='alice', email='alice@example.com', password='unused')
+        caches[get_config()['CACHE_ALIAS']].clear()
+
+    def assertRejected(self, token, message):
+        with self.assertRaisesMessage(InvalidToken, message):
+            verify_token(token)
+
+    def test_round_trip(self):
+        self.assertEqual(verify_token(issue_token(self.user)), (str(self.user.id), 0))
+
+    def test_changed_claims_are_rejected(self):
+        _, signature = issue_token(self.user).split('.')
+        # someone else's id with the original signature
+        payload = encode(json.dumps([str(ObjectId()), 2 ** 40, 0]).encode())
+        self.assertRejected(f'{payload}.{signature}', 'invalid token signature')
+
+    def test_token_signed_with_another_key_is_rejected(self):
+        payload = encode(json.dumps([str(self.user.id), 2 ** 40, 0]).encode())
+        signature = encode(hmac.new(b'guessed key', payload.encode(), hashlib.sha256).digest())
+        self.assertRejected(f'{payload}.{signature}', 'invalid token signature')
+
+    def test_malformed_token_is_rejected(self):
+        self.assertRejected('not-a-token', 'malformed token')
+
+    @override_settings(AUTH_TOKEN={'TTL': -1})
+    def test_expired_token_is_rejected(self):
+        self.assertRejected(issue_token(self.user), 'token expired')
+
+    def test_revoked_version_is_rejected(self):
+        token = issue_token(self.user)
+        caches[get_config()['CACHE_ALIAS']].set(f'auth-token-version:{self.user.id}', 1)
+        self.assertRejected(token, 'token revoked')
+        self.user.token_version = 1
+        self.assertEqual(verify_token(issue_token(self.user)), (str(self.user.id), 1))
+
+    def test_stream_ticket_is_not_an_access_token(self):
+        ticket = issue_stream_ticket(self.user.id)
+        self.assertEqual(verify_stream_ticket(ticket), str(self.user.id))
+        self.assertRejected(ticket, 'invalid token signature')
+        with self.assertRaisesMessage(InvalidToken, 'invalid token signature'):
+            verify_stream_ticket(issue_token(self.user))
+
+    @override_settings(AUTH_TOKEN={'STREAM_TICKET_TTL': -1})
+    def test_expired_stream_ticket_is_rejected(self):
+        with self.assertRaisesMessage(InvalidToken, 'token expired'):
+            verify_stream_ticket(issue_stream_ticket(self.user.id))
+
+    def test_invalid_token_gets_401(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer ' + issue_token(self.user)[:-2] + 'xx')
+        response = client.get('/api/projects/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+
+
+class FakeAsyncCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find_one(self, query):
+        return self.collection.find_one(query)
+
+
+@override_settings(THROTTLING={'ENABLED': False})
+class LoginTests(MongomockTestCase):
+    def setUp(self):
+        super().setUp()
+        # hashed here rather than on the pool, which only the login itself should need
+        User.objects(id=self.user.id).update_one(
+            set__password=generate_password_hash('s3cret', hashing.get_config()['METHOD']))
+        hashing._pool = None
+        self.addCleanup(self.reset_pool)
+        patcher = mock.patch('authapp.async_views.get_async_collection',
+                             lambda document: FakeAsyncCollection(document._get_collection()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def reset_pool(self):
+        if hashing._pool is not None:
+            hashing._pool.shutdown()
+        hashing._pool = None
+
+    def login(self, body, path='/api/auth/login/'):
+        return APIClient().post(path, body, format='json')
+
+    async def async_login(self, body):
+        return await self.async_client.post('/api/auth/async/login/', json.dumps(body), content_type='application/json')
+
+    def test_login_verifies_on_the_pool_and_returns_a_token(self):
+        response = self.login({'username': 'alice', 'password': 's3cret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(verify_token(response.data['token'])[0], self.user_id)
+        self.assertEqual(self.login({'username': 'alice', 'password': 'wrong'}).status_code, 401)
+
+    @override_settings(PASSWORD_HASHING={'MAX_PENDING': 0})
+    def test_saturated_pool_returns_503(self):
+        response = self.login({'username': 'alice', 'password': 's3cret'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+
+    def test_body_must_be_an_object(self):
+        for path in ('/api/auth/login/', '/api/auth/register/'):
+            self.assertEqual(self.login(['alice'], path).status_code, 400, path)
+
+    @override_settings(PASSWORD_HASHING={'MAX_PENDING': 0})
+    async def test_async_saturated_pool_returns_503(self):
+        response = await self.async_login({'username': 'alice', 'password': 's3cret'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+
+    @override_settings(PASSWORD_HASHING={'TIMEOUT': 0.01})
+    async def test_async_hash_timeout_returns_503(self):
+        with mock.patch('authapp.hashing.submit_verify', return_value=Future()):
+            response = await self.async_login({'username': 'alice', 'password': 's3cret'})
+        self.assertEqual(response.status_code, 503)
+
+    async def test_async_broken_pool_returns_503(self):
+        broken = Future()
+        broken.set_exception(BrokenProcessPool())
+        with mock.patch('authapp.hashing.submit_verify', return_value=broken):
+            response = await self.async_login({'username': 'alice', 'password': 's3cret'})
+        self.assertEqual(response.status_code, 503)
+
+    async def test_async_body_must_be_an_object(self):
+        for body in ([], 'alice'):
+            self.assertEqual((await self.async_login(body)).status_code, 400)
+
+
+@override_settings(THROTTLING={'RATES': {'login_user': '2/min', 'register_ip': '1/min', 'bulk_user': '1/min'}})
+class ThrottleTests(MongomockTestCase):
+    def setUp(self):
+        super().setUp()
+        get_limiter().reset()
+        self.addCleanup(get_limiter().reset)
+
+    def assertThrottled(self, response):
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+    def test_login_is_rejected_before_any_lookup(self):
+        client = APIClient()
+        body = {'username': 'alice', 'password': 'wrong'}
+        with mock.patch('authapp.views.User') as users:
+            users.objects.return_value.first.return_value = None
+            for _ in range(2):
+                self.assertEqual(client.post('/api/auth/login/', body, format='json').status_code, 401)
+            users.reset_mock()
+            self.assertThrottled(client.post('/api/auth/login/', {**body, 'username': 'ALICE'}, format='json'))
+        users.objects.assert_not_called()
+        # other accounts keep their own budget
+        self.assertEqual(client.post('/api/auth/login/', {**body, 'username': 'bob'}, format='json').status_code, 401)
+        self.assertEqual(get_limiter().stats()['scopes']['login_user'],
+                         {'allowed': 3, 'rejected': 1, 'rejected_ratio': 0.25})
+
+    async def test_async_login_shares_the_budget(self):
+        body = json.dumps({'username': 'alice', 'password': 'wrong'})
+        with mock.patch('authapp.async_views.get_async_collection',
+                        lambda document: FakeAsyncCollection(document._get_collection())), \
+                mock.patch('authapp.async_views.averify_password', mock.AsyncMock(return_value=False)):
+            for _ in range(2):
+                response = await self.async_client.post('/api/auth/async/login/', body, content_type='application/json')
+                self.assertEqual(response.status_code, 401)
+        self.assertThrottled(APIClient().post('/api/auth/login/', json.loads(body), format='json'))
+
+    def test_register_is_limited_per_address(self):
+        client = APIClient()
+        client.post('/api/auth/register/', {}, format='json')
+        self.assertThrottled(client.post('/api/auth/register/', {}, format='json'))
+
+    def test_bulk_writes_are_limited_per_user(self):
+        operations = {'operations': [{'op': 'create', 'project_id': self.project_id, 'title': 'a'}]}
+        self.assertEqual(self.client.post('/api/tasks/bulk/', operations, format='json').status_code, 200)
+        self.assertThrottled(self.client.post('/api/tasks/bulk/', operations, format='json'))
+        self.assertEqual(Task.objects.count(), 1)
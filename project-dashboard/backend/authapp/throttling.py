@@ -0,0 +1,222 @@
+"""Token-bucket rate limiting for the login, registration and bulk write paths.
+
+Every (scope, key) pair has a bucket of ``N`` tokens refilled at ``N`` per
+period (``THROTTLING['RATES']``, DRF-style ``'N/period'`` strings), so a
+client may burst up to ``N`` requests and then gets one per ``period / N``.
+The DRF throttle classes below run in ``APIView.initial()``, after token
+authentication and before the handler, so rejected requests are answered 429
+with ``Retry-After`` without any MongoDB lookup or password hashing.
+
+Buckets are kept in this process (bounded LRU) by default. The ``django``
+backend keeps them in ``CACHES[ALIAS]`` so all workers share one budget;
+updates there are read-modify-write, so concurrent workers may let a few
+extra requests through at the edge of the limit.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+from authapp.authentication import authenticated_user_id
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'MAX_KEYS': 10000,
+    'RATES': {
+        'login_ip': '20/min',
+        'login_user': '5/min',
+        'register_ip': '5/min',
+        'bulk_ip': '60/min',
+        'bulk_user': '30/min',
+    },
+}
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'THROTTLING', {})}
+    config['RATES'] = {**DEFAULTS['RATES'], **config['RATES']}
+    return config
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``'10/min'`` -> (capacity 10, refill 10/60 tokens per second)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip()[0]]
+
+
+def refill(state, capacity, per_second, now):
+    """Bucket `state` ``(tokens, updated)`` brought forward to `now`."""
+    if state is None:
+        return float(capacity)
+    tokens, updated = state
+    return min(float(capacity), tokens + (now - updated) * per_second)
+
+
+class LocalBuckets:
+    """Buckets in this process; the least recently used are dropped beyond `max_keys`."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second):
+        """Take one token; returns 0 when allowed, otherwise the seconds until a token is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = refill(self._buckets.get(key), capacity, per_second, now)
+            wait = 0 if tokens >= 1 else (1 - tokens) / per_second
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """Buckets in a Django cache shared by all workers."""
+
+    def __init__(self, alias='default'):
+        from django.core.cache import caches
+        self._cache = caches[alias]
+
+    def take(self, key, capacity, per_second):
+        now = time.time()
+        cache_key = f'throttle:{key}'
+        tokens = refill(self._cache.get(cache_key), capacity, per_second, now)
+        wait = 0 if tokens >= 1 else (1 - tokens) / per_second
+        # an idle bucket is full again after capacity / per_second seconds
+        self._cache.set(cache_key, (tokens - 1 if not wait else tokens, now), int(capacity / per_second) + 1)
+        return wait
+
+    def clear(self):
+        self._cache.clear()
+
+
+class RateLimiter:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {'allowed': 0, 'rejected': 0})
+
+    def hit(self, scope, ident, rate):
+        """Seconds to wait before `ident` may make another `scope` request; 0 when allowed now."""
+        capacity, per_second = parse_rate(rate)
+        wait = self.buckets.take(f'{scope}:{ident}', capacity, per_second)
+        with self._lock:
+            self._counts[scope]['rejected' if wait else 'allowed'] += 1
+        return wait
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': type(self.buckets).__name__,
+                'scopes': {
+                    scope: {**counts, 'rejected_ratio': round(counts['rejected'] / (counts['allowed'] + counts['rejected']), 4)}
+                    for scope, counts in sorted(self._counts.items())
+                },
+            }
+
+    def reset(self):
+        self.buckets.clear()
+        with self._lock:
+            self._counts.clear()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                config = get_config()
+                if config['BACKEND'] == 'django':
+                    buckets = CacheBuckets(config['ALIAS'])
+                else:
+                    buckets = LocalBuckets(config['MAX_KEYS'])
+                _limiter = RateLimiter(buckets)
+    return _limiter
+
+
+class BucketThrottle(BaseThrottle):
+    """Token bucket for ``<view.throttle_scope>_<kind>``; views without a scope or rate are not throttled."""
+    kind = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self._wait = 0
+        config = get_config()
+        if not config['ENABLED']:
+            return True
+        scope = f'{getattr(view, "throttle_scope", None)}_{self.kind}'
+        rate = config['RATES'].get(scope)
+        key = self.get_key(request, view) if rate else None
+        if key is None:
+            return True
+        self._wait = get_limiter().hit(scope, key, rate)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class IPBucketThrottle(BucketThrottle):
+    """Per connecting address (``REMOTE_ADDR``).
+
+    ``X-Forwarded-For`` is only read when DRF's ``NUM_PROXIES`` is set to the
+    number of proxies in front of Django; the key is then the address the
+    outermost trusted proxy saw, not one the client chose.
+    """
+    kind = 'ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UserBucketThrottle(BucketThrottle):
+    """Per user: the token's user, else the account named in the body by ``view.throttle_user_fields``.
+
+    The body fields let login attempts be limited per targeted account (spread
+    over many addresses) before the user is looked up.
+    """
+    kind = 'user'
+
+    def get_key(self, request, view):
+        user_id = authenticated_user_id(request)
+        if user_id:
+            return str(user_id)
+        data = getattr(request, 'data', None)
+        data = data if isinstance(data, dict) else {}
+        for field in getattr(view, 'throttle_user_fields', ()):
+            value = data.get(field)
+            if value:
+                return f'{field}:{str(value).lower()}'
+        return None
+
+
+def throttle_wait(view, request):
+    """`view.throttle_classes` applied to a plain Django view: the longest wait, 0 when allowed.
+
+    `UserBucketThrottle` reads the parsed body from ``request.data``.
+    """
+    waits = []
+    for throttle_class in view.throttle_classes:
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            waits.append(throttle.wait())
+    return max(waits, default=0)
@@ -0,0 +1,131 @@
+"""Compact HMAC-signed access tokens.
+
+A token is ``base64url(json([user_id, expires_at, token_version])) + '.' + base64url(hmac)``.
+Verifying one needs no database access: the signature proves the claims, the
+expiry bounds their lifetime, and bumping ``User.token_version`` revokes every
+older token through a small revocation cache (see `revoke_user_tokens`).
+
+Stream tickets have the same layout without the version, are signed with a
+separate key and expire after ``STREAM_TICKET_TTL`` seconds. They only open
+the event stream, whose URL (and so the ticket) ends up in access logs since
+EventSource cannot send an Authorization header.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULTS = {
+    'TTL': 12 * 60 * 60,
+    'CACHE_ALIAS': 'default',
+    'STREAM_TICKET_TTL': 60,
+}
+
+# key derivation salts: a stream ticket never verifies as an access token or vice versa
+ACCESS_SALT = 'authapp.tokens'
+STREAM_SALT = 'authapp.tokens.stream'
+_signing_keys = {}
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'AUTH_TOKEN', {})}
+
+
+def _key(salt=ACCESS_SALT):
+    key = _signing_keys.get(salt)
+    if key is None:
+        key = _signing_keys[salt] = hashlib.sha256(f'{salt}:{settings.SECRET_KEY}'.encode()).digest()
+    return key
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload, salt=ACCESS_SALT):
+    return _b64encode(hmac.new(_key(salt), payload.encode(), hashlib.sha256).digest())
+
+
+def _encode(claims, salt=ACCESS_SALT):
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f'{payload}.{_sign(payload, salt)}'
+
+
+def _decode(token, salt=ACCESS_SALT):
+    """Verified, unexpired claims of `token` (user id and expiry first); raises InvalidToken."""
+    try:
+        payload, signature = token.split('.')
+    except ValueError:
+        raise InvalidToken('malformed token')
+    if not hmac.compare_digest(signature, _sign(payload, salt)):
+        raise InvalidToken('invalid token signature')
+    try:
+        claims = json.loads(_b64decode(payload))
+        expires_at = claims[1]
+    except (ValueError, TypeError, IndexError, KeyError):
+        raise InvalidToken('malformed token')
+    if not isinstance(claims, list) or not isinstance(expires_at, int):
+        raise InvalidToken('malformed token')
+    if expires_at < time.time():
+        raise InvalidToken('token expired')
+    return claims
+
+
+def _version_cache_key(user_id):
+    return f'auth-token-version:{user_id}'
+
+
+def issue_token(user):
+    expires_at = int(time.time()) + get_config()['TTL']
+    return _encode([str(user.id), expires_at, user.token_version])
+
+
+def verify_token(token):
+    """Return ``(user_id, token_version)`` or raise InvalidToken."""
+    try:
+        user_id, _, version = _decode(token)
+    except ValueError:
+        raise InvalidToken('malformed token')
+    current = caches[get_config()['CACHE_ALIAS']].get(_version_cache_key(user_id))
+    if current is not None and version < current:
+        raise InvalidToken('token revoked')
+    return user_id, version
+
+
+def issue_stream_ticket(user_id):
+    """Short-lived ticket for `/api/async/events/?ticket=`, for a user already authenticated by token."""
+    return _encode([str(user_id), int(time.time()) + get_config()['STREAM_TICKET_TTL']], STREAM_SALT)
+
+
+def verify_stream_ticket(ticket):
+    """Return the ticket's user id or raise InvalidToken."""
+    try:
+        user_id, _ = _decode(ticket, STREAM_SALT)
+    except ValueError:
+        raise InvalidToken('malformed ticket')
+    return user_id
+
+
+def revoke_user_tokens(user):
+    """Invalidate every token issued to `user` so far.
+
+    The new version is kept in the revocation cache for one token lifetime;
+    after that all older tokens have expired anyway. Use a shared cache backend
+    (CACHES) when several workers must see revocations immediately.
+    """
+    from authapp.models import User
+    updated = User.objects(id=user.id).modify(inc__token_version=1, new=True)
+    user.token_version = updated.token_version
+    caches[get_config()['CACHE_ALIAS']].set(_version_cache_key(user.id), user.token_version, get_config()['TTL'])
+    return user.token_version
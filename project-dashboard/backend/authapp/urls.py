@@ -1,7 +1,11 @@
 from django.urls import path
-from authapp.views import RegisterView, LoginView
+from authapp.views import RegisterView, LoginView, LogoutAllView, StreamTicketView
+from authapp.async_views import AsyncLoginView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('logout-all/', LogoutAllView.as_view(), name='logout-all'),
+    path('stream-ticket/', StreamTicketView.as_view(), name='stream-ticket'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
 ]
@@ -1,8 +1,13 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import AllowAny
 from authapp.models import User
 from authapp.serializers import UserSerializer
+from authapp.hashing import HashingPoolSaturated
+from authapp.tokens import get_config as get_token_config, issue_stream_ticket, issue_token, revoke_user_tokens
+from authapp.authentication import authenticated_user_id
+from authapp.throttling import IPBucketThrottle, UserBucketThrottle
 
 def validate_keys(data, required_keys):
     missing_keys = [key for key in required_keys if key not in data]
@@ -16,9 +21,22 @@ def validate_keys(data, required_keys):
         )
     return None
 
+def busy_response(exc):
+    return Response(
+        {'message': 'server busy, please retry shortly'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(exc.retry_after)}
+    )
+
 class RegisterView(APIView):
+    permission_classes = [AllowAny]
+    throttle_classes = [IPBucketThrottle]
+    throttle_scope = 'register'
+
     def post(self, request):
         data=request.data or {}
+        if not isinstance(data, dict):
+            return Response({'message': 'request body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
         username = data.get('username')
         email = data.get('email')
         password = data.get('password')
@@ -42,6 +60,8 @@ class RegisterView(APIView):
             user.email = email
             user.set_password(password)
             user.save()
+        except HashingPoolSaturated as e:
+            return busy_response(e)
         except Exception as e:
             return Response({'message': 'registration failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         return Response({'message': 'registration successful'}, status=status.HTTP_201_CREATED)
@@ -49,8 +69,15 @@ class RegisterView(APIView):
 
 
 class LoginView(APIView):
+    permission_classes = [AllowAny]
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'login'
+    throttle_user_fields = ('username', 'email')
+
     def post(self, request):
         data=request.data or {}
+        if not isinstance(data, dict):
+            return Response({'message': 'request body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
         username = data.get('username')
         email = data.get('email')
         password = data.get('password')
@@ -68,9 +95,41 @@ class LoginView(APIView):
         elif email:
             user = User.objects(email=email).first()
             
-        if not user or not user.check_password(password):
+        try:
+            valid = bool(user) and user.check_password(password)
+        except HashingPoolSaturated as e:
+            return busy_response(e)
+        if not valid:
             return Response({'message': 'invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
-        
+
+        # Upgrade hashes made with older cost parameters while we know the password
+        user.rehash_password(password)
+
         serializer = UserSerializer(user)
-        return Response({'message': 'login successful', 'user': serializer.data}, status=status.HTTP_200_OK)
-        
\ No newline at end of file
+        return Response(
+            {'message': 'login successful', 'user': serializer.data, 'token': issue_token(user)},
+            status=status.HTTP_200_OK
+        )
+
+
+class LogoutAllView(APIView):
+    """Revoke every token issued to the authenticated user."""
+    def post(self, request):
+        user_id = authenticated_user_id(request)
+        if not user_id:
+            return Response({'message': 'authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        user = User.objects(id=user_id).only('id', 'token_version').first()
+        if not user:
+            return Response({'message': 'user not found'}, status=status.HTTP_404_NOT_FOUND)
+        revoke_user_tokens(user)
+        return Response({'message': 'all sessions revoked'}, status=status.HTTP_200_OK)
+
+
+class StreamTicketView(APIView):
+    """Short-lived ticket for the event stream, which EventSource can only authenticate through its URL."""
+    def post(self, request):
+        return Response(
+            {'ticket': issue_stream_ticket(authenticated_user_id(request)),
+             'expires_in': get_token_config()['STREAM_TICKET_TTL']},
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,118 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+Responses of at least ``MIN_SIZE`` bytes with a compressible content type are
+sent brotli-encoded when the client accepts ``br`` and the ``brotli`` package
+is installed, otherwise gzip-encoded. Streamed exports (NDJSON/CSV) are
+gzipped chunk by chunk; event streams are never touched, since buffering
+would delay events. Like Django's GZipMiddleware, strong ETags become weak,
+which ``projectapp.conditional`` already compares weakly.
+
+Turned on with ``RESPONSE_COMPRESSION['ENABLED']``; when off the middleware
+removes itself. Leave it off when a proxy in front already compresses.
+"""
+import re
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from gzip import compress as gzip_compress
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    # 4-5 is the usual trade-off for dynamic content; 11 is for static assets
+    'BROTLI_QUALITY': 4,
+}
+COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+TOKEN = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def accepted_encodings(header):
+    """Codings the client accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for part in header.split(','):
+        match = TOKEN.match(part)
+        if match and float(match.group(2) or 1) > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.min_size = config['MIN_SIZE']
+        self.gzip_level = config['GZIP_LEVEL']
+        self.brotli_quality = config['BROTLI_QUALITY']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        return self.process(request, self.get_response(request))
+
+    async def _acall(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return gzip_compress(content, compresslevel=self.gzip_level, mtime=0)
+
+    def process(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE:
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                return response
+            encoding = 'gzip'
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -1,35 +1,263 @@
+import logging
 import os
-from mongoengine import connect
+import threading
+import weakref
+from collections import defaultdict
+from mongoengine import connect, get_connection, register_connection
+from pymongo import monitoring
 
 CONNECTION_STRING = os.getenv("CONNECTION_STRING")
+ALIASES = ("auth_db", "project_db")
 
-try:
-    connect(
-        db="auth_db", 
-        alias="auth_db", 
-        host=CONNECTION_STRING,
-        serverSelectionTimeoutMS=5000,
-        connectTimeoutMS=10000,
-        socketTimeoutMS=10000,
-        retryWrites=True,
-        w='majority'
-    )
-    connect(
-        db="project_db", 
-        alias="project_db", 
-        host=CONNECTION_STRING,
-        serverSelectionTimeoutMS=5000,
-        connectTimeoutMS=10000,
-        socketTimeoutMS=10000,
-        retryWrites=True,
-        w='majority'
-    )
-    print("✓ Connected to MongoDB Atlas successfully")
-except Exception as e:
-    print(f"✗ MongoDB Connection Error: {str(e)}")
-    print("Please check:")
-    print("1. Your internet connection")
-    print("2. MongoDB Atlas cluster is running")
-    print("3. Your IP address is whitelisted in MongoDB Atlas")
-    print("4. Firewall is not blocking MongoDB connections")
+logger = logging.getLogger(__name__)
 
+POOL_DEFAULTS = {
+    'MAX_POOL_SIZE': 100,
+    'MIN_POOL_SIZE': 0,
+    'MAX_IDLE_TIME_MS': None,
+    'WAIT_QUEUE_TIMEOUT_MS': None,
+    'WARM_UP': True,
+    'LAZY_CONNECT': False,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters: connections open/in use and checkout wait times."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.checkouts = 0
+            self.checkout_failures = defaultdict(int)
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def _checked_out(self, duration):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            if duration is not None:
+                self.wait_total += duration
+                self.wait_max = max(self.wait_max, duration)
+
+    def connection_checked_out(self, event):
+        self._checked_out(event.duration)
+
+    def connection_check_out_failed(self, event):
+        # reason 'timeout' means the pool was exhausted for waitQueueTimeoutMS
+        with self._lock:
+            self.checkout_failures[event.reason] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'open': self.open,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'checkouts': self.checkouts,
+                'checkout_failures': dict(self.checkout_failures),
+                'checkout_wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                'checkout_wait_max_ms': round(self.wait_max * 1000, 3),
+            }
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Command count, failures and latency per ``database.collection``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = defaultdict(lambda: {'count': 0, 'failures': 0, 'total': 0.0, 'max': 0.0})
+
+    @staticmethod
+    def _key(event):
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        # succeeded/failed events do not carry the command, so remember its target
+        collection = event.command.get(event.command_name)
+        target = f'{event.database_name}.{collection}' if isinstance(collection, str) else event.database_name
+        with self._lock:
+            self._pending[self._key(event)] = target
+
+    def _finished(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        with self._lock:
+            target = self._pending.pop(self._key(event), event.database_name)
+            stats = self._stats[target]
+            stats['count'] += 1
+            stats['failures'] += failed
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def succeeded(self, event):
+        self._finished(event, False)
+
+    def failed(self, event):
+        self._finished(event, True)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                target: {
+                    'count': stats['count'],
+                    'failures': stats['failures'],
+                    'avg_ms': round(stats['total'] / stats['count'] * 1000, 3),
+                    'max_ms': round(stats['max'] * 1000, 3),
+                }
+                for target, stats in sorted(self._stats.items())
+            }
+
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
+_client_options = {}
+
+
+def client_options(pool=None, profiling=False):
+    """MongoClient keyword arguments for the given MONGO_POOL settings."""
+    pool = {**POOL_DEFAULTS, **(pool or {})}
+    options = {
+        'serverSelectionTimeoutMS': 5000,
+        'connectTimeoutMS': 10000,
+        'socketTimeoutMS': 10000,
+        'retryWrites': True,
+        'w': 'majority',
+        'maxPoolSize': pool['MAX_POOL_SIZE'],
+        'minPoolSize': pool['MIN_POOL_SIZE'],
+        'event_listeners': [pool_metrics, command_metrics],
+    }
+    if pool['MAX_IDLE_TIME_MS'] is not None:
+        options['maxIdleTimeMS'] = pool['MAX_IDLE_TIME_MS']
+    if pool['WAIT_QUEUE_TIMEOUT_MS'] is not None:
+        options['waitQueueTimeoutMS'] = pool['WAIT_QUEUE_TIMEOUT_MS']
+    if profiling:
+        from backend.profiling import profiler
+        options['event_listeners'].append(profiler)
+    return options
+
+
+def connect_databases(pool=None, profiling=False):
+    """Register the auth_db/project_db aliases; called from settings with MONGO_POOL.
+
+    With ``LAZY_CONNECT`` only the connection settings are registered and
+    MongoEngine creates the client (URI parsing, SRV lookup, monitor threads)
+    on the first query instead of while settings are imported.
+    """
+    _client_options.clear()
+    _client_options.update(client_options(pool, profiling))
+    register = register_connection if {**POOL_DEFAULTS, **(pool or {})}['LAZY_CONNECT'] else connect
+    for alias in ALIASES:
+        try:
+            register(db=alias, alias=alias, host=CONNECTION_STRING, **_client_options)
+        except Exception as e:
+            logger.error('MongoDB connection setup failed for %s: %s (check CONNECTION_STRING, '
+                         'network access and that the cluster is running)', alias, e)
+
+
+def warm_up():
+    """Open connections before the first request: server selection, SRV lookup and TLS.
+
+    One ping per client is enough to select a server; pymongo then fills the
+    pool up to minPoolSize in the background.
+    """
+    seen = set()
+    for alias in ALIASES:
+        try:
+            client = get_connection(alias)
+            if id(client) in seen:
+                continue
+            seen.add(id(client))
+            client.admin.command('ping')
+            logger.info('MongoDB connection for %s warmed up', alias)
+        except Exception as e:
+            logger.warning('MongoDB warm-up failed for %s: %s', alias, e)
+
+
+def get_metrics():
+    return {'pool': pool_metrics.snapshot(), 'commands': command_metrics.snapshot()}
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_with_loop(loop, client):
+    """Parked for the life of `loop`; closes `client` when the loop shuts down.
+
+    The loop finalizes its pending async generators on shutdown
+    (``shutdown_asyncgens()``, called by ``asyncio.run`` and asgiref's
+    ``async_to_sync``), which runs the ``finally`` below on that loop.
+    """
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await client.close()
+
+
+def get_async_collection(document):
+    """Async (pymongo AsyncMongoClient) handle on a MongoEngine document's collection.
+
+    Async clients are bound to the event loop that created them, so one client is
+    kept per running loop and closed when that loop shuts down. Under ASGI that is
+    a single client for the process; under WSGI or runserver every async request
+    runs in a short-lived loop and gets a short-lived client. Database names match
+    the aliases registered above.
+    """
+    import asyncio
+    from pymongo import AsyncMongoClient
+
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        client = AsyncMongoClient(CONNECTION_STRING, **(_client_options or client_options()))
+        closer = _close_with_loop(loop, client)
+        # run it up to its yield so the loop's asyncgen hooks register it
+        try:
+            closer.asend(None).send(None)
+        except StopIteration:
+            pass
+        entry = _async_clients[loop] = (client, closer)
+    client = entry[0]
+    return client[document._meta['db_alias']][document._get_collection_name()]
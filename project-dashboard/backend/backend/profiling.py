@@ -0,0 +1,137 @@
+"""Per-request MongoDB query profiling.
+
+`QueryProfiler` is a pymongo command listener that attributes every command to
+the request running in the current context (a contextvar, so it works for
+threads and for async views alike). `QueryProfilingMiddleware` opens a profile
+per request, reports it in a ``Server-Timing`` header and logs a warning when
+one query shape repeats more than ``N_PLUS_ONE_THRESHOLD`` times, which is how
+per-row lookups (N+1 queries) show up.
+
+With ``QUERY_PROFILING['ENABLED']`` off the listener is not registered on the
+client and the middleware removes itself, so there is no per-command cost.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'N_PLUS_ONE_THRESHOLD': 10,
+}
+# where the filter of each command lives; commands not listed are profiled without a filter shape
+FILTER_KEYS = {
+    'find': 'filter', 'count': 'query', 'distinct': 'query', 'findAndModify': 'query',
+    'aggregate': 'pipeline', 'update': 'updates', 'delete': 'deletes',
+}
+
+_current = ContextVar('query_profile', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'QUERY_PROFILING', {})}
+
+
+def shape(value):
+    """`value` with every literal replaced by ``?``, so queries differing only in values compare equal."""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [shape(value[0])] if value else []
+    return '?'
+
+
+class RequestProfile:
+    __slots__ = ('commands', 'duration', 'documents', 'shapes', 'started')
+
+    def __init__(self):
+        self.commands = 0
+        self.duration = 0.0
+        self.documents = 0
+        self.shapes = Counter()
+        self.started = time.perf_counter()
+
+
+class QueryProfiler(monitoring.CommandListener):
+    def started(self, event):
+        profile = _current.get()
+        if profile is None:
+            return
+        command = event.command
+        target = command.get(event.command_name)
+        filter_key = FILTER_KEYS.get(event.command_name)
+        query_shape = shape(command.get(filter_key)) if filter_key else None
+        profile.shapes[f'{event.command_name} {target} {query_shape}'] += 1
+
+    def _finished(self, event, reply=None):
+        profile = _current.get()
+        if profile is None:
+            return
+        profile.commands += 1
+        profile.duration += event.duration_micros / 1e6
+        if reply:
+            cursor = reply.get('cursor')
+            if cursor is not None:
+                profile.documents += len(cursor.get('firstBatch') or cursor.get('nextBatch') or ())
+            elif isinstance(reply.get('n'), int):
+                profile.documents += reply['n']
+
+    def succeeded(self, event):
+        self._finished(event, event.reply)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+profiler = QueryProfiler()
+
+
+class QueryProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = get_config()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = config['N_PLUS_ONE_THRESHOLD']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        token = _current.set(RequestProfile())
+        try:
+            response = self.get_response(request)
+            self._report(request, response, _current.get())
+        finally:
+            _current.reset(token)
+        return response
+
+    async def _acall(self, request):
+        token = _current.set(RequestProfile())
+        try:
+            response = await self.get_response(request)
+            self._report(request, response, _current.get())
+        finally:
+            _current.reset(token)
+        return response
+
+    def _report(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        response['Server-Timing'] = (
+            f'db;dur={profile.duration * 1000:.2f};desc="{profile.commands} commands, {profile.documents} docs", '
+            f'total;dur={total * 1000:.2f}'
+        )
+        for query_shape, count in profile.shapes.items():
+            if count > self.threshold:
+                logger.warning('%s %s repeated one query shape %d times (possible N+1): %s',
+                               request.method, request.path, count, query_shape)
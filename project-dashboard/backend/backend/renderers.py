@@ -0,0 +1,32 @@
+import json
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to DRF's json-based renderer
+    orjson = None
+else:
+    # orjson would write datetimes itself (microseconds, '+00:00'); hand them to
+    # DRF's encoder instead so both renderers emit millisecond, 'Z'-suffixed strings
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    Pretty-printing requests (`indent` in the Accept header) keep the
+    standard renderer so the browsable/debug output is unchanged.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=JSONEncoder().default, option=OPTIONS)
+
+
+def dumps(data):
+    """Compact JSON bytes, using orjson when available (used for streamed output)."""
+    if orjson is not None:
+        return orjson.dumps(data, default=JSONEncoder().default, option=OPTIONS)
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
@@ -30,12 +30,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # before anything that reads the body; removes itself unless RESPONSE_COMPRESSION['ENABLED']
+    'backend.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # removes itself unless QUERY_PROFILING['ENABLED']
+    'backend.profiling.QueryProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -100,8 +104,148 @@ from corsheaders.defaults import default_headers
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'x-user-id'
 ]
+# Let the SPA read list validators for conditional GETs
+CORS_EXPOSE_HEADERS = ['etag']
+
+# Requests carrying `Authorization: Bearer <token>` (issued by LoginView) are
+# identified without touching auth_db; every other view than login and
+# registration requires one.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'authapp.authentication.SignedTokenAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # reverse proxies in front of Django whose X-Forwarded-For entry is trusted
+    # for throttling; 0 uses REMOTE_ADDR and ignores the client-supplied header
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+}
+
+# Signed access tokens (authapp.tokens). CACHE_ALIAS holds the revocation
+# versions; point it at a shared cache when running several workers.
+# STREAM_TICKET_TTL is the lifetime of event stream tickets, in seconds.
+AUTH_TOKEN = {
+    'TTL': int(os.getenv('AUTH_TOKEN_TTL', str(12 * 60 * 60))),
+    'CACHE_ALIAS': os.getenv('AUTH_TOKEN_CACHE_ALIAS', 'default'),
+    'STREAM_TICKET_TTL': int(os.getenv('STREAM_TICKET_TTL', '60')),
+}
+
+# Read-through cache for project/task listings (projectapp.cache).
+# 'lru' keeps entries in each worker process; 'django' uses CACHES[ALIAS] and
+# shares them when that cache is shared. VERSIONS='mongo' keeps the version
+# tokens in MongoDB so a write in any process (or archive_tasks) invalidates
+# every worker; 'backend' keeps them next to the entries, which is only
+# correct with a shared 'django' backend.
+LISTING_CACHE = {
+    'BACKEND': os.getenv('LISTING_CACHE_BACKEND', 'lru'),
+    'VERSIONS': os.getenv('LISTING_CACHE_VERSIONS', 'mongo'),
+    'ALIAS': os.getenv('LISTING_CACHE_ALIAS', 'default'),
+    'MAX_ENTRIES': int(os.getenv('LISTING_CACHE_MAX_ENTRIES', '1024')),
+    'TTL': int(os.getenv('LISTING_CACHE_TTL', '60')),
+}
+
+# Password hashing process pool (authapp.hashing). METHOD is a werkzeug method
+# string; hashes made with any other method are upgraded on the next login.
+PASSWORD_HASHING = {
+    'WORKERS': int(os.getenv('PASSWORD_HASH_WORKERS', '2')),
+    'MAX_PENDING': int(os.getenv('PASSWORD_HASH_MAX_PENDING', '32')),
+    'RETRY_AFTER': int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '2')),
+    'METHOD': os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),
+}
+
+# Cursor batch size for the streaming export (/api/export/)
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+# Search (projectapp.search). MAX_RESULTS bounds how deep /api/search/ pages;
+# typeahead keeps a prefix index for up to TYPEAHEAD_USERS users per process
+# and re-reads their listing version at most every TYPEAHEAD_VERSION_MAX_AGE s.
+SEARCH = {
+    'MAX_RESULTS': int(os.getenv('SEARCH_MAX_RESULTS', '100')),
+    'TYPEAHEAD_USERS': int(os.getenv('SEARCH_TYPEAHEAD_USERS', '256')),
+    'TYPEAHEAD_TTL': int(os.getenv('SEARCH_TYPEAHEAD_TTL', '300')),
+    'TYPEAHEAD_MAX_ITEMS': int(os.getenv('SEARCH_TYPEAHEAD_MAX_ITEMS', '20000')),
+    'TYPEAHEAD_VERSION_MAX_AGE': int(os.getenv('SEARCH_TYPEAHEAD_VERSION_MAX_AGE', '5')),
+}
+
+# Project deletion (projectapp.cascade). Projects with up to INLINE_LIMIT tasks
+# are deleted together with their tasks; larger ones are tombstoned and their
+# tasks removed in REAP_BATCH_SIZE batches by the background reaper.
+PROJECT_CASCADE = {
+    'INLINE_LIMIT': int(os.getenv('PROJECT_CASCADE_INLINE_LIMIT', '10000')),
+    'REAP_BATCH_SIZE': int(os.getenv('PROJECT_CASCADE_REAP_BATCH_SIZE', '1000')),
+}
+
+# MongoDB connection pool (backend.db), shared by auth_db and project_db.
+# WAIT_QUEUE_TIMEOUT_MS bounds how long a request waits for a free connection
+# when all MAX_POOL_SIZE are in use; WARM_UP opens connections at startup and
+# LAZY_CONNECT defers creating the client until the first query.
+MONGO_POOL = {
+    'MAX_POOL_SIZE': int(os.getenv('MONGO_MAX_POOL_SIZE', '100')),
+    'MIN_POOL_SIZE': int(os.getenv('MONGO_MIN_POOL_SIZE', '0')),
+    'MAX_IDLE_TIME_MS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS')) if os.getenv('MONGO_MAX_IDLE_TIME_MS') else None,
+    'WAIT_QUEUE_TIMEOUT_MS': int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS')) if os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS') else None,
+    'WARM_UP': _bool_env(os.getenv('MONGO_WARM_UP', 'True')),
+    'LAZY_CONNECT': _bool_env(os.getenv('MONGO_LAZY_CONNECT', 'False')),
+}
+
+# Per-request MongoDB profiling (backend.profiling): Server-Timing headers and a
+# warning when one request repeats a query shape more than N_PLUS_ONE_THRESHOLD times.
+QUERY_PROFILING = {
+    'ENABLED': _bool_env(os.getenv('QUERY_PROFILING', 'False')),
+    'N_PLUS_ONE_THRESHOLD': int(os.getenv('QUERY_PROFILING_N_PLUS_ONE_THRESHOLD', '10')),
+}
+
+# Token-bucket throttling of login, registration and bulk writes
+# (authapp.throttling). RATES are 'N/period' per scope: N requests of burst,
+# refilled at N per period. 'local' keeps buckets in each worker; 'django'
+# shares them through CACHES[ALIAS] across workers.
+THROTTLING = {
+    'ENABLED': _bool_env(os.getenv('THROTTLING', 'True')),
+    'BACKEND': os.getenv('THROTTLING_BACKEND', 'local'),
+    'ALIAS': os.getenv('THROTTLING_CACHE_ALIAS', 'default'),
+    'MAX_KEYS': int(os.getenv('THROTTLING_MAX_KEYS', '10000')),
+    'RATES': {
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '20/min'),
+        'login_user': os.getenv('THROTTLE_LOGIN_USER', '5/min'),
+        'register_ip': os.getenv('THROTTLE_REGISTER_IP', '5/min'),
+        'bulk_ip': os.getenv('THROTTLE_BULK_IP', '60/min'),
+        'bulk_user': os.getenv('THROTTLE_BULK_USER', '30/min'),
+    },
+}
+
+# Task archival (projectapp.archive, `manage.py archive_tasks`): done tasks
+# last updated more than AFTER_DAYS ago move to tasks_archive in BATCH_SIZE batches.
+TASK_ARCHIVE = {
+    'AFTER_DAYS': int(os.getenv('TASK_ARCHIVE_AFTER_DAYS', '90')),
+    'BATCH_SIZE': int(os.getenv('TASK_ARCHIVE_BATCH_SIZE', '1000')),
+}
+
+# Activity log (projectapp.activity): events are queued in memory (at most
+# MAX_QUEUE, the rest dropped) and written in batches of BATCH_SIZE or every
+# FLUSH_INTERVAL seconds by a background thread.
+ACTIVITY_LOG = {
+    'ENABLED': _bool_env(os.getenv('ACTIVITY_LOG', 'True')),
+    'MAX_QUEUE': int(os.getenv('ACTIVITY_LOG_MAX_QUEUE', '10000')),
+    'BATCH_SIZE': int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '500')),
+    'FLUSH_INTERVAL': float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', '1.0')),
+}
+
+# Response compression (backend.compression): gzip, or brotli when the
+# `brotli` package is installed, for responses of at least MIN_SIZE bytes.
+RESPONSE_COMPRESSION = {
+    'ENABLED': _bool_env(os.getenv('RESPONSE_COMPRESSION', 'False')),
+    'MIN_SIZE': int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', '1024')),
+    'GZIP_LEVEL': int(os.getenv('RESPONSE_COMPRESSION_GZIP_LEVEL', '6')),
+    'BROTLI_QUALITY': int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', '4')),
+}
 
 # MongoDB URI (if used elsewhere)
 MongoDB_URI = os.getenv('MONGODB_URI')
 
-import backend.db
\ No newline at end of file
+from backend.db import connect_databases
+connect_databases(MONGO_POOL, profiling=QUERY_PROFILING['ENABLED'])
\ No newline at end of file
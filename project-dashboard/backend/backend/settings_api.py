@@ -0,0 +1,51 @@
+"""Lean settings for API workers: DJANGO_SETTINGS_MODULE=backend.settings_api
+
+The API is JSON only and its data lives in MongoDB, so this profile drops the
+admin, sessions, messages, static files, CSRF and template machinery (and the
+sqlite ``DATABASES`` entry) from `backend.settings`, and registers the MongoDB
+aliases without creating the client. Use `backend.settings` for the admin,
+the browsable API and management commands that need them.
+
+Compare boot time and per-request cost of both profiles with
+``python manage.py bench_startup``.
+"""
+import os
+
+# read by backend.settings below; set them explicitly to override
+os.environ.setdefault('MONGO_LAZY_CONNECT', 'True')
+os.environ.setdefault('MONGO_WARM_UP', 'False')
+
+from backend.settings import *  # noqa: E402,F401,F403
+from backend.settings import REST_FRAMEWORK  # noqa: E402
+
+INSTALLED_APPS = [
+    'rest_framework',
+    'authapp',
+    'projectapp',
+    'corsheaders',
+    'rest_framework_mongoengine',
+]
+
+# views authenticate with SignedTokenAuthentication and are not CSRF-protected,
+# so only CORS, security headers and APPEND_SLASH remain
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    # before anything that reads the body; removes itself unless RESPONSE_COMPRESSION['ENABLED']
+    'backend.compression.CompressionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    # removes itself unless QUERY_PROFILING['ENABLED']
+    'backend.profiling.QueryProfilingMiddleware',
+]
+
+TEMPLATES = []
+DATABASES = {}
+AUTH_PASSWORD_VALIDATORS = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['backend.renderers.FastJSONRenderer'],
+    # AnonymousUser lives in django.contrib.auth, which is not installed here;
+    # unauthenticated requests get request.user = None
+    'UNAUTHENTICATED_USER': None,
+}
@@ -0,0 +1,220 @@
+"""Activity log: who changed which project or task, and when.
+
+Views call `log_task_change`/`log_project_change` and return right away.
+The events go into a bounded in-memory queue, and a background thread writes
+them to ``activity_log`` with one ``insert_many`` per batch. A batch is
+written when ``BATCH_SIZE`` events are waiting or ``FLUSH_INTERVAL`` seconds
+have passed, so a request never waits for the log. When the queue is full,
+new events are dropped and counted rather than blocking requests. Queued
+events are written on interpreter exit.
+
+`cycle_times` reports per project how many tasks were finished in a window
+(throughput) and how long they took from start to done (cycle time).
+"""
+import atexit
+import logging
+import queue
+import statistics
+import threading
+import time
+from datetime import datetime
+from bson import ObjectId
+from django.conf import settings
+from projectapp.models import ActivityEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_QUEUE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ACTIVITY_LOG', {})}
+
+
+# put by shutdown() so a writer waiting for its batch to fill flushes right away
+_WAKE = object()
+
+
+def _object_id(value):
+    return ObjectId(value) if value is not None and ObjectId.is_valid(value) else None
+
+
+class ActivityLog:
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(('recorded', 'dropped', 'written', 'failed', 'batches'), 0)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+
+    def record(self, event):
+        """Queue one event (a raw ``activity_log`` document); never blocks."""
+        self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('dropped')
+        else:
+            self._count('recorded')
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='activity-log', daemon=True)
+                    self._thread.start()
+                    atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+        # drain what was queued before shutdown
+        while True:
+            batch = self._collect(block=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _collect(self, block=True):
+        """Up to BATCH_SIZE events, waiting at most FLUSH_INTERVAL for the batch to fill (not after shutdown)."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block and not self._stop.is_set():
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    event = self._queue.get(timeout=timeout)
+                else:
+                    event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not _WAKE:
+                batch.append(event)
+        return batch
+
+    def _write(self, batch):
+        try:
+            ActivityEvent._get_collection().insert_many(batch, ordered=False)
+        except Exception:
+            logger.exception('writing %d activity event(s) failed; they are lost', len(batch))
+            self._count('failed', len(batch))
+        else:
+            self._count('written', len(batch))
+            self._count('batches')
+
+    def shutdown(self, timeout=10):
+        """Stop the writer after flushing the queue."""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put_nowait(_WAKE)
+            except queue.Full:
+                pass  # the writer is busy with a full queue, not waiting
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {**self._counts, 'queued': self._queue.qsize()}
+
+
+_activity_log = None
+_activity_log_lock = threading.Lock()
+
+
+def get_activity_log():
+    global _activity_log
+    if _activity_log is None:
+        with _activity_log_lock:
+            if _activity_log is None:
+                config = get_config()
+                _activity_log = ActivityLog(config['MAX_QUEUE'], config['BATCH_SIZE'], config['FLUSH_INTERVAL'])
+    return _activity_log
+
+
+def _record(action, user_id, project_id, task_id=None, before=None, after=None):
+    if not get_config()['ENABLED']:
+        return
+    get_activity_log().record({
+        'project': _object_id(project_id), 'task': _object_id(task_id), 'user': _object_id(user_id),
+        'action': action, 'from_status': before, 'to_status': after, 'at': datetime.utcnow(),
+    })
+
+
+def log_task_change(user_id, project_id, task_id, before=None, after=None):
+    """A task created (`before` None), updated or deleted (`after` None).
+
+    An update that keeps the status (e.g. a title edit) is recorded without
+    statuses, so it is not taken for another move to that status.
+    """
+    action = 'task.create' if before is None else 'task.delete' if after is None else 'task.update'
+    if action == 'task.update' and before == after:
+        before = after = None
+    _record(action, user_id, project_id, task_id, before, after)
+
+
+def log_project_change(action, user_id, project_id):
+    """``action`` is one of create, update, delete."""
+    _record(f'project.{action}', user_id, project_id)
+
+
+def cycle_times(project_ids, since):
+    """Per project: tasks finished since `since` and their cycle time in hours.
+
+    A task's cycle time runs from its first move to ``in_progress`` (or its
+    creation, when it never had one) to its last move to ``done``. One
+    aggregation finds the tasks finished in the window; a second reads when
+    they started.
+    """
+    events = ActivityEvent._get_collection()
+    done = {
+        row['_id']: row for row in events.aggregate([
+            # from_status excludes done -> done events written before edits were logged without statuses
+            {'$match': {'project': {'$in': list(project_ids)}, 'to_status': 'done', 'from_status': {'$ne': 'done'},
+                        'at': {'$gte': since}}},
+            {'$group': {'_id': '$task', 'project': {'$first': '$project'}, 'done_at': {'$max': '$at'}}},
+        ])
+    }
+    started = {
+        row['_id']: row['started_at'] or row['created_at'] for row in events.aggregate([
+            {'$match': {'task': {'$in': list(done)}, '$or': [{'to_status': 'in_progress'}, {'action': 'task.create'}]}},
+            {'$group': {
+                '_id': '$task',
+                'started_at': {'$min': {'$cond': [{'$eq': ['$to_status', 'in_progress']}, '$at', None]}},
+                'created_at': {'$min': {'$cond': [{'$eq': ['$action', 'task.create']}, '$at', None]}},
+            }},
+        ])
+    } if done else {}
+
+    hours = {project_id: [] for project_id in project_ids}
+    throughput = dict.fromkeys(project_ids, 0)
+    for task_id, row in done.items():
+        throughput[row['project']] += 1
+        start = started.get(task_id)
+        if start is not None and start <= row['done_at']:
+            hours[row['project']].append((row['done_at'] - start).total_seconds() / 3600)
+    return {
+        project_id: {
+            'throughput': throughput[project_id],
+            'cycle_time_hours': {
+                'avg': round(statistics.fmean(values), 2),
+                'p50': round(statistics.median(values), 2),
+                'max': round(max(values), 2),
+            } if values else None,
+        }
+        for project_id, values in hours.items()
+    }
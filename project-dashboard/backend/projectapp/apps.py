@@ -1,5 +1,13 @@
+import threading
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ProjectappConfig(AppConfig):
     name = 'projectapp'
+
+    def ready(self):
+        if getattr(settings, 'MONGO_POOL', {}).get('WARM_UP'):
+            from backend.db import warm_up
+            # in the background so a slow or unreachable cluster does not hold up startup
+            threading.Thread(target=warm_up, name='mongo-warm-up', daemon=True).start()
@@ -0,0 +1,103 @@
+"""Moving done tasks out of the hot ``tasks`` collection.
+
+Tasks that are ``done`` and were last updated more than ``AFTER_DAYS`` ago
+are copied to ``tasks_archive`` (same ``_id`` and fields, plus
+``archived_at``) and then deleted from ``tasks``, ``BATCH_SIZE`` at a time in
+(updated_at, _id) order. Each batch is idempotent: the copy is an upsert and
+the delete re-checks status and age, so a task reopened in between stays hot
+and its archive copy is dropped again.
+
+After every batch the position is stored in an `ArchiveCheckpoint`; a run
+that was interrupted resumes from there with the same cutoff. Project task
+counters keep counting archived tasks, so moving them changes no progress.
+"""
+from datetime import datetime, timedelta
+from django.conf import settings
+from pymongo import ReplaceOne
+from projectapp.cache import get_listing_cache
+from projectapp.models import ArchiveCheckpoint, ArchivedTask, Project, Task
+
+DEFAULTS = {
+    'AFTER_DAYS': 90,
+    'BATCH_SIZE': 1000,
+}
+CHECKPOINT = 'tasks'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'TASK_ARCHIVE', {})}
+
+
+def eligible_query(cutoff):
+    # served by the partial done_updated_at index
+    return {'status': 'done', 'updated_at': {'$lt': cutoff}}
+
+
+def count_eligible(days=None):
+    days = get_config()['AFTER_DAYS'] if days is None else days
+    return Task._get_collection().count_documents(eligible_query(datetime.utcnow() - timedelta(days=days)))
+
+
+def _checkpoint(days, restart):
+    checkpoints = ArchiveCheckpoint._get_collection()
+    state = checkpoints.find_one({'_id': CHECKPOINT})
+    if state and not state.get('finished_at') and not restart:
+        return state
+    state = {'_id': CHECKPOINT, 'cutoff': datetime.utcnow() - timedelta(days=days), 'last_updated_at': None,
+             'last_id': None, 'archived': 0, 'started_at': datetime.utcnow(), 'finished_at': None}
+    checkpoints.replace_one({'_id': CHECKPOINT}, state, upsert=True)
+    return state
+
+
+def _invalidate(project_ids):
+    listing_cache = get_listing_cache()
+    for project in Project._get_collection().find({'_id': {'$in': list(project_ids)}}, {'owner': 1}):
+        listing_cache.invalidate('project', str(project['_id']))
+        listing_cache.invalidate('user', str(project['owner']))
+
+
+def archive_batch(rows, cutoff):
+    """Move `rows` (raw task documents) to the archive; returns how many left ``tasks``."""
+    ids = [row['_id'] for row in rows]
+    now = datetime.utcnow()
+    ArchivedTask._get_collection().bulk_write(
+        [ReplaceOne({'_id': row['_id']}, {**row, 'archived_at': now}, upsert=True) for row in rows], ordered=False)
+    tasks = Task._get_collection()
+    moved = tasks.delete_many({'_id': {'$in': ids}, **eligible_query(cutoff)}).deleted_count
+    if moved < len(ids):
+        # changed since they were read: keep them hot only
+        stayed = [doc['_id'] for doc in tasks.find({'_id': {'$in': ids}}, {'_id': 1})]
+        ArchivedTask._get_collection().delete_many({'_id': {'$in': stayed}})
+    _invalidate({row['project'] for row in rows})
+    return moved
+
+
+def archive_tasks(days=None, batch_size=None, restart=False, progress=None):
+    """Archive done tasks older than `days`, resuming an unfinished run unless `restart`.
+
+    Returns the number of tasks archived by the whole run (including batches
+    done before a resume). `progress(archived)` is called after every batch.
+    """
+    config = get_config()
+    days = config['AFTER_DAYS'] if days is None else days
+    batch_size = batch_size or config['BATCH_SIZE']
+    state = _checkpoint(days, restart)
+    cutoff = state['cutoff']
+    checkpoints = ArchiveCheckpoint._get_collection()
+    tasks = Task._get_collection()
+    while True:
+        query = eligible_query(cutoff)
+        if state['last_id'] is not None:
+            last = state['last_updated_at']
+            query['$or'] = [{'updated_at': {'$gt': last}}, {'updated_at': last, '_id': {'$gt': state['last_id']}}]
+        rows = list(tasks.find(query).sort([('updated_at', 1), ('_id', 1)]).limit(batch_size))
+        if not rows:
+            checkpoints.update_one({'_id': CHECKPOINT}, {'$set': {'finished_at': datetime.utcnow()}})
+            return state['archived']
+        state['archived'] += archive_batch(rows, cutoff)
+        state['last_updated_at'], state['last_id'] = rows[-1]['updated_at'], rows[-1]['_id']
+        checkpoints.update_one({'_id': CHECKPOINT}, {'$set': {
+            'last_updated_at': state['last_updated_at'], 'last_id': state['last_id'], 'archived': state['archived'],
+        }})
+        if progress is not None:
+            progress(state['archived'])
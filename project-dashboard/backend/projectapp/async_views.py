@@ -0,0 +1,134 @@
+"""Async (ASGI) read path for project and task lists.
+
+These views mirror `ProjectView.get`/`TaskView.get` but talk to MongoDB through
+pymongo's AsyncMongoClient, so a slow round-trip parks a coroutine instead of a
+worker thread. Rows go through the same compiled row mappers as the sync
+views, so both paths return identical payloads. Writes stay on the
+synchronous views.
+
+As on the sync views, the caller is always the user of the
+``Authorization: Bearer`` token. The event stream also accepts a short-lived
+``?ticket=`` from ``/auth/stream-ticket/``, since EventSource cannot set headers.
+"""
+import asyncio
+from bson import ObjectId
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from authapp.authentication import request_token_user_id
+from authapp.tokens import InvalidToken
+from projectapp.changefeed import format_sse, get_change_feed
+from backend.db import get_async_collection
+from projectapp.models import Project, Task
+from projectapp.serializers import ProjectSerializer, TaskSerializer, serialize_rows
+from projectapp.pagination import (
+    PaginationError, encode_cursor, is_paginated, keyset_filter, parse_fields, parse_limit,
+)
+
+
+async def fetch_list(document, query, params, fields):
+    """Return ``(rows, next_cursor)`` for `query`, honouring limit/cursor/fields."""
+    projection = None
+    if fields:
+        projection = {('_id' if f == 'id' else f): 1 for f in set(fields) | {'created_at'}}
+    limit = None
+    if is_paginated(params):
+        limit = parse_limit(params.get('limit'))
+        if params.get('cursor'):
+            query = {'$and': [query, keyset_filter(params['cursor'])]}
+    cursor = get_async_collection(document).find(query, projection).sort([('created_at', 1), ('_id', 1)])
+    if limit is not None:
+        cursor = cursor.limit(limit + 1)
+    docs = [son async for son in cursor]
+    if limit is None:
+        return docs, None
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def unauthorized(error):
+    response = JsonResponse({'message': str(error)}, status=401)
+    response['WWW-Authenticate'] = 'Bearer'
+    return response
+
+
+class AsyncProjectView(View):
+    async def get(self, request):
+        try:
+            owner_id = ObjectId(request_token_user_id(request))
+        except InvalidToken as e:
+            return unauthorized(e)
+        try:
+            fields = parse_fields(request.GET.get('fields'), ProjectSerializer.Meta.fields)
+            projects, next_cursor = await fetch_list(Project, {'owner': owner_id}, request.GET, fields)
+        except PaginationError as e:
+            return JsonResponse({'message': str(e)}, status=400)
+        response_data = {
+            'projects': serialize_rows(ProjectSerializer, projects, fields),
+            'message': 'projects fetched successfully'
+        }
+        if is_paginated(request.GET):
+            response_data['next_cursor'] = next_cursor
+        return JsonResponse(response_data, status=200)
+
+
+class AsyncTaskView(View):
+    async def get(self, request):
+        try:
+            owner_id = ObjectId(request_token_user_id(request))
+        except InvalidToken as e:
+            return unauthorized(e)
+        project_id = request.GET.get('project_id')
+        if not project_id:
+            return JsonResponse({'message': 'project_id is required'}, status=400)
+        if not ObjectId.is_valid(project_id) or not await get_async_collection(Project).find_one(
+                {'_id': ObjectId(project_id), 'owner': owner_id}, {'_id': 1}):
+            return JsonResponse({'message': 'project not found'}, status=404)
+        try:
+            fields = parse_fields(request.GET.get('fields'), TaskSerializer.Meta.fields)
+            tasks, next_cursor = await fetch_list(Task, {'project': ObjectId(project_id)}, request.GET, fields)
+        except PaginationError as e:
+            return JsonResponse({'message': str(e)}, status=400)
+        response_data = {'tasks': serialize_rows(TaskSerializer, tasks, fields)}
+        if is_paginated(request.GET):
+            response_data['next_cursor'] = next_cursor
+        return JsonResponse(response_data, status=200)
+
+
+class AsyncEventStreamView(View):
+    """Server-sent events for the caller's projects and tasks.
+
+    EventSource cannot set headers, so instead of ``Authorization: Bearer``
+    it passes a stream ticket from ``POST /api/auth/stream-ticket/`` as
+    ``?ticket=``; the access token itself never appears in the URL. Browsers
+    send ``Last-Event-ID`` on reconnect and missed events are replayed; a
+    client that reconnects with a fresh ticket passes ``?last_event_id=``.
+    """
+    HEARTBEAT_SECONDS = 15
+
+    async def get(self, request):
+        try:
+            owner_id = request_token_user_id(request, ticket_param='ticket')
+        except InvalidToken as e:
+            return unauthorized(e)
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        feed = get_change_feed()
+        queue = feed.subscribe(owner_id, last_event_id)
+
+        async def stream():
+            try:
+                yield 'retry: 3000\n\n'
+                while True:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), self.HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield ': keep-alive\n\n'
+                        continue
+                    yield format_sse(event)
+            finally:
+                feed.unsubscribe(owner_id, queue)
+
+        response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -0,0 +1,5 @@
+"""Benchmark suite: data generator, micro-benchmarks and an HTTP load scenario.
+
+Run through ``manage.py bench_generate_data`` and ``manage.py bench_suite``;
+results can be stored as a baseline and later runs compared against it.
+"""
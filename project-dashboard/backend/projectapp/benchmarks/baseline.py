@@ -0,0 +1,39 @@
+"""Store benchmark results and compare later runs with them."""
+import json
+import platform
+from datetime import datetime
+
+
+def save(path, results):
+    document = {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Return ``[(name, metric, baseline, current, change)]`` for every regression.
+
+    Latency regresses when p95 grows by more than `tolerance` (relative); the
+    query count regresses whenever it grows, since it does not depend on the machine.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if previous['p95'] and current['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append((name, 'p95', previous['p95'], current['p95'], current['p95'] / previous['p95'] - 1))
+        if 'queries' in previous and current.get('queries', 0) > previous['queries']:
+            regressions.append((name, 'queries', previous['queries'], current['queries'],
+                                current['queries'] - previous['queries']))
+    return regressions
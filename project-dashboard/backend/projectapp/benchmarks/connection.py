@@ -0,0 +1,25 @@
+"""Point the document aliases at the benchmark database."""
+from django.conf import settings
+from django.core.management.base import CommandError
+from mongoengine import connect, disconnect
+from backend.db import ALIASES, CONNECTION_STRING, client_options
+
+
+def use_database(counter, mongomock=False, uri=None):
+    """Reconnect auth_db/project_db to mongomock or to `uri`, counting operations with `counter`."""
+    for alias in ALIASES:
+        disconnect(alias=alias)
+    if mongomock:
+        try:
+            import mongomock as mongomock_module
+        except ImportError:
+            raise CommandError('--mongomock needs the mongomock package (pip install mongomock)')
+        for alias in ALIASES:
+            connect(db=alias, alias=alias, host='mongodb://localhost', mongo_client_class=mongomock_module.MongoClient)
+        counter.attach_mongomock()
+        return 'mongomock'
+    options = client_options(getattr(settings, 'MONGO_POOL', None))
+    options['event_listeners'].append(counter)
+    for alias in ALIASES:
+        connect(db=alias, alias=alias, host=uri or CONNECTION_STRING, **options)
+    return uri or 'CONNECTION_STRING'
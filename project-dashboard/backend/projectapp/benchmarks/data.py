@@ -0,0 +1,91 @@
+"""Synthetic users, projects and tasks for benchmarks.
+
+Everything is written with raw ``insert_many`` and tagged with the
+``bench-`` username prefix, so a dataset can be generated at scale in seconds
+and removed again with `purge` (including what the runs left in the archive,
+activity log and tombstones) without touching real accounts.
+"""
+import random
+from datetime import datetime, timedelta
+from bson import ObjectId
+from werkzeug.security import generate_password_hash
+from authapp.hashing import get_config as get_hashing_config
+from authapp.models import User
+from projectapp.models import ActivityEvent, ArchivedTask, Project, ProjectTombstone, Task
+
+PREFIX = 'bench-'
+PASSWORD = 'bench-password'
+STATUSES = ('todo', 'in_progress', 'done')
+
+
+def generate(users=10, projects=5, tasks=200, seed=1, batch_size=5000):
+    """Create `users` users with `projects` projects each and `tasks` tasks per project.
+
+    Returns ``[{'username', 'user_id', 'project_ids'}]``. All users share the
+    password `PASSWORD`, hashed once with the configured method.
+    """
+    rng = random.Random(seed)
+    password_hash = generate_password_hash(PASSWORD, get_hashing_config()['METHOD'])
+    now = datetime.utcnow()
+    start = now - timedelta(days=365)
+    accounts, user_docs, project_docs, task_docs = [], [], [], []
+
+    def flush_tasks():
+        if task_docs:
+            Task._get_collection().insert_many(task_docs, ordered=False)
+            task_docs.clear()
+
+    for u in range(users):
+        user_id = ObjectId()
+        username = f'{PREFIX}{seed}-{u}'
+        user_docs.append({'_id': user_id, 'username': username, 'email': f'{username}@example.com',
+                          'password': password_hash, 'created_at': start, 'token_version': 0})
+        project_ids = []
+        for p in range(projects):
+            project_id = ObjectId()
+            project_ids.append(project_id)
+            counts = dict.fromkeys(STATUSES, 0)
+            last_activity = None
+            for t in range(tasks):
+                status = rng.choice(STATUSES)
+                counts[status] += 1
+                created_at = start + timedelta(seconds=rng.randrange(365 * 86400))
+                updated_at = created_at + timedelta(seconds=rng.randrange(86400))
+                last_activity = max(last_activity or updated_at, updated_at)
+                task_docs.append({'_id': ObjectId(), 'title': f'Task {t} of project {p}',
+                                  'description': rng.choice(('', 'Investigate and fix', 'Write docs', 'Review PR')),
+                                  'project': project_id, 'status': status,
+                                  'created_at': created_at, 'updated_at': updated_at})
+                if len(task_docs) >= batch_size:
+                    flush_tasks()
+            project_docs.append({'_id': project_id, 'name': f'Project {p}', 'description': f'Benchmark project {p}',
+                                 'owner': user_id, 'created_at': start, 'updated_at': now,
+                                 'deployment_date': now + timedelta(days=rng.randrange(-60, 60)),
+                                 'task_counts': counts, 'last_activity_at': last_activity})
+        accounts.append({'username': username, 'user_id': str(user_id), 'project_ids': [str(i) for i in project_ids]})
+    flush_tasks()
+    if user_docs:
+        User._get_collection().insert_many(user_docs, ordered=False)
+    if project_docs:
+        Project._get_collection().insert_many(project_docs, ordered=False)
+    return accounts
+
+
+def purge():
+    """Remove every generated user with their projects, tasks (live and archived), activity
+    events and project tombstones; returns the number of users removed."""
+    user_ids = [doc['_id'] for doc in User._get_collection().find({'username': {'$regex': f'^{PREFIX}'}}, {'_id': 1})]
+    if not user_ids:
+        return 0
+    project_ids = [doc['_id'] for doc in Project._get_collection().find({'owner': {'$in': user_ids}}, {'_id': 1})]
+    # projects deleted during a run may still have tasks waiting for the reaper
+    tombstones = ProjectTombstone._get_collection()
+    project_ids += [doc['_id'] for doc in tombstones.find({'owner': {'$in': user_ids}}, {'_id': 1})]
+    for document in (Task, ArchivedTask):
+        document._get_collection().delete_many({'project': {'$in': project_ids}})
+    ActivityEvent._get_collection().delete_many(
+        {'$or': [{'project': {'$in': project_ids}}, {'user': {'$in': user_ids}}]})
+    tombstones.delete_many({'owner': {'$in': user_ids}})
+    Project._get_collection().delete_many({'_id': {'$in': project_ids}})
+    User._get_collection().delete_many({'_id': {'$in': user_ids}})
+    return len(user_ids)
@@ -0,0 +1,46 @@
+"""HTTP load scenario run in-process through Django's test client.
+
+Each iteration logs in one of the generated users and walks the main screens:
+dashboard, project list, task list, then creates, updates and deletes a task.
+Every request is timed end to end (URL routing, middleware, view, renderer)
+and the MongoDB operations it issues are counted.
+"""
+import time
+from projectapp.benchmarks.data import PASSWORD
+from projectapp.benchmarks.stats import summarize
+
+
+def run(accounts, iterations, counter):
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+
+    timings, queries = {}, {}
+
+    def call(name, method, path, data=None, expect=200, **extra):
+        before = counter.count
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data, format='json' if method != 'get' else None, **extra)
+        timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+        queries.setdefault(name, []).append(counter.count - before)
+        if response.status_code != expect:
+            raise RuntimeError(f'{name}: expected {expect}, got {response.status_code}: {getattr(response, "data", "")}')
+        return response
+
+    # the scenario logs in far more often than the login throttle allows
+    with override_settings(ALLOWED_HOSTS=['*'], THROTTLING={'ENABLED': False}):
+        for i in range(iterations):
+            account = accounts[i % len(accounts)]
+            project_id = account['project_ids'][i % len(account['project_ids'])]
+            client = APIClient()
+            login = call('auth.login', 'post', '/api/auth/login/',
+                         {'username': account['username'], 'password': PASSWORD})
+            client.credentials(HTTP_AUTHORIZATION='Bearer ' + login.data['token'])
+            call('projects.dashboard', 'get', '/api/dashboard/')
+            call('projects.list', 'get', '/api/projects/')
+            call('tasks.list', 'get', '/api/tasks/', {'project_id': project_id, 'limit': 50})
+            created = call('tasks.create', 'post', '/api/tasks/',
+                           {'project_id': project_id, 'title': f'bench {i}'}, expect=201)
+            task_id = created.data['task']['id']
+            call('tasks.patch', 'patch', '/api/tasks/', {'task_id': task_id, 'status': 'done'})
+            call('tasks.delete', 'delete', '/api/tasks/', {'task_id': task_id})
+    return {name: summarize(samples, queries[name]) for name, samples in timings.items()}
@@ -0,0 +1,66 @@
+"""Micro-benchmarks of hot helpers; no database needed."""
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from projectapp.benchmarks.stats import summarize
+
+
+def task_rows(count):
+    """Raw task rows shaped like the documents pymongo returns."""
+    project_id = ObjectId()
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            '_id': ObjectId(),
+            'title': f'Task {i}',
+            'description': 'Benchmark task description ' * 3,
+            'project': project_id,
+            'status': ('todo', 'in_progress', 'done')[i % 3],
+            'created_at': start + timedelta(seconds=i, milliseconds=i % 1000),
+            'updated_at': start + timedelta(seconds=i * 2),
+        }
+        for i in range(count)
+    ]
+
+
+def sample(fn, samples, inner=1):
+    """Latency of `fn` in ms per call: `samples` measurements of `inner` back-to-back calls each."""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        timings.append((time.perf_counter() - started) * 1000 / inner)
+    return timings
+
+
+def run(samples=200, hash_samples=20, rows=100):
+    from rest_framework.renderers import JSONRenderer
+    from authapp.hashing import hash_password, verify_password
+    from authapp.tokens import issue_token, verify_token
+    from authapp.models import User
+    from backend.renderers import FastJSONRenderer
+    from projectapp.models import Task
+    from projectapp.serializers import TaskSerializer, serialize_rows
+    from projectapp.views import validate_keys
+
+    data = task_rows(rows)
+    documents = [Task._from_son(row) for row in data]
+    payload = {'user_id': str(ObjectId()), 'project_id': str(ObjectId()), 'title': 'x'}
+    user = User(id=ObjectId(), username='bench', email='bench@example.com', password='x')
+    token = issue_token(user)
+    pwhash = hash_password('bench-password')
+
+    cases = {
+        f'serialize.document_serializer[{rows}]':
+            (lambda: JSONRenderer().render(TaskSerializer(documents, many=True).data), samples, 1),
+        f'serialize.row_mapper[{rows}]':
+            (lambda: FastJSONRenderer().render(serialize_rows(TaskSerializer, data)), samples, 1),
+        'validate_keys.ok': (lambda: validate_keys(payload, ['user_id', 'project_id', 'title']), samples, 100),
+        'validate_keys.missing': (lambda: validate_keys(payload, ['user_id', 'task_id']), samples, 100),
+        'tokens.issue': (lambda: issue_token(user), samples, 100),
+        'tokens.verify': (lambda: verify_token(token), samples, 100),
+        'hashing.hash': (lambda: hash_password('bench-password'), hash_samples, 1),
+        'hashing.verify': (lambda: verify_password(pwhash, 'bench-password'), hash_samples, 1),
+    }
+    return {name: summarize(sample(fn, n, inner)) for name, (fn, n, inner) in cases.items()}
@@ -0,0 +1,63 @@
+"""Count MongoDB operations issued while a block runs.
+
+Against a real server the counter is a pymongo command listener passed to the
+client; mongomock has no command monitoring, so there the collection methods
+are wrapped instead. Both count one per round-trip-equivalent call.
+"""
+import functools
+import threading
+from pymongo import monitoring
+
+MONGOMOCK_METHODS = (
+    'find', 'find_one', 'insert_one', 'insert_many', 'update_one', 'update_many', 'replace_one',
+    'delete_one', 'delete_many', 'aggregate', 'count_documents', 'distinct', 'bulk_write',
+    'find_one_and_update', 'find_one_and_delete', 'find_one_and_replace',
+)
+
+
+class QueryCounter(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.count = 0
+
+    def _add(self):
+        with self._lock:
+            self.count += 1
+
+    def started(self, event):
+        # cursor follow-ups and server chatter are not separate queries of the request
+        if event.command_name not in ('getMore', 'endSessions', 'killCursors'):
+            self._add()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def attach_mongomock(self):
+        from mongomock.collection import Collection
+        for name in MONGOMOCK_METHODS:
+            original = getattr(Collection, name, None)
+            if original is None or getattr(original, '_bench_counted', False):
+                continue
+            setattr(Collection, name, self._counted(original))
+
+    def _counted(self, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # mongomock methods call each other (find_one -> find); count the outer call only
+            depth = getattr(self._local, 'depth', 0)
+            if depth == 0:
+                self._add()
+            self._local.depth = depth + 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+        wrapper._bench_counted = True
+        return wrapper
+
+
+counter = QueryCounter()
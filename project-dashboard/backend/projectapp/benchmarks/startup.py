@@ -0,0 +1,83 @@
+"""Cold-start benchmark of a settings profile, measured in a fresh interpreter.
+
+Each run starts ``python -X importtime`` with the profile as
+DJANGO_SETTINGS_MODULE, loads the WSGI application, then times requests for an
+unrouted path, which pass through the whole middleware chain and URL
+resolution without touching MongoDB.
+"""
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from projectapp.benchmarks.stats import summarize
+
+# modules the lean profile should never load
+TRIMMED = (
+    'django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages',
+    'django.contrib.staticfiles', 'django.middleware.csrf', 'rest_framework.templatetags',
+)
+
+PROBE = '''
+import json, logging, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+boot = time.perf_counter() - started
+from mongoengine.connection import _connections
+modules = sorted(sys.modules)
+clients = sorted(_connections)
+logging.disable(logging.CRITICAL)
+from io import BytesIO
+from django.core.handlers.wsgi import WSGIRequest
+environ = {{'REQUEST_METHOD': 'GET', 'PATH_INFO': '/__bench_startup__/', 'SERVER_NAME': 'testserver',
+           'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO()}}
+timings = []
+for _ in range({requests}):
+    request = WSGIRequest(dict(environ))
+    started = time.perf_counter()
+    application.get_response(request)
+    timings.append((time.perf_counter() - started) * 1000)
+print(json.dumps({{'boot_ms': boot * 1000, 'modules': modules, 'clients': clients, 'request_ms': timings}}))
+'''
+
+
+def slowest_imports(importtime, limit):
+    """Top-level packages from ``-X importtime`` output by cumulative time (ms)."""
+    top = []
+    for line in importtime.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):
+            top.append((name.strip(), int(cumulative) / 1000))
+    return sorted(top, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def measure(settings_module, requests=500):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module, 'DEBUG': 'False',
+           'ALLOWED_HOSTS': 'testserver'}
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(requests=requests)],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['imports'] = slowest_imports(completed.stderr, 8)
+    return result
+
+
+def run(profiles, repeat=5, requests=500):
+    """Per profile: boot time summary over `repeat` fresh interpreters, per-request cost and what was loaded."""
+    results = {}
+    for settings_module in profiles:
+        runs = [measure(settings_module, requests) for _ in range(repeat)]
+        last = runs[-1]
+        results[settings_module] = {
+            'boot': summarize([run['boot_ms'] for run in runs]),
+            'request': summarize([ms for run in runs for ms in run['request_ms']]),
+            'modules': len(last['modules']),
+            'trimmed_loaded': [name for name in last['modules'] if name.startswith(TRIMMED)],
+            'clients': last['clients'],
+            'imports': last['imports'],
+        }
+    return results
@@ -0,0 +1,20 @@
+import statistics
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(samples_ms, queries=None):
+    """p50/p95/p99/mean of latency samples in milliseconds, plus the mean query count if given."""
+    summary = {
+        'n': len(samples_ms),
+        'p50': round(statistics.median(samples_ms), 4),
+        'p95': round(percentile(samples_ms, 95), 4),
+        'p99': round(percentile(samples_ms, 99), 4),
+        'mean': round(statistics.fmean(samples_ms), 4),
+    }
+    if queries is not None:
+        summary['queries'] = round(statistics.fmean(queries), 2)
+    return summary
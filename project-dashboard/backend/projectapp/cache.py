@@ -0,0 +1,187 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL.
+
+    Entries live in this worker only. Listing entries are still never stale
+    across workers, because their version tokens are kept in MongoDB
+    (`MongoVersionStore`); other workers just miss more often than with the
+    ``django`` backend on a shared cache.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=-1):
+        # timeout=-1 uses the default TTL, None never expires
+        ttl = self.ttl if timeout == -1 else timeout
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Adapter over a configured Django cache (e.g. Redis or memcached)."""
+
+    def __init__(self, alias='default', ttl=60):
+        from django.core.cache import caches
+        self._cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, timeout=-1):
+        self._cache.set(key, value, self.ttl if timeout == -1 else timeout)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class MongoVersionStore:
+    """Version tokens in the ``listing_versions`` collection.
+
+    Every worker and management command (``archive_tasks``) reads and replaces
+    the same tokens, at the cost of one ``_id`` lookup per cached read.
+    """
+
+    def _collection(self):
+        from projectapp.models import ListingVersion
+        return ListingVersion._get_collection()
+
+    def get(self, key):
+        doc = self._collection().find_one({'_id': key}, {'token': 1})
+        return doc['token'] if doc else None
+
+    def set(self, key, value, timeout=None):
+        # tokens are tiny and replaced in place, so they never expire
+        self._collection().update_one({'_id': key}, {'$set': {'token': value}}, upsert=True)
+
+
+class ListingCache:
+    """Read-through cache for list responses, invalidated through version tokens.
+
+    Every scope (a user's projects, a project's tasks) has a version token that
+    is part of each entry's key. Writes replace the token, so older entries are
+    simply never read again and expire on their own. A read that races with a
+    write stores its result under the old token, so it cannot serve stale data.
+    Tokens live in `versions` (the entry backend when not given).
+    """
+
+    def __init__(self, backend, versions=None):
+        self.backend = backend
+        self.versions = versions or backend
+        # tokens this process read or set, with when: version(max_age=...) reuses them
+        self._recent = LRUCache(max_entries=4096, ttl=None)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def version(self, scope, scope_id, max_age=None):
+        """Current version token of a scope; it changes on every invalidation.
+
+        With `max_age`, a token this process read or set less than `max_age`
+        seconds ago is returned without asking the version store, so a write
+        made by another process may go unnoticed for that long.
+        """
+        version_key = f'listing-version:{scope}:{scope_id}'
+        if max_age:
+            recent = self._recent.get(version_key)
+            if recent is not None and time.monotonic() - recent[1] < max_age:
+                return recent[0]
+        version = self.versions.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.versions.set(version_key, version, timeout=None)
+        self._recent.set(version_key, (version, time.monotonic()))
+        return version
+
+    def key(self, scope, scope_id, params=None, kind=''):
+        # QueryDict.lists() keeps repeated parameters such as ?status=a&status=b;
+        # `kind` separates different listings that share a scope
+        items = params.lists() if hasattr(params, 'lists') else (params or {}).items()
+        query = kind + '?' + '&'.join(f'{k}={v}' for k, v in sorted(items))
+        digest = hashlib.md5(query.encode()).hexdigest()
+        return f'listing:{scope}:{scope_id}:{self.version(scope, scope_id)}:{digest}'
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def invalidate(self, scope, scope_id):
+        version_key = f'listing-version:{scope}:{scope_id}'
+        version = uuid.uuid4().hex
+        self.versions.set(version_key, version, timeout=None)
+        self._recent.set(version_key, (version, time.monotonic()))
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'versions': type(self.versions).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_listing_cache = None
+_listing_cache_lock = threading.Lock()
+
+
+def get_listing_cache():
+    global _listing_cache
+    if _listing_cache is None:
+        with _listing_cache_lock:
+            if _listing_cache is None:
+                config = getattr(settings, 'LISTING_CACHE', {})
+                ttl = config.get('TTL', 60)
+                if config.get('BACKEND', 'lru') == 'django':
+                    backend = DjangoCacheBackend(config.get('ALIAS', 'default'), ttl=ttl)
+                else:
+                    backend = LRUCache(config.get('MAX_ENTRIES', 1024), ttl=ttl)
+                # 'backend' is only safe when the backend is shared by every process
+                versions = MongoVersionStore() if config.get('VERSIONS', 'mongo') == 'mongo' else None
+                _listing_cache = ListingCache(backend, versions)
+    return _listing_cache
@@ -0,0 +1,161 @@
+"""Project deletion together with its tasks.
+
+Projects with at most ``INLINE_LIMIT`` tasks are removed with one
+``delete_many`` on the tasks and one ``delete_one`` on the project, inside a
+transaction when the deployment supports them (replica set / mongos). On a
+standalone server the project goes first, so a crash in between can only
+leave orphans behind, which ``sweep_orphan_tasks`` removes.
+
+Larger projects would hold the request (and the transaction) for too long.
+Their project document is deleted right away, which hides them from every
+read, and a `ProjectTombstone` records the tasks that are still to be removed.
+A background reaper thread deletes those tasks in batches; the
+``reap_deleted_projects`` command does the same from cron or by hand.
+"""
+import logging
+import threading
+from datetime import datetime
+from django.conf import settings
+from pymongo.errors import OperationFailure
+from projectapp.models import ArchivedTask, Project, ProjectTombstone, Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'INLINE_LIMIT': 10000,
+    'REAP_BATCH_SIZE': 1000,
+}
+# "Transaction numbers are only allowed on a replica set member or mongos"
+ILLEGAL_OPERATION = 20
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PROJECT_CASCADE', {})}
+
+
+_transactions_supported = None
+
+
+def task_collections():
+    # archived tasks go with their project too
+    return Task._get_collection(), ArchivedTask._get_collection()
+
+
+def _delete_in_transaction(project_id):
+    client = Project._get_collection().database.client
+
+    def delete(session):
+        deleted = sum(collection.delete_many({'project': project_id}, session=session).deleted_count
+                      for collection in task_collections())
+        Project._get_collection().delete_one({'_id': project_id}, session=session)
+        return deleted
+
+    with client.start_session() as session:
+        return session.with_transaction(delete)
+
+
+def _delete_inline(project_id):
+    global _transactions_supported
+    if _transactions_supported is not False:
+        try:
+            deleted = _delete_in_transaction(project_id)
+            _transactions_supported = True
+            return deleted
+        except OperationFailure as e:
+            if e.code != ILLEGAL_OPERATION:
+                raise
+            _transactions_supported = False
+    Project._get_collection().delete_one({'_id': project_id})
+    return sum(collection.delete_many({'project': project_id}).deleted_count for collection in task_collections())
+
+
+def delete_project(project_id, owner_id=None):
+    """Delete a project and its tasks.
+
+    Returns ``(deleted_tasks, deferred)``. When `deferred` is true the project
+    is gone but its tasks are left to the reaper.
+    """
+    limit = get_config()['INLINE_LIMIT']
+    task_count = sum(collection.count_documents({'project': project_id}, limit=limit + 1)
+                     for collection in task_collections())
+    if task_count <= limit:
+        return _delete_inline(project_id), False
+    # tombstone first so the tasks are never left without a record; reap() skips live projects
+    ProjectTombstone(project_id=project_id, owner=owner_id, deleted_at=datetime.utcnow()).save()
+    Project._get_collection().delete_one({'_id': project_id})
+    start_reaper()
+    return 0, True
+
+
+def delete_tasks(project_id, batch_size, progress=None):
+    """Delete the (hot and archived) tasks of `project_id` `batch_size` at a time; returns the number deleted."""
+    deleted = 0
+    for tasks in task_collections():
+        while True:
+            ids = [doc['_id'] for doc in tasks.find({'project': project_id}, {'_id': 1}).limit(batch_size)]
+            if not ids:
+                break
+            deleted += tasks.delete_many({'_id': {'$in': ids}}).deleted_count
+            if progress is not None:
+                progress(project_id, deleted)
+    return deleted
+
+
+def reap(batch_size=None, progress=None):
+    """Remove the tasks of every tombstoned project in batches; returns the number of tasks deleted.
+
+    `progress(project_id, deleted)` is called after every batch.
+    """
+    batch_size = batch_size or get_config()['REAP_BATCH_SIZE']
+    total = 0
+    for tombstone in ProjectTombstone._get_collection().find().sort('deleted_at', 1):
+        project_id = tombstone['_id']
+        if Project._get_collection().count_documents({'_id': project_id}, limit=1):
+            # the project delete after the tombstone failed; the project is still live
+            ProjectTombstone._get_collection().delete_one({'_id': project_id})
+            continue
+        deleted = delete_tasks(project_id, batch_size, progress)
+        ProjectTombstone._get_collection().delete_one({'_id': project_id})
+        total += deleted
+    return total
+
+
+_reaper = None
+_reaper_lock = threading.Lock()
+
+
+def _run_reaper():
+    try:
+        reap()
+    except Exception:
+        logger.exception('project reaper failed; remaining tombstones are retried on the next deletion')
+
+
+def start_reaper():
+    """Start the in-process reaper thread unless one is already running."""
+    global _reaper
+    with _reaper_lock:
+        if _reaper is None or not _reaper.is_alive():
+            _reaper = threading.Thread(target=_run_reaper, name='project-reaper', daemon=True)
+            _reaper.start()
+
+
+def iter_orphan_project_ids(batch_size=1000):
+    """Yield, once each, project ids referenced by hot or archived tasks whose project no longer exists."""
+    reported = set()
+
+    def missing(ids):
+        existing = {doc['_id'] for doc in Project._get_collection().find({'_id': {'$in': ids}}, {'_id': 1})}
+        orphans = [project_id for project_id in ids if project_id not in existing and project_id not in reported]
+        reported.update(orphans)
+        return orphans
+
+    for tasks in task_collections():
+        batch = []
+        for row in tasks.aggregate([{'$group': {'_id': '$project'}}], allowDiskUse=True):
+            batch.append(row['_id'])
+            if len(batch) >= batch_size:
+                yield from missing(batch)
+                batch = []
+        if batch:
+            yield from missing(batch)
@@ -0,0 +1,191 @@
+"""Push channel for project/task changes.
+
+One MongoDB change stream per process watches ``project_db.projects`` and
+``project_db.tasks``; every change is routed to the subscribers of the owning
+user through bounded asyncio queues. A short history of recent events lets a
+reconnecting client resume from its last event id; when that id is no longer
+in the history the client gets a ``reset`` event and should refetch.
+
+Task deletes only carry the document id. They are routed from the pre-image
+when the collection has ``changeStreamPreAndPostImages`` enabled; otherwise
+only tasks the feed has already seen an event for can be routed.
+"""
+import asyncio
+import logging
+import weakref
+from collections import OrderedDict, deque
+from backend.db import get_async_collection
+from backend.renderers import dumps
+from projectapp.models import Project, Task
+from projectapp.serializers import ProjectSerializer, TaskSerializer, compile_row_mapper
+
+logger = logging.getLogger(__name__)
+
+WATCHED = {
+    Project._get_collection_name(): ('project', Project, ProjectSerializer),
+    Task._get_collection_name(): ('task', Task, TaskSerializer),
+}
+OPERATIONS = ('insert', 'update', 'replace', 'delete')
+RESET = {'id': None, 'type': 'reset', 'data': {}}
+
+
+class _BoundedDict(OrderedDict):
+    def __init__(self, max_entries):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def remember(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+
+async def watch_mongo(resume_token):
+    """Yield change documents from the shared change stream, resuming after `resume_token`."""
+    database = get_async_collection(Task).database
+    pipeline = [{'$match': {'ns.coll': {'$in': list(WATCHED)}, 'operationType': {'$in': list(OPERATIONS)}}}]
+    options = {'full_document': 'updateLookup', 'full_document_before_change': 'whenAvailable'}
+    if resume_token:
+        options['resume_after'] = {'_data': resume_token}
+    async with await database.watch(pipeline, **options) as stream:
+        async for change in stream:
+            yield change
+
+
+async def lookup_project_owner(project_id):
+    doc = await get_async_collection(Project).find_one({'_id': project_id}, {'owner': 1})
+    return str(doc['owner']) if doc else None
+
+
+class ChangeFeed:
+    """Fan-out of one change stream to per-owner subscriber queues.
+
+    `watch` and `owner_lookup` are injectable so the feed can run on an
+    in-process fake instead of a replica set.
+    """
+    RETRY_SECONDS = 1
+
+    def __init__(self, watch=watch_mongo, owner_lookup=lookup_project_owner,
+                 history=1000, queue_size=100, owner_cache_size=10000):
+        self._watch = watch
+        self._owner_lookup = owner_lookup
+        self._history = deque(maxlen=history)
+        self._queue_size = queue_size
+        self._subscribers = {}
+        self._project_owners = _BoundedDict(owner_cache_size)
+        self._task_projects = _BoundedDict(owner_cache_size)
+        self._resume_token = None
+        self._runner = None
+
+    def subscribe(self, owner_id, last_event_id=None):
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        if last_event_id:
+            missed = self._replay(owner_id, last_event_id)
+            if missed is None or len(missed) >= self._queue_size:
+                queue.put_nowait(RESET)
+            else:
+                for event in missed:
+                    queue.put_nowait(event)
+        self._subscribers.setdefault(owner_id, set()).add(queue)
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+            self._runner.add_done_callback(self._runner_done)
+        return queue
+
+    def _runner_done(self, runner):
+        # a finished task still references its loop, the feed's key in _feeds
+        if self._runner is runner:
+            self._runner = None
+
+    def unsubscribe(self, owner_id, queue):
+        queues = self._subscribers.get(owner_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[owner_id]
+
+    def _replay(self, owner_id, last_event_id):
+        events = list(self._history)
+        for position, (token, _, _) in enumerate(events):
+            if token == last_event_id:
+                return [event for _, owner, event in events[position + 1:] if owner == owner_id]
+        return None
+
+    async def _run(self):
+        while True:
+            try:
+                async for change in self._watch(self._resume_token):
+                    await self.dispatch(change)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('change stream interrupted, resuming')
+                await asyncio.sleep(self.RETRY_SECONDS)
+
+    async def _owner_of(self, kind, change):
+        doc = change.get('fullDocument') or change.get('fullDocumentBeforeChange')
+        doc_id = change['documentKey']['_id']
+        if kind == 'project':
+            if doc is not None:
+                self._project_owners.remember(doc_id, str(doc['owner']))
+            return self._project_owners.get(doc_id)
+        project_id = doc.get('project') if doc is not None else self._task_projects.get(doc_id)
+        if project_id is None:
+            return None
+        self._task_projects.remember(doc_id, project_id)
+        owner = self._project_owners.get(project_id)
+        if owner is None:
+            owner = await self._owner_lookup(project_id)
+            if owner is not None:
+                self._project_owners.remember(project_id, owner)
+        return owner
+
+    async def dispatch(self, change):
+        kind, document, serializer = WATCHED[change['ns']['coll']]
+        operation = change['operationType']
+        token = change['_id']['_data']
+        self._resume_token = token
+        owner = await self._owner_of(kind, change)
+        if owner is None:
+            return
+        full_document = change.get('fullDocument')
+        event = {
+            'id': token,
+            'type': f'{kind}.{operation}',
+            'data': {
+                'id': str(change['documentKey']['_id']),
+                kind: compile_row_mapper(document, serializer.Meta.fields)(full_document) if full_document else None,
+            },
+        }
+        self._history.append((token, owner, event))
+        for queue in list(self._subscribers.get(owner, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # slow consumer: drop its backlog and ask it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESET)
+
+
+def format_sse(event):
+    lines = []
+    if event['id']:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append('data: ' + dumps(event['data']).decode())
+    return '\n'.join(lines) + '\n\n'
+
+
+# one feed per event loop, dropped with the loop (e.g. per test or asyncio.run)
+_feeds = weakref.WeakKeyDictionary()
+
+
+def get_change_feed():
+    loop = asyncio.get_running_loop()
+    feed = _feeds.get(loop)
+    if feed is None:
+        feed = _feeds[loop] = ChangeFeed()
+    return feed
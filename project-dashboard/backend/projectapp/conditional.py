@@ -0,0 +1,48 @@
+import hashlib
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def listing_etag(queryset, params, archived=None):
+    """Validator for a list response, computed without loading the documents.
+
+    Uses max(updated_at) and the document count of the queryset's filter; both
+    are answered from the (scope, updated_at) index. The query string is mixed
+    in because `fields`/`limit`/`cursor` change the representation. Lists that
+    include archived tasks pass the ``tasks_archive`` queryset as `archived`.
+    """
+    parts = []
+    for each in (queryset, archived):
+        if each is None:
+            continue
+        collection = each._collection
+        query = each._query
+        latest = next(collection.find(query, {'_id': 0, 'updated_at': 1}).sort('updated_at', -1).limit(1), None)
+        updated_at = latest.get('updated_at') if latest else None
+        parts.append(f'{updated_at.isoformat() if updated_at else ""}|{collection.count_documents(query)}')
+    items = params.lists() if hasattr(params, 'lists') else params.items()
+    query_string = '&'.join(f'{k}={v}' for k, v in sorted(items))
+    raw = '|'.join(parts) + f'|{query_string}'
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # If-None-Match uses weak comparison
+    candidates = {tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(header)}
+    return '*' in candidates or etag in candidates
+
+
+def listing_response(request, etag, data):
+    """200 with `data`, or an empty 304 when the client already holds `etag`."""
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    # let browsers keep the body but revalidate on every use
+    response['Cache-Control'] = 'private, no-cache'
+    return response
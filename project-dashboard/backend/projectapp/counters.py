@@ -0,0 +1,106 @@
+"""Denormalized task counters on projects.
+
+`Project.task_counts` holds the number of tasks per status and
+`Project.last_activity_at` the time of the latest task write, so project lists
+can show progress without reading any tasks. Every task write adjusts them
+with a single ``$inc``; the ``repair_task_counters`` command recomputes them
+from the tasks collection if they ever drift (e.g. after a crash between the
+task write and the counter update, or writes made outside the API).
+Archived tasks (projectapp.archive) still count towards their project.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+from pymongo import UpdateOne
+from projectapp.models import ArchivedTask, Project, Task, TaskCounts
+
+STATUSES = tuple(TaskCounts._fields_ordered)
+
+
+def status_delta(before=None, after=None):
+    """Counter changes for one task moving from status `before` to `after` (None = absent)."""
+    delta = Counter()
+    if before is not None:
+        delta[before] -= 1
+    if after is not None:
+        delta[after] += 1
+    return delta
+
+
+def _counter_update(delta, when):
+    # updated_at moves too: it drives the project list ETag, and the list shows the counters
+    update = {'$max': {'last_activity_at': when, 'updated_at': when}}
+    inc = {f'task_counts.{key}': count for key, count in delta.items() if count and key in STATUSES}
+    if inc:
+        update['$inc'] = inc
+    return update
+
+
+def record_task_change(project_id, before=None, after=None):
+    """Apply one task's status change to its project's counters."""
+    Project._get_collection().update_one(
+        {'_id': project_id}, _counter_update(status_delta(before, after), datetime.utcnow()))
+
+
+def apply_deltas(deltas):
+    """Apply ``{project_id: Counter}`` from a batch of task writes in one bulk_write."""
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    requests = [UpdateOne({'_id': project_id}, _counter_update(delta, now)) for project_id, delta in deltas.items()]
+    Project._get_collection().bulk_write(requests, ordered=False)
+
+
+def recompute(project_ids=None, batch_size=500, write=True):
+    """Recompute counters from the tasks and tasks_archive collections; yields ``(project_id, changed)`` per project.
+
+    Projects are handled in batches of `batch_size` with one aggregation each.
+    With ``write=False`` drifted counters are only reported.
+    """
+    query = {'_id': {'$in': list(project_ids)}} if project_ids is not None else {}
+    projects = Project._get_collection().find(query, {'task_counts': 1, 'last_activity_at': 1}).batch_size(batch_size)
+    batch = []
+    for project in projects:
+        batch.append(project)
+        if len(batch) >= batch_size:
+            yield from _recompute_batch(batch, write)
+            batch = []
+    if batch:
+        yield from _recompute_batch(batch, write)
+
+
+def _recompute_batch(projects, write):
+    ids = [project['_id'] for project in projects]
+    counts = defaultdict(lambda: dict.fromkeys(STATUSES, 0))
+    activity = {}
+    pipeline = [
+        {'$match': {'project': {'$in': ids}}},
+        {'$group': {'_id': {'project': '$project', 'status': '$status'},
+                    'count': {'$sum': 1}, 'last': {'$max': '$updated_at'}}},
+    ]
+    rows = [row for document in (Task, ArchivedTask) for row in document._get_collection().aggregate(pipeline)]
+    for row in rows:
+        project_id = row['_id']['project']
+        if row['_id']['status'] in STATUSES:
+            counts[project_id][row['_id']['status']] += row['count']
+        if row['last'] is not None and (project_id not in activity or row['last'] > activity[project_id]):
+            activity[project_id] = row['last']
+
+    requests, results = [], []
+    for project in projects:
+        project_id = project['_id']
+        expected_counts = counts[project_id]
+        stored_activity = project.get('last_activity_at')
+        latest = activity.get(project_id)
+        # writes stamp last_activity_at after the task's updated_at, and deletes leave no
+        # task behind, so only a missing or older value has drifted
+        expected_activity = latest if latest is not None and (
+            stored_activity is None or latest > stored_activity) else stored_activity
+        stored_counts = {key: (project.get('task_counts') or {}).get(key, 0) for key in STATUSES}
+        changed = stored_counts != expected_counts or stored_activity != expected_activity
+        if changed:
+            requests.append(UpdateOne({'_id': project_id}, {'$set': {
+                'task_counts': expected_counts, 'last_activity_at': expected_activity}}))
+        results.append((project_id, changed))
+    if write and requests:
+        Project._get_collection().bulk_write(requests, ordered=False)
+    return results
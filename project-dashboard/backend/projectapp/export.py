@@ -0,0 +1,67 @@
+"""Streaming export of a user's projects and tasks.
+
+Rows are read from raw pymongo cursors in `batch_size` chunks and written out
+one line at a time, so memory use does not depend on the size of the export
+and the first bytes leave as soon as the first batch arrives.
+"""
+import csv
+import io
+from backend.renderers import dumps
+from projectapp.models import ArchivedTask, Project, Task
+from projectapp.serializers import ProjectSerializer, TaskSerializer, compile_row_mapper
+
+CSV_COLUMNS = (
+    'type', 'id', 'project', 'name', 'title', 'description', 'status',
+    'created_at', 'updated_at', 'start_date', 'deployment_date',
+)
+
+
+def iter_records(owner_id, batch_size):
+    """Yield ``(type, row)`` for every project of `owner_id`, then every task of those projects.
+
+    Archived tasks (``tasks_archive``) follow the hot ones; a task archived
+    while the export runs may appear twice, but is never left out.
+    """
+    project_row = compile_row_mapper(Project, ProjectSerializer.Meta.fields)
+    task_row = compile_row_mapper(Task, TaskSerializer.Meta.fields)
+    project_ids = []
+    cursor = Project._get_collection().find({'owner': owner_id}).sort('_id', 1).batch_size(batch_size)
+    for doc in cursor:
+        project_ids.append(doc['_id'])
+        yield 'project', project_row(doc)
+    if not project_ids:
+        return
+    for tasks in (Task._get_collection(), ArchivedTask._get_collection()):
+        cursor = tasks.find({'project': {'$in': project_ids}}).batch_size(batch_size)
+        for doc in cursor:
+            yield 'task', task_row(doc)
+
+
+def iter_ndjson(records):
+    for record_type, row in records:
+        yield dumps({'type': record_type, **row}) + b'\n'
+
+
+def iter_csv(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for record_type, row in records:
+        writer.writerow({'type': record_type, **row})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def chunked(pieces, chunk_size=64 * 1024):
+    """Group small pieces into ~chunk_size writes to keep per-chunk overhead low."""
+    buffered, size = [], 0
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield buffered[0][:0].join(buffered)
+            buffered, size = [], 0
+    if buffered:
+        yield buffered[0][:0].join(buffered)
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from projectapp.archive import archive_tasks, count_eligible
+
+
+class Command(BaseCommand):
+    help = ('Move done tasks last updated more than --days ago to tasks_archive in batches; '
+            'an interrupted run resumes from its checkpoint. Meant to run from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='archive done tasks older than this (default TASK_ARCHIVE["AFTER_DAYS"])')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='tasks per batch (default TASK_ARCHIVE["BATCH_SIZE"])')
+        parser.add_argument('--restart', action='store_true',
+                            help='start a new run with a fresh cutoff instead of resuming an unfinished one')
+        parser.add_argument('--check', action='store_true',
+                            help='only count the tasks that would be archived')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.stdout.write(self.style.SUCCESS(f'{count_eligible(options["days"])} task(s) eligible for archiving'))
+            return
+        started = time.monotonic()
+
+        def progress(archived):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{archived} task(s) archived ({archived / elapsed:.0f}/s)')
+
+        total = archive_tasks(options['days'], options['batch_size'], options['restart'], progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} task(s) archived in {time.monotonic() - started:.1f}s'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from projectapp.models import ArchivedTask, Project, Task
+
+
+class Command(BaseCommand):
+    help = ('Set updated_at from created_at on projects and tasks stored before the field existed, '
+            'so sort=updated_at covers them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='documents per write (default 1000)')
+        parser.add_argument('--check', action='store_true',
+                            help='only count documents without updated_at, do not write')
+
+    def backfill(self, collection, batch_size):
+        missing = {'updated_at': {'$exists': False}}
+        updated, last_id = 0, None
+        while True:
+            query = {**missing, '_id': {'$gt': last_id}} if last_id is not None else missing
+            ids = [doc['_id'] for doc in collection.find(query, {'_id': 1}).sort('_id', 1).limit(batch_size)]
+            if not ids:
+                return updated
+            # one pipeline update per batch copies each document's own created_at
+            collection.update_many({'_id': {'$in': ids}, **missing}, [{'$set': {'updated_at': '$created_at'}}])
+            updated += len(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'{collection.name}: {updated} document(s) updated')
+
+    def handle(self, *args, **options):
+        total = 0
+        for document in (Project, Task, ArchivedTask):
+            collection = document._get_collection()
+            if options['check']:
+                count = collection.count_documents({'updated_at': {'$exists': False}})
+                self.stdout.write(f'{collection.name}: {count} document(s) without updated_at')
+            else:
+                count = self.backfill(collection, options['batch_size'])
+            total += count
+        action = 'found' if options['check'] else 'backfilled'
+        self.stdout.write(self.style.SUCCESS(f'{action} {total} document(s) without updated_at'))
@@ -0,0 +1,60 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from django.core.management.base import BaseCommand
+from projectapp.benchmarks.stats import percentile
+
+
+class Command(BaseCommand):
+    help = ('Compare the sync (WSGI-style APIView) and async list endpoints of a running server '
+            'under concurrent load. Start the server with an ASGI server (e.g. uvicorn backend.asgi:application) '
+            'to exercise the async path properly.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api')
+        parser.add_argument('--token', required=True, help='access token from /api/auth/login/')
+        parser.add_argument('--project-id', help='also benchmark the task list of this project')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, **options):
+        base = options['base_url'].rstrip('/')
+        headers = {'Authorization': f'Bearer {options["token"]}'}
+        pairs = [('projects', {})]
+        if options['project_id']:
+            pairs.append(('tasks', {'project_id': options['project_id']}))
+        for resource, params in pairs:
+            for label, path in (('sync', f'{resource}/'), ('async', f'async/{resource}/')):
+                url = f'{base}/{path}?{urlencode(params)}'
+                self._run(f'{label:5} {resource}', url, headers, options['requests'], options['concurrency'])
+
+    def _run(self, label, url, headers, total, concurrency):
+        def fetch(_):
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, OSError):
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+        latencies = [latency * 1000 for latency, ok in results if ok]
+        errors = total - len(latencies)
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f'{label}: all {total} requests failed'))
+            return
+        self.stdout.write(
+            f'{label}: {len(latencies) / elapsed:8.1f} req/s  '
+            f'p50 {statistics.median(latencies):7.1f}ms  '
+            f'p95 {percentile(latencies, 95):7.1f}ms  '
+            f'p99 {percentile(latencies, 99):7.1f}ms  '
+            f'errors {errors}'
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from projectapp.benchmarks import data
+from projectapp.benchmarks.connection import use_database
+from projectapp.benchmarks.queries import counter
+
+
+class Command(BaseCommand):
+    help = ('Generate benchmark users (bench-* usernames), projects and tasks at a configurable scale, '
+            'or remove them with --purge.')
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--mongomock', action='store_true', help='fill an in-memory mongomock database')
+        target.add_argument('--mongo-uri', help='database to fill (e.g. a local mongod)')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--projects', type=int, default=5, help='projects per user')
+        parser.add_argument('--tasks', type=int, default=200, help='tasks per project')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--purge', action='store_true', help='remove all generated data instead')
+
+    def handle(self, *args, **options):
+        if not options['mongomock'] and not options['mongo_uri']:
+            # never default to CONNECTION_STRING: --purge deletes every bench-* user there
+            raise CommandError('pass --mongomock or --mongo-uri; this command writes to (or purges) that database')
+        target = use_database(counter, mongomock=options['mongomock'], uri=options['mongo_uri'])
+        if options['purge']:
+            removed = data.purge()
+            self.stdout.write(self.style.SUCCESS(f'{target}: removed {removed} benchmark user(s) and their data'))
+            return
+        accounts = data.generate(options['users'], options['projects'], options['tasks'], options['seed'])
+        total = options['users'] * options['projects'] * options['tasks']
+        self.stdout.write(self.style.SUCCESS(
+            f'{target}: created {len(accounts)} user(s), {options["users"] * options["projects"]} project(s), '
+            f'{total} task(s); password "{data.PASSWORD}"'))
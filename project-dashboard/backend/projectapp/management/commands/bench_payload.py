@@ -0,0 +1,78 @@
+import gzip
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from backend.compression import DEFAULTS as COMPRESSION_DEFAULTS, brotli
+from backend.renderers import FastJSONRenderer
+from projectapp.benchmarks.micro import task_rows
+from projectapp.serializers import _EPOCH, _render_datetime, TaskSerializer, serialize_columns, serialize_rows
+
+
+def rows_from_columns(body, datetime_fields):
+    """Inverse of serialize_columns, to check that both layouts carry the same data."""
+    columns, refs = body['columns'], body['refs']
+    rows = []
+    for index in range(body['count']):
+        row = {}
+        for name, values in columns.items():
+            value = values[index]
+            if name in refs:
+                value = refs[name][value]
+            elif name in datetime_fields and value is not None:
+                value = _render_datetime(_EPOCH + timedelta(milliseconds=value))
+            row[name] = value
+        rows.append(row)
+    return rows
+
+
+class Command(BaseCommand):
+    help = ('Compare the size and encode time of a task list in the row and columnar layouts, '
+            'uncompressed, gzipped and brotli-compressed (no database needed).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--link-mbps', type=float, default=10.0, help='link speed for the transfer estimate')
+
+    def best(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+        return result, min(timings) * 1000
+
+    def handle(self, *args, **options):
+        rows = task_rows(options['tasks'])
+        layouts = {
+            'rows': lambda: FastJSONRenderer().render({'tasks': serialize_rows(TaskSerializer, rows)}),
+            'columnar': lambda: FastJSONRenderer().render(
+                {'tasks': serialize_columns(TaskSerializer, rows, interned=('project',))}),
+        }
+        expected = serialize_rows(TaskSerializer, rows[:200])
+        if rows_from_columns(serialize_columns(TaskSerializer, rows[:200], interned=('project',)),
+                             ('created_at', 'updated_at')) != expected:
+            self.stderr.write(self.style.ERROR('columnar layout does not carry the same data as the row layout'))
+            return
+
+        encoders = {
+            'identity': lambda payload: payload,
+            'gzip': lambda payload: gzip.compress(payload, compresslevel=COMPRESSION_DEFAULTS['GZIP_LEVEL'], mtime=0),
+        }
+        if brotli is not None:
+            encoders['br'] = lambda payload: brotli.compress(payload, quality=COMPRESSION_DEFAULTS['BROTLI_QUALITY'])
+        else:
+            self.stdout.write('brotli is not installed; skipping br')
+
+        bytes_per_ms = options['link_mbps'] * 1e6 / 8 / 1000
+        baseline = None
+        self.stdout.write(f'{len(rows)} tasks, transfer estimated at {options["link_mbps"]:g} Mbit/s')
+        self.stdout.write(f'{"layout":9} {"encoding":9} {"bytes":>10} {"vs rows":>8} {"encode ms":>10} {"transfer ms":>12}')
+        for layout, render in layouts.items():
+            payload, render_ms = self.best(render, options['repeat'])
+            for encoding, encode in encoders.items():
+                body, encode_ms = self.best(lambda: encode(payload), options['repeat'])
+                baseline = baseline or len(body)
+                self.stdout.write(
+                    f'{layout:9} {encoding:9} {len(body):10d} {len(body) / baseline:7.1%} '
+                    f'{render_ms + (encode_ms if encoding != "identity" else 0):10.1f} {len(body) / bytes_per_ms:12.1f}')
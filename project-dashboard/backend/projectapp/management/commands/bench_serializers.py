@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from backend.renderers import FastJSONRenderer
+from projectapp.models import Task
+from projectapp.benchmarks.micro import task_rows
+from projectapp.serializers import TaskSerializer, serialize_rows
+
+
+class Command(BaseCommand):
+    help = 'Compare DocumentSerializer + JSONRenderer with the compiled row mapper + FastJSONRenderer (no database needed).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        rows = task_rows(options['tasks'])
+
+        def document_path():
+            data = TaskSerializer([Task._from_son(row) for row in rows], many=True).data
+            return JSONRenderer().render({'tasks': data})
+
+        def fast_path():
+            return FastJSONRenderer().render({'tasks': serialize_rows(TaskSerializer, rows)})
+
+        if JSONRenderer().render({'tasks': serialize_rows(TaskSerializer, rows[:50])}) != \
+                JSONRenderer().render({'tasks': TaskSerializer([Task._from_son(r) for r in rows[:50]], many=True).data}):
+            self.stderr.write(self.style.ERROR('fast path output differs from DocumentSerializer output'))
+            return
+
+        timings = {}
+        for label, fn in (('DocumentSerializer', document_path), ('compiled + fast renderer', fast_path)):
+            best = None
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                fn()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+            self.stdout.write(f'{label:26}: {best * 1000:9.1f} ms total, {best / len(rows) * 1e6:7.2f} us/task')
+        speedup = timings['DocumentSerializer'] / timings['compiled + fast renderer']
+        self.stdout.write(self.style.SUCCESS(f'speedup: {speedup:.1f}x'))
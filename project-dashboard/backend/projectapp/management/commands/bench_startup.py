@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from projectapp.benchmarks import startup
+
+
+class Command(BaseCommand):
+    help = ('Compare worker cold start (imports + WSGI application load) and per-request middleware cost '
+            'of the full and the lean "api" settings profiles, each in a fresh interpreter.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['backend.settings', 'backend.settings_api'])
+        parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per profile')
+        parser.add_argument('--requests', type=int, default=500, help='timed requests per interpreter')
+        parser.add_argument('--check', action='store_true',
+                            help='fail if the lean profile loads trimmed modules or creates a MongoDB client at boot')
+
+    def handle(self, *args, **options):
+        results = startup.run(options['profiles'], options['repeat'], options['requests'])
+        for profile, result in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(profile))
+            boot, request = result['boot'], result['request']
+            self.stdout.write(f'  boot     p50 {boot["p50"]:9.1f} ms   p95 {boot["p95"]:9.1f} ms')
+            self.stdout.write(f'  request  p50 {request["p50"] * 1000:9.1f} us   p95 {request["p95"] * 1000:9.1f} us')
+            self.stdout.write(f'  modules {result["modules"]}, MongoDB clients at boot: {result["clients"] or "none"}')
+            for name, ms in result['imports']:
+                self.stdout.write(f'    {name:32} {ms:8.1f} ms')
+
+        first, *others = results
+        for profile in others:
+            boot = results[first]['boot']['p50'] / results[profile]['boot']['p50']
+            request = results[first]['request']['p50'] / results[profile]['request']['p50']
+            self.stdout.write(self.style.SUCCESS(
+                f'{profile} vs {first}: boot {boot:.2f}x, per-request {request:.2f}x faster'))
+
+        if options['check']:
+            lean = results.get('backend.settings_api')
+            if lean is None:
+                raise CommandError('--check needs backend.settings_api among --profiles')
+            problems = [f'loads {name}' for name in lean['trimmed_loaded']]
+            problems += [f'creates the {alias} client at boot' for alias in lean['clients']]
+            if problems:
+                raise CommandError('backend.settings_api ' + '; '.join(problems))
+            self.stdout.write(self.style.SUCCESS('backend.settings_api loads none of the trimmed modules'))
@@ -0,0 +1,69 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from projectapp.benchmarks import baseline, data, load, micro
+from projectapp.benchmarks.connection import use_database
+from projectapp.benchmarks.queries import counter
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(micro.__file__), 'baseline.json')
+
+
+class Command(BaseCommand):
+    help = ('Run the micro-benchmarks and the HTTP load scenario (login, dashboard, task CRUD), '
+            'report p50/p95/p99 and query counts, and compare them with a stored baseline.')
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--mongomock', action='store_true', help='run against an in-memory mongomock database')
+        target.add_argument('--mongo-uri', help='run against this server (e.g. a local mongod)')
+        parser.add_argument('--users', type=int, default=5)
+        parser.add_argument('--projects', type=int, default=5, help='projects per user')
+        parser.add_argument('--tasks', type=int, default=200, help='tasks per project')
+        parser.add_argument('--iterations', type=int, default=50, help='load scenario iterations')
+        parser.add_argument('--samples', type=int, default=200, help='micro-benchmark samples')
+        parser.add_argument('--skip-micro', action='store_true')
+        parser.add_argument('--skip-load', action='store_true')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative p95 growth (default 0.2)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='exit non-zero on regressions')
+
+    def handle(self, *args, **options):
+        if not options['mongomock'] and not options['mongo_uri']:
+            raise CommandError('pass --mongomock or --mongo-uri; the suite writes benchmark data to the database')
+        results = {}
+        if not options['skip_micro']:
+            self.stdout.write('micro-benchmarks ...')
+            results.update(micro.run(options['samples']))
+        if not options['skip_load']:
+            target = use_database(counter, mongomock=options['mongomock'], uri=options['mongo_uri'])
+            self.stdout.write(f'load scenario against {target} ...')
+            accounts = data.generate(options['users'], options['projects'], options['tasks'])
+            try:
+                results.update(load.run(accounts, options['iterations'], counter))
+            finally:
+                data.purge()
+
+        self._report(results)
+        if options['save_baseline']:
+            baseline.save(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f'baseline saved to {options["baseline"]}'))
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(f'no baseline at {options["baseline"]}; run with --save-baseline to store one')
+            return
+        regressions = baseline.compare(results, baseline.load(options['baseline']), options['tolerance'])
+        for name, metric, before, after, change in regressions:
+            detail = f'{change:+.0%}' if metric == 'p95' else f'{change:+g}'
+            self.stdout.write(self.style.ERROR(f'regression {name} {metric}: {before} -> {after} ({detail})'))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('no regressions against the baseline'))
+        elif options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s) against the baseline')
+
+    def _report(self, results):
+        self.stdout.write(f'{"benchmark":36} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10} {"queries":>8}')
+        for name, summary in results.items():
+            queries = summary.get('queries')
+            self.stdout.write(
+                f'{name:36} {summary["p50"]:10.4f} {summary["p95"]:10.4f} {summary["p99"]:10.4f} '
+                f'{"" if queries is None else queries:>8}')
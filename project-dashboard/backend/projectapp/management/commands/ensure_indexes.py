@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from authapp.models import User
+from projectapp.models import ActivityEvent, ArchivedTask, Project, Task
+
+DOCUMENTS = (User, Project, Task, ArchivedTask, ActivityEvent)
+
+
+class Command(BaseCommand):
+    help = 'Build the indexes declared in document meta and report missing or unused indexes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='only report, do not build missing indexes')
+
+    def handle(self, *args, **options):
+        for document in DOCUMENTS:
+            collection = document._get_collection()
+            name = collection.full_name
+            diff = document.compare_indexes()
+            for spec in diff['missing']:
+                self.stdout.write(self.style.WARNING(f'{name}: missing index {spec}'))
+            for spec in diff['extra']:
+                self.stdout.write(f'{name}: index not declared in meta {spec}')
+
+            if not options['check'] and diff['missing']:
+                # a collection holds one text index, so a changed one replaces the old
+                if any(direction == 'text' for spec in diff['missing'] for _, direction in spec):
+                    for index_name, info in collection.index_information().items():
+                        if ('_fts', 'text') in info['key']:
+                            collection.drop_index(index_name)
+                            self.stdout.write(self.style.WARNING(f'{name}: dropped text index {index_name}'))
+                # index_background is set in meta, so builds don't block the collection
+                document.ensure_indexes()
+                self.stdout.write(self.style.SUCCESS(f'{name}: built {len(diff["missing"])} index(es)'))
+
+            for stats in collection.aggregate([{'$indexStats': {}}]):
+                if stats['name'] == '_id_':
+                    continue
+                ops = stats['accesses']['ops']
+                since = stats['accesses']['since']
+                if ops == 0:
+                    self.stdout.write(self.style.WARNING(
+                        f'{name}: index {stats["name"]} unused since {since:%Y-%m-%d %H:%M}'))
+                else:
+                    self.stdout.write(f'{name}: index {stats["name"]} used {ops} time(s) since {since:%Y-%m-%d %H:%M}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from projectapp.cascade import reap
+
+
+class Command(BaseCommand):
+    help = 'Remove the remaining tasks of projects that were deleted with a tombstone.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='tasks per delete (default PROJECT_CASCADE["REAP_BATCH_SIZE"])')
+
+    def handle(self, *args, **options):
+        def progress(project_id, deleted):
+            self.stdout.write(f'{project_id}: {deleted} task(s) deleted')
+
+        total = reap(options['batch_size'], progress)
+        self.stdout.write(self.style.SUCCESS(f'{total} task(s) of deleted projects removed'))
@@ -0,0 +1,34 @@
+from bson import ObjectId
+from django.core.management.base import BaseCommand, CommandError
+from projectapp.counters import recompute
+
+
+class Command(BaseCommand):
+    help = 'Recompute Project.task_counts and last_activity_at from the tasks and tasks_archive collections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', action='append', default=[],
+                            help='only repair this project id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='projects per aggregation (default 500)')
+        parser.add_argument('--check', action='store_true',
+                            help='only report drifted counters, do not write')
+
+    def handle(self, *args, **options):
+        project_ids = None
+        if options['project']:
+            invalid = [value for value in options['project'] if not ObjectId.is_valid(value)]
+            if invalid:
+                raise CommandError('invalid project id: ' + ', '.join(invalid))
+            project_ids = [ObjectId(value) for value in options['project']]
+
+        scanned = drifted = 0
+        for project_id, changed in recompute(project_ids, options['batch_size'], write=not options['check']):
+            scanned += 1
+            if changed:
+                drifted += 1
+                self.stdout.write(f'{project_id}: counters out of date')
+            if scanned % 1000 == 0:
+                self.stdout.write(f'{scanned} project(s) scanned')
+        action = 'found' if options['check'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'{scanned} project(s) scanned, {action} {drifted} with drifted counters'))
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from projectapp.cascade import delete_tasks, iter_orphan_project_ids, task_collections
+
+
+class Command(BaseCommand):
+    help = 'Delete tasks (hot and archived) whose project no longer exists, reporting progress as it goes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='tasks per delete (default 1000)')
+        parser.add_argument('--check', action='store_true',
+                            help='only count orphaned tasks, do not delete them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        projects = tasks = 0
+
+        def progress(project_id, deleted):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'{project_id}: {deleted} task(s) deleted '
+                              f'({tasks + deleted} total, {(tasks + deleted) / elapsed:.0f}/s)')
+
+        for project_id in iter_orphan_project_ids(batch_size):
+            projects += 1
+            if options['check']:
+                count = sum(tasks.count_documents({'project': project_id}) for tasks in task_collections())
+                self.stdout.write(f'{project_id}: {count} orphaned task(s)')
+                tasks += count
+            else:
+                tasks += delete_tasks(project_id, batch_size, progress)
+
+        action = 'found' if options['check'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {tasks} orphaned task(s) of {projects} missing project(s) '
+            f'in {time.monotonic() - started:.1f}s'))
@@ -1,27 +1,145 @@
-from mongoengine import Document, StringField, ReferenceField, DateTimeField
+from mongoengine import (
+    Document, EmbeddedDocument, EmbeddedDocumentField, IntField, ObjectIdField, StringField, ReferenceField,
+    DateTimeField,
+)
 from datetime import datetime
 
+class TaskCounts(EmbeddedDocument):
+    """Per-status task counts kept on the project (see projectapp.counters)."""
+    todo = IntField(default=0)
+    in_progress = IntField(default=0)
+    done = IntField(default=0)
+
 class Project(Document):
     meta = {
         'collection': 'projects',
-        'db_alias': 'project_db'
+        'db_alias': 'project_db',
+        'index_background': True,
+        'indexes': [
+            ('owner', 'created_at'),
+            # max(updated_at) per owner for list ETags
+            ('owner', 'updated_at'),
+            # /api/search/ (one text index per collection); the owner prefix keeps a
+            # search within the caller's projects, and queries must pass it by equality
+            {'fields': ['owner', '$name', '$description'], 'weights': {'name': 3, 'description': 1},
+             'name': 'owner_project_text'},
+        ]
     }
     name = StringField(required=True)
     description = StringField()
     owner = ReferenceField('User', required=True)
     created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
     # Optional project dates
     start_date = DateTimeField()
     deployment_date = DateTimeField()
+    # Denormalized from tasks, maintained with $inc on every task write
+    task_counts = EmbeddedDocumentField(TaskCounts, default=TaskCounts)
+    last_activity_at = DateTimeField()
+
+    def save(self, *args, **kwargs):
+        self.updated_at = datetime.utcnow()
+        return super().save(*args, **kwargs)
 
 class Task(Document):
     meta = {
         'collection': 'tasks',
-        'db_alias': 'project_db'
+        'db_alias': 'project_db',
+        'index_background': True,
+        'indexes': [
+            # project listing ordered by created_at (keyset pagination)
+            ('project', 'created_at'),
+            # status-filtered listings/counts within a project
+            ('project', 'status', 'created_at'),
+            # max(updated_at) per project for list ETags
+            ('project', 'updated_at'),
+            # /api/search/ (one text index per collection); not prefixed, because a
+            # prefix must be matched by equality and search asks for project $in
+            {'fields': ['$title', '$description'], 'weights': {'title': 3, 'description': 1}, 'name': 'task_text'},
+            # archival scan (projectapp.archive); only done tasks are indexed
+            {'fields': ['updated_at', 'id'], 'partialFilterExpression': {'status': 'done'}, 'name': 'done_updated_at'},
+        ]
     }
     title = StringField(required=True)
     description = StringField()
     project = ReferenceField(Project, required=True)
     status = StringField(choices=['todo', 'in_progress', 'done'], default='todo')
     created_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    def save(self, *args, **kwargs):
+        self.updated_at = datetime.utcnow()
+        return super().save(*args, **kwargs)
+
+class ArchivedTask(Document):
+    """A done task moved out of `tasks` by the archiver; same fields and ``_id``."""
+    meta = {
+        'collection': 'tasks_archive',
+        'db_alias': 'project_db',
+        'index_background': True,
+        'indexes': [
+            ('project', 'created_at'),
+            ('project', 'updated_at'),
+        ]
+    }
+    title = StringField(required=True)
+    description = StringField()
+    project = ReferenceField(Project, required=True)
+    status = StringField(choices=['todo', 'in_progress', 'done'], default='done')
+    created_at = DateTimeField()
+    updated_at = DateTimeField()
+    archived_at = DateTimeField()
+
+class ArchiveCheckpoint(Document):
+    """Progress of an archival run, so an interrupted run resumes where it stopped."""
+    meta = {
+        'collection': 'archive_checkpoints',
+        'db_alias': 'project_db',
+    }
+    name = StringField(primary_key=True)
+    cutoff = DateTimeField()
+    last_updated_at = DateTimeField()
+    last_id = ObjectIdField()
+    archived = IntField(default=0)
+    started_at = DateTimeField()
+    finished_at = DateTimeField()
+
+class ListingVersion(Document):
+    """Version token of a listing cache scope, shared by every worker (projectapp.cache)."""
+    meta = {
+        'collection': 'listing_versions',
+        'db_alias': 'project_db',
+    }
+    key = StringField(primary_key=True)
+    token = StringField()
 
+class ActivityEvent(Document):
+    """One project/task change, written in batches by projectapp.activity."""
+    meta = {
+        'collection': 'activity_log',
+        'db_alias': 'project_db',
+        'index_background': True,
+        'indexes': [
+            # tasks finished per project in a time window
+            ('project', 'to_status', 'at'),
+            # start times of those tasks
+            ('task', 'at'),
+        ]
+    }
+    project = ObjectIdField(required=True)
+    task = ObjectIdField()
+    user = ObjectIdField()
+    action = StringField(required=True)
+    from_status = StringField()
+    to_status = StringField()
+    at = DateTimeField(required=True)
+
+class ProjectTombstone(Document):
+    """A deleted project whose tasks are still being removed by the reaper."""
+    meta = {
+        'collection': 'project_tombstones',
+        'db_alias': 'project_db',
+    }
+    project_id = ObjectIdField(primary_key=True)
+    owner = ObjectIdField()
+    deleted_at = DateTimeField(default=datetime.utcnow)
@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from mongoengine.queryset.visitor import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    """Raised for malformed list query parameters (`limit`, `cursor`, `fields`, `sort`, filters)."""
+
+
+def is_paginated(params):
+    return 'limit' in params or 'cursor' in params
+
+
+def sort_value(row, sort_field='created_at'):
+    """`row[sort_field]`, falling back to created_at for documents stored before
+    the field existed (see the backfill_updated_at command)."""
+    return row.get(sort_field) or row['created_at']
+
+
+def encode_cursor(row, sort_field='created_at'):
+    """Opaque cursor for a raw (pymongo) row."""
+    payload = json.dumps([sort_value(row, sort_field).isoformat(), str(row['_id'])], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), ObjectId(doc_id)
+    except (ValueError, TypeError, InvalidId):
+        raise PaginationError('invalid cursor')
+
+
+def keyset_filter(cursor, sort_field='created_at', descending=False):
+    """Raw Mongo filter selecting documents after `cursor` in (sort_field, _id) order."""
+    value, doc_id = decode_cursor(cursor)
+    after = '$lt' if descending else '$gt'
+    return {'$or': [{sort_field: {after: value}}, {sort_field: value, '_id': {after: doc_id}}]}
+
+
+def parse_limit(raw):
+    if raw in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(raw, allowed_fields):
+    """Turn `fields=a,b` into a tuple of serializer fields, or None for all fields."""
+    if not raw:
+        return None
+    fields = tuple(f.strip() for f in raw.split(',') if f.strip())
+    unknown = [f for f in fields if f not in allowed_fields]
+    if unknown:
+        raise PaginationError('unknown fields: ' + ', '.join(unknown))
+    return fields
+
+
+def parse_layout(raw):
+    """``rows`` (default, a list of objects) or ``columnar`` (see serializers.serialize_columns)."""
+    if raw in (None, '', 'rows'):
+        return 'rows'
+    if raw != 'columnar':
+        raise PaginationError('layout must be rows or columnar')
+    return raw
+
+
+def parse_sort(raw, allowed):
+    """Turn `sort=-field` into ``(field, descending)``; only whitelisted (indexed) keys are accepted."""
+    if raw in (None, ''):
+        return None
+    field = raw.lstrip('-')
+    if field not in allowed:
+        raise PaginationError('sort must be one of: ' + ', '.join(f'{key}, -{key}' for key in allowed))
+    return field, raw.startswith('-')
+
+
+def project_queryset(queryset, fields, sort_field='created_at'):
+    # the sort field, created_at (its fallback) and id are always loaded because the cursor is built from them
+    if not fields:
+        return queryset
+    return queryset.only(*(set(fields) | {'id', 'created_at', sort_field}))
+
+
+def paginate(queryset, params, sort_field='created_at', descending=False):
+    """Keyset pagination on (sort_field, id), ascending unless `descending`.
+
+    `queryset` must yield raw rows (``as_pymongo()``). Returns
+    ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    The query fetches one extra document to know whether another page exists,
+    so the cost of a page does not depend on how deep into the collection it is.
+    """
+    limit = parse_limit(params.get('limit'))
+    cursor = params.get('cursor')
+    if cursor:
+        value, doc_id = decode_cursor(cursor)
+        after = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{sort_field}__{after}': value}) | Q(**{sort_field: value, f'id__{after}': doc_id}))
+    direction = '-' if descending else '+'
+    docs = list(queryset.order_by(direction + sort_field, direction + 'id').limit(limit + 1))
+    next_cursor = encode_cursor(docs[limit - 1], sort_field) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def paginate_merged(querysets, params, sort_field='created_at', descending=False):
+    """`paginate` over several collections with the same filter (e.g. tasks and tasks_archive).
+
+    Each queryset is paginated from the same cursor and the pages are merged in
+    (sort_field, id) order, so a cursor works across all of them.
+    """
+    limit = parse_limit(params.get('limit'))
+    pages = [paginate(queryset, params, sort_field, descending) for queryset in querysets]
+    rows = merge_rows([page for page, _ in pages], sort_field, descending)
+    # a source with another page returned `limit` rows, so rows[limit - 1] exists
+    more = any(next_cursor is not None for _, next_cursor in pages)
+    next_cursor = encode_cursor(rows[limit - 1], sort_field) if more or len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def merge_rows(row_lists, sort_field='created_at', descending=False):
+    """Raw rows of several queries as one list in (sort_field, id) order."""
+    return sorted((row for rows in row_lists for row in rows),
+                  key=lambda row: (sort_value(row, sort_field), row['_id']), reverse=descending)
@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+
+def ref_id(document, field_name):
+    """Return the id stored in a ReferenceField without dereferencing it.
+
+    The raw value in ``_data`` is a DBRef (or the Document itself once it has
+    been assigned/dereferenced); both expose ``.id``.
+    """
+    if document is None:
+        return None
+    value = document._data.get(field_name)
+    return getattr(value, 'id', value)
+
+
+class ReferenceIdField(serializers.Field):
+    """Read-only field rendering a ReferenceField as its stored id string."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return ref_id(instance, self.source)
+
+    def to_representation(self, value):
+        return str(value) if value is not None else None
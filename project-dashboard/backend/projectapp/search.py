@@ -0,0 +1,131 @@
+"""Search over the caller's project names and task titles/descriptions.
+
+Full-text queries use the ``owner_project_text``/``task_text`` indexes and
+are ranked by text score across both collections. The project index starts
+with ``owner``, so a project search only reads the caller's matches. Tasks are
+searched with one query over the caller's projects (``project: {$in: ...}``),
+which a compound text index cannot serve because its prefix must be matched by
+equality. Typeahead (prefix) queries are answered from a per-user
+`PrefixIndex` held in an in-process LRU: it is built with two projected
+queries on the first keystroke and reused until one of the user's projects or
+tasks changes, as told by the listing cache's ``user`` version token. That
+token is re-read at most every ``TYPEAHEAD_VERSION_MAX_AGE`` seconds, so a
+burst of keystrokes is answered from memory.
+"""
+import re
+import threading
+from bisect import bisect_left
+from django.conf import settings
+from projectapp.cache import LRUCache, get_listing_cache
+from projectapp.models import Project, Task
+from projectapp.serializers import ProjectSerializer, TaskSerializer, compile_row_mapper
+
+DEFAULTS = {
+    'MAX_RESULTS': 100,
+    'TYPEAHEAD_USERS': 256,
+    'TYPEAHEAD_TTL': 300,
+    'TYPEAHEAD_MAX_ITEMS': 20000,
+    'TYPEAHEAD_VERSION_MAX_AGE': 5,
+}
+KINDS = ('project', 'task')
+WORD = re.compile(r'\w+')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'SEARCH', {})}
+
+
+def text_search(owner_id, query, kinds=KINDS, offset=0, limit=20):
+    """Ranked full-text matches among `owner_id`'s projects and tasks.
+
+    Returns ``(results, has_more)``; each result is the serialized document
+    plus ``type`` and ``score``. Both collections are read up to
+    ``offset + limit + 1`` hits and merged by score, so
+    deep offsets cost more; `MAX_RESULTS` bounds how deep a client can page.
+    """
+    window = offset + limit + 1
+    score = {'score': {'$meta': 'textScore'}}
+    hits = []
+    if 'project' in kinds:
+        rows = (Project._get_collection()
+                .find({'$text': {'$search': query}, 'owner': owner_id}, score)
+                .sort([('score', {'$meta': 'textScore'})]).limit(window))
+        mapper = compile_row_mapper(Project, ProjectSerializer.Meta.fields)
+        hits.extend(('project', row['score'], mapper(row)) for row in rows)
+    if 'task' in kinds:
+        project_ids = [doc['_id'] for doc in Project._get_collection().find({'owner': owner_id}, {'_id': 1})]
+        if project_ids:
+            rows = (Task._get_collection()
+                    .find({'$text': {'$search': query}, 'project': {'$in': project_ids}}, score)
+                    .sort([('score', {'$meta': 'textScore'})]).limit(window))
+            mapper = compile_row_mapper(Task, TaskSerializer.Meta.fields)
+            hits.extend(('task', row['score'], mapper(row)) for row in rows)
+    hits.sort(key=lambda hit: hit[1], reverse=True)
+    page = [{'type': kind, 'score': round(value, 4), **row} for kind, value, row in hits[offset:offset + limit]]
+    return page, len(hits) > offset + limit
+
+
+class PrefixIndex:
+    """Sorted (word, item) pairs for one user; a prefix lookup is a bisect plus a short scan."""
+
+    def __init__(self, items):
+        entries = []
+        for position, item in enumerate(items):
+            for word in set(WORD.findall(item['label'].lower())):
+                entries.append((word, position))
+        entries.sort()
+        self._words = [word for word, _ in entries]
+        self._positions = [position for _, position in entries]
+        self._items = items
+
+    def lookup(self, prefix, limit=10):
+        """Items with a word starting with every word of `prefix`, in label order."""
+        words = WORD.findall(prefix.lower())
+        if not words:
+            return []
+        matches = None
+        for word in words:
+            found = set()
+            index = bisect_left(self._words, word)
+            while index < len(self._words) and self._words[index].startswith(word):
+                found.add(self._positions[index])
+                index += 1
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return [self._items[position] for position in sorted(matches)[:limit]]
+
+
+def build_prefix_index(owner_id, max_items):
+    projects = list(Project._get_collection().find({'owner': owner_id}, {'name': 1}).limit(max_items))
+    items = [{'type': 'project', 'id': str(doc['_id']), 'label': doc.get('name') or ''} for doc in projects]
+    if projects:
+        tasks = Task._get_collection().find(
+            {'project': {'$in': [doc['_id'] for doc in projects]}}, {'title': 1, 'project': 1},
+        ).limit(max(max_items - len(items), 0))
+        items.extend({'type': 'task', 'id': str(doc['_id']), 'project': str(doc['project']),
+                      'label': doc.get('title') or ''} for doc in tasks)
+    items.sort(key=lambda item: item['label'].lower())
+    return PrefixIndex(items)
+
+
+_typeahead = None
+_typeahead_lock = threading.Lock()
+
+
+def typeahead(owner_id, prefix, limit=10):
+    """Prefix suggestions for `owner_id`, served from the per-user index in this process."""
+    global _typeahead
+    config = get_config()
+    if _typeahead is None:
+        with _typeahead_lock:
+            if _typeahead is None:
+                _typeahead = LRUCache(config['TYPEAHEAD_USERS'], ttl=config['TYPEAHEAD_TTL'])
+    # any project/task write of this user replaces the version, so the index is rebuilt after it
+    version = get_listing_cache().version('user', str(owner_id), max_age=config['TYPEAHEAD_VERSION_MAX_AGE'])
+    key = (str(owner_id), version)
+    index = _typeahead.get(key)
+    if index is None:
+        index = build_prefix_index(owner_id, config['TYPEAHEAD_MAX_ITEMS'])
+        _typeahead.set(key, index)
+    return index.lookup(prefix, limit)
@@ -1,20 +1,148 @@
+from datetime import datetime, timedelta, timezone
 from projectapp.models import Project, Task
 from rest_framework_mongoengine.serializers import DocumentSerializer
 from rest_framework import serializers
+from projectapp.references import ReferenceIdField
+
+class DynamicFieldsMixin:
+    """Accepts an optional `fields` kwarg restricting which fields are serialized."""
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class ProjectSerializer(DynamicFieldsMixin, DocumentSerializer):
+    owner = ReferenceIdField()
 
-class ProjectSerializer(DocumentSerializer):
     class Meta:
         model = Project
-        fields = ('id', 'name', 'description', 'owner', 'created_at', 'start_date', 'deployment_date')
-        read_only_fields = ('id','owner', 'created_at')
+        fields = ('id', 'name', 'description', 'owner', 'created_at', 'updated_at', 'start_date', 'deployment_date',
+                  'task_counts', 'last_activity_at')
+        read_only_fields = ('id','owner', 'created_at', 'updated_at', 'task_counts', 'last_activity_at')
+
+class TaskSerializer(DynamicFieldsMixin, DocumentSerializer):
+    project = ReferenceIdField()
 
-class TaskSerializer(DocumentSerializer):
     class Meta:
         model = Task
-        fields = ('id', 'title', 'description', 'project', 'status', 'created_at')
-        read_only_fields = ('id', 'project', 'created_at')
+        fields = ('id', 'title', 'description', 'project', 'status', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'project', 'created_at', 'updated_at')
 
     def validate_status(self, value):
         if value not in ['todo', 'in_progress', 'done']:
             raise serializers.ValidationError("Status must be one of: 'todo', 'in_progress', 'done'")
-        return value
\ No newline at end of file
+        return value
+
+# Fast read path -------------------------------------------------------------
+#
+# DocumentSerializer builds field objects and walks a MongoEngine document for
+# every row, which dominates large list responses. List endpoints instead load
+# raw rows with `as_pymongo()` and map them through a function generated once
+# per (model, fields) pair. The output matches the serializers above, which are
+# still used for single documents and for validating writes.
+
+def _render_id(value):
+    if value is None:
+        return None
+    return str(getattr(value, 'id', value))
+
+
+def _render_datetime(value):
+    # same output as DRF's DateTimeField for the naive UTC values pymongo returns
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.isoformat() + 'Z'
+    iso = value.isoformat()
+    return iso[:-6] + 'Z' if iso.endswith('+00:00') else iso
+
+
+def _render_embedded(value, defaults):
+    # projects written before a field was added have no sub-document yet
+    return {**defaults, **value} if value else dict(defaults)
+
+
+_row_mappers = {}
+
+
+def compile_row_mapper(model, fields):
+    """Build (and memoize) ``row(doc) -> dict`` for raw pymongo documents of `model`."""
+    key = (model, fields)
+    mapper = _row_mappers.get(key)
+    if mapper is not None:
+        return mapper
+    from mongoengine.fields import DateTimeField, EmbeddedDocumentField, ObjectIdField, ReferenceField
+    namespace = {'_render_id': _render_id, '_render_datetime': _render_datetime, '_render_embedded': _render_embedded}
+    items = []
+    for name in fields:
+        field = model._fields[name]
+        source = f'doc.get({field.db_field!r})'
+        if isinstance(field, (ObjectIdField, ReferenceField)):
+            source = f'_render_id({source})'
+        elif isinstance(field, DateTimeField):
+            source = f'_render_datetime({source})'
+        elif isinstance(field, EmbeddedDocumentField):
+            embedded = field.document_type
+            namespace[f'_defaults_{name}'] = {
+                key: embedded._fields[key].default for key in embedded._fields_ordered}
+            source = f'_render_embedded({source}, _defaults_{name})'
+        items.append(f'{name!r}: {source}')
+    code = 'def row(doc):\n    return {' + ', '.join(items) + '}\n'
+    exec(code, namespace)
+    mapper = _row_mappers[key] = namespace['row']
+    return mapper
+
+
+def serialize_rows(serializer_class, rows, fields=None):
+    """Serialize raw rows with the field set of `serializer_class` (optionally narrowed)."""
+    selected = tuple(f for f in serializer_class.Meta.fields if fields is None or f in fields)
+    mapper = compile_row_mapper(serializer_class.Meta.model, selected)
+    return [mapper(row) for row in rows]
+
+
+# Columnar layout -------------------------------------------------------------
+#
+# `layout=columnar` list responses send each field once as an array instead of
+# repeating every key per row. Datetimes become epoch milliseconds and the
+# values of `interned` reference fields (a task list usually has one project)
+# are listed once in ``refs`` with the column holding indexes into that list.
+
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+def _epoch_ms(value):
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MILLISECOND
+
+
+def serialize_columns(serializer_class, rows, fields=None, interned=()):
+    """Raw rows as ``{'layout': 'columnar', 'count', 'columns': {field: [...]}, 'refs'}``."""
+    from mongoengine.fields import DateTimeField, EmbeddedDocumentField, ObjectIdField, ReferenceField
+    model = serializer_class.Meta.model
+    selected = tuple(f for f in serializer_class.Meta.fields if fields is None or f in fields)
+    rows = list(rows)
+    columns, refs = {}, {}
+    for name in selected:
+        field = model._fields[name]
+        values = [row.get(field.db_field) for row in rows]
+        if isinstance(field, (ObjectIdField, ReferenceField)) and name in interned:
+            table = {}
+            columns[name] = [table.setdefault(value, len(table)) for value in values]
+            refs[name] = [_render_id(value) for value in table]
+        elif isinstance(field, (ObjectIdField, ReferenceField)):
+            columns[name] = [_render_id(value) for value in values]
+        elif isinstance(field, DateTimeField):
+            columns[name] = [_epoch_ms(value) for value in values]
+        elif isinstance(field, EmbeddedDocumentField):
+            embedded = field.document_type
+            defaults = {key: embedded._fields[key].default for key in embedded._fields_ordered}
+            columns[name] = [_render_embedded(value, defaults) for value in values]
+        else:
+            columns[name] = values
+    return {'layout': 'columnar', 'count': len(rows), 'columns': columns, 'refs': refs}
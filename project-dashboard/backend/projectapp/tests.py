@@ -1,3 +1,796 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gc
+import gzip
+import json
+import weakref
+from datetime import date, datetime, time, timedelta, timezone
+from functools import partial
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+import mongomock
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from mongoengine import connect, disconnect, get_connection
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from authapp.models import User
+from authapp.tokens import issue_token
+from backend.db import ALIASES
+from backend.renderers import FastJSONRenderer, dumps
+from projectapp.activity import ActivityLog
+from projectapp.archive import archive_tasks
+from projectapp.cache import LRUCache, ListingCache, MongoVersionStore
+from projectapp.cascade import reap
+from projectapp import changefeed
+from projectapp.changefeed import RESET, ChangeFeed, get_change_feed
+from projectapp.counters import recompute
+from projectapp.models import ActivityEvent, ArchivedTask, Project, ProjectTombstone, Task
+from projectapp.search import text_search
 
-# Create your tests here.
+
+class FakeChangeStream:
+    """In-process stand-in for the MongoDB change stream used by ChangeFeed.
+
+    Changes pushed with `push` are yielded in order; pushing an exception makes
+    the current stream fail with it. Every (re)open records its resume token.
+    """
+
+    def __init__(self):
+        self.changes = asyncio.Queue()
+        self.resume_tokens = []
+        self.owners = {}
+        self._sequence = 0
+
+    async def watch(self, resume_token):
+        self.resume_tokens.append(resume_token)
+        while True:
+            change = await self.changes.get()
+            if isinstance(change, Exception):
+                raise change
+            yield change
+
+    async def owner_lookup(self, project_id):
+        return self.owners.get(project_id)
+
+    def push(self, coll, operation, doc_id, full_document=None):
+        self._sequence += 1
+        token = f'token-{self._sequence}'
+        self.changes.put_nowait({
+            '_id': {'_data': token},
+            'ns': {'db': 'project_db', 'coll': coll},
+            'operationType': operation,
+            'documentKey': {'_id': doc_id},
+            'fullDocument': full_document,
+        })
+        return token
+
+
+def project_doc(project_id, owner):
+    return {'_id': project_id, 'name': 'Project', 'owner': owner, 'created_at': datetime(2024, 1, 1)}
+
+
+def task_doc(task_id, project_id, status='todo'):
+    return {'_id': task_id, 'title': 'Task', 'project': project_id, 'status': status,
+            'created_at': datetime(2024, 1, 1)}
+
+
+async def next_event(queue):
+    return await asyncio.wait_for(queue.get(), 1)
+
+
+class ChangeFeedTests(SimpleTestCase):
+    def setUp(self):
+        self.stream = FakeChangeStream()
+        self.alice, self.bob = str(ObjectId()), str(ObjectId())
+
+    def make_feed(self, **kwargs):
+        feed = ChangeFeed(watch=self.stream.watch, owner_lookup=self.stream.owner_lookup, **kwargs)
+        feed.RETRY_SECONDS = 0
+        return feed
+
+    async def stop(self, feed):
+        feed._runner.cancel()
+        await asyncio.gather(feed._runner, return_exceptions=True)
+
+    async def test_routes_events_to_the_owner(self):
+        feed = self.make_feed()
+        alice_queue = feed.subscribe(self.alice)
+        bob_queue = feed.subscribe(self.bob)
+        alice_project, bob_project = ObjectId(), ObjectId()
+        self.stream.owners[bob_project] = self.bob
+        task_id = ObjectId()
+
+        self.stream.push('projects', 'insert', alice_project, project_doc(alice_project, ObjectId(self.alice)))
+        self.stream.push('tasks', 'insert', task_id, task_doc(task_id, alice_project))
+        # looked up through owner_lookup: the feed has not seen this project
+        self.stream.push('tasks', 'insert', ObjectId(), task_doc(ObjectId(), bob_project))
+        # no document on delete: routed from the task's earlier event
+        self.stream.push('tasks', 'delete', task_id)
+
+        project_event = await next_event(alice_queue)
+        self.assertEqual(project_event['type'], 'project.insert')
+        self.assertEqual(project_event['data']['project']['id'], str(alice_project))
+        task_event = await next_event(alice_queue)
+        self.assertEqual((task_event['type'], task_event['data']['id']), ('task.insert', str(task_id)))
+        delete_event = await next_event(alice_queue)
+        self.assertEqual((delete_event['type'], delete_event['data']), ('task.delete', {'id': str(task_id), 'task': None}))
+        self.assertEqual((await next_event(bob_queue))['data']['task']['project'], str(bob_project))
+        self.assertTrue(alice_queue.empty())
+        self.assertTrue(bob_queue.empty())
+        await self.stop(feed)
+
+    async def test_replays_missed_events_from_last_event_id(self):
+        feed = self.make_feed()
+        queue = feed.subscribe(self.alice)
+        alice_project, bob_project = ObjectId(), ObjectId()
+        first = self.stream.push('projects', 'insert', alice_project, project_doc(alice_project, ObjectId(self.alice)))
+        self.stream.push('projects', 'insert', bob_project, project_doc(bob_project, ObjectId(self.bob)))
+        last = self.stream.push('projects', 'update', alice_project, project_doc(alice_project, ObjectId(self.alice)))
+        for _ in range(2):
+            await next_event(queue)
+        feed.unsubscribe(self.alice, queue)
+
+        # reconnect after the first event: only the caller's later events come back
+        resumed = feed.subscribe(self.alice, last_event_id=first)
+        replayed = await next_event(resumed)
+        self.assertEqual((replayed['id'], replayed['type']), (last, 'project.update'))
+        self.assertTrue(resumed.empty())
+        await self.stop(feed)
+
+    async def test_unknown_last_event_id_gets_reset(self):
+        feed = self.make_feed(history=2)
+        queue = feed.subscribe(self.alice)
+        project_id = ObjectId()
+        first = self.stream.push('projects', 'insert', project_id, project_doc(project_id, ObjectId(self.alice)))
+        for _ in range(2):
+            self.stream.push('projects', 'update', project_id, project_doc(project_id, ObjectId(self.alice)))
+        for _ in range(3):
+            await next_event(queue)
+
+        # `first` has been pushed out of the two-event history
+        resumed = feed.subscribe(self.alice, last_event_id=first)
+        self.assertEqual(resumed.get_nowait(), RESET)
+        self.assertTrue(resumed.empty())
+        await self.stop(feed)
+
+    async def test_full_queue_is_replaced_by_reset(self):
+        feed = self.make_feed(queue_size=2)
+        slow = feed.subscribe(self.alice)
+        project_id = ObjectId()
+        for _ in range(3):
+            self.stream.push('projects', 'update', project_id, project_doc(project_id, ObjectId(self.alice)))
+        while not self.stream.changes.empty():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(slow.get_nowait(), RESET)
+        self.assertTrue(slow.empty())
+        await self.stop(feed)
+
+    async def test_resumes_after_stream_error(self):
+        feed = self.make_feed()
+        queue = feed.subscribe(self.alice)
+        project_id = ObjectId()
+        first = self.stream.push('projects', 'insert', project_id, project_doc(project_id, ObjectId(self.alice)))
+        await next_event(queue)
+
+        with self.assertLogs('projectapp.changefeed', 'ERROR'):
+            self.stream.changes.put_nowait(ConnectionError('stream closed'))
+            self.stream.push('projects', 'update', project_id, project_doc(project_id, ObjectId(self.alice)))
+            event = await next_event(queue)
+        self.assertEqual(event['type'], 'project.update')
+        # the stream was reopened after the last event delivered
+        self.assertEqual(self.stream.resume_tokens, [None, first])
+        await self.stop(feed)
+
+
+class FeedRegistryTests(SimpleTestCase):
+    def test_feed_is_dropped_with_its_loop(self):
+        async def idle_watch(resume_token):
+            await asyncio.Event().wait()
+            yield
+
+        async def subscribe():
+            with mock.patch('projectapp.changefeed.ChangeFeed', partial(ChangeFeed, watch=idle_watch)):
+                feed = get_change_feed()
+            self.assertIs(get_change_feed(), feed)
+            owner_id = str(ObjectId())
+            queue = feed.subscribe(owner_id)
+            await asyncio.sleep(0)
+            # as the stream view does when the client goes away
+            feed.unsubscribe(owner_id, queue)
+            return weakref.ref(feed)
+
+        feed = asyncio.run(subscribe())
+        gc.collect()
+        self.assertIsNone(feed())
+        self.assertEqual(len(changefeed._feeds), 0)
+
+
+class RendererTests(SimpleTestCase):
+    def test_fast_renderer_matches_drf(self):
+        data = {
+            'aware': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            'naive': datetime(2024, 5, 1, 12, 30, 15, 999999),
+            'whole': datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+            'date': date(2024, 5, 1),
+            'time': time(8, 15, 0, 250000),
+            'nested': [{'at': datetime(2024, 5, 1, tzinfo=timezone.utc)}],
+        }
+        rendered = FastJSONRenderer().render(data)
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+        self.assertTrue(json.loads(rendered)['aware'].endswith('Z'))
+        self.assertEqual(json.loads(dumps(data)), json.loads(rendered))
+
+
+@override_settings(ACTIVITY_LOG={'ENABLED': False})
+class MongomockTestCase(SimpleTestCase):
+    """API tests on fresh in-memory mongomock databases under the app's aliases."""
+
+    def setUp(self):
+        for alias in ALIASES:
+            disconnect(alias=alias)
+            # mongomock clients share storage per host, so start from empty databases
+            connect(db=alias, alias=alias, host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+            get_connection(alias).drop_database(alias)
+        self.user = User(username='alice', email='alice@example.com', password='unused').save()
+        self.user_id = str(self.user.id)
+        self.client = self.client_for(self.user)
+        self.project = Project(name='Launch', owner=self.user).save()
+        self.project_id = str(self.project.id)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(user)}')
+        return client
+
+    def list_tasks(self, headers=None, **params):
+        return self.client.get('/api/tasks/', {'project_id': self.project_id, **params}, headers=headers)
+
+    def create_task(self, title, status='todo'):
+        response = self.client.post('/api/tasks/', {'project_id': self.project_id, 'title': title, 'status': status},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['task']['id']
+
+
+class TaskListTests(MongomockTestCase):
+    def insert_tasks(self, created_at, count):
+        ids = [ObjectId() for _ in range(count)]
+        Task._get_collection().insert_many([
+            {'_id': task_id, 'title': f'task {position}', 'project': self.project.id, 'status': 'todo',
+             'created_at': created_at, 'updated_at': created_at}
+            for position, task_id in enumerate(ids)])
+        return [str(task_id) for task_id in ids]
+
+    def walk(self, **params):
+        """All pages of the task list; returns the ids in page order."""
+        seen, cursor = [], None
+        while True:
+            response = self.list_tasks(limit=2, **({'cursor': cursor} if cursor else {}), **params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(task['id'] for task in response.data['tasks'])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return seen
+
+    def test_cursor_walks_every_task_once_across_created_at_ties(self):
+        start = datetime(2024, 1, 1)
+        tied = self.insert_tasks(start, 5)
+        later = self.insert_tasks(start + timedelta(seconds=1), 2)
+        # ties on created_at are ordered by id
+        self.assertEqual(self.walk(), sorted(tied) + sorted(later))
+        self.assertEqual(self.walk(sort='-created_at'), sorted(later, reverse=True) + sorted(tied, reverse=True))
+
+    def test_malformed_project_id_is_rejected(self):
+        for headers in (None, {'If-None-Match': '"anything"'}):
+            self.assertEqual(self.list_tasks(headers=headers, project_id='nope').status_code, 400)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.list_tasks(cursor='not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_sort_by_updated_at_with_tasks_stored_before_it(self):
+        ids = self.insert_tasks(datetime(2024, 1, 1), 3)
+        Task._get_collection().update_many({}, {'$unset': {'updated_at': ''}})
+        for params in ({}, {'include_archived': '1'}):
+            self.assertEqual(self.list_tasks(sort='updated_at', limit=2, **params).status_code, 200)
+
+        call_command('backfill_updated_at', stdout=StringIO())
+        self.assertEqual(Task._get_collection().count_documents({'updated_at': datetime(2024, 1, 1)}), 3)
+        self.assertEqual(self.walk(sort='updated_at'), sorted(ids))
+
+    def test_fields_limit_the_keys(self):
+        self.create_task('Write docs')
+        response = self.list_tasks(fields='id,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['tasks'][0]), {'id', 'title'})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.list_tasks(fields='title,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'unknown fields: password')
+
+    def test_listing_reflects_writes(self):
+        first = self.create_task('First')
+        response = self.list_tasks()
+        etag = response['ETag']
+        self.assertEqual([task['id'] for task in response.data['tasks']], [first])
+        # served from the listing cache until a write replaces the version token
+        self.assertEqual(self.list_tasks(headers={'If-None-Match': etag}).status_code, 304)
+
+        second = self.create_task('Second')
+        response = self.list_tasks()
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([task['id'] for task in response.data['tasks']], [first, second])
+
+        self.client.patch('/api/tasks/', {'task_id': first, 'status': 'done'}, format='json')
+        statuses = {task['id']: task['status'] for task in self.list_tasks().data['tasks']}
+        self.assertEqual(statuses, {first: 'done', second: 'todo'})
+
+
+class ProjectListTests(MongomockTestCase):
+    def test_cursor_walks_every_project_once(self):
+        created_at = datetime(2024, 1, 1)
+        ids = [self.project_id]
+        for position in range(4):
+            ids.append(str(Project(name=f'p{position}', owner=self.user, created_at=created_at).save().id))
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, 'fields': 'id'}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/api/projects/', params)
+            seen.extend(project['id'] for project in response.data['projects'])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(ids[1:]) + [self.project_id])
+
+    def test_listing_reflects_new_project(self):
+        self.assertEqual(len(self.client.get('/api/projects/').data['projects']), 1)
+        self.client.post('/api/projects/', {'name': 'Second'}, format='json')
+        names = [project['name'] for project in self.client.get('/api/projects/').data['projects']]
+        self.assertEqual(names, ['Launch', 'Second'])
+
+
+class TaskCounterTests(MongomockTestCase):
+    def counts(self):
+        self.project.reload()
+        return self.project.task_counts.to_mongo().to_dict()
+
+    def test_task_writes_keep_counters_in_step(self):
+        todo = self.create_task('a')
+        doing = self.create_task('b', status='in_progress')
+        self.assertEqual(self.counts(), {'todo': 1, 'in_progress': 1, 'done': 0})
+
+        self.client.patch('/api/tasks/', {'task_id': todo, 'status': 'done'}, format='json')
+        self.client.put('/api/tasks/', {'task_id': doing, 'title': 'b2'}, format='json')
+        self.assertEqual(self.counts(), {'todo': 0, 'in_progress': 1, 'done': 1})
+
+        self.client.delete('/api/tasks/', {'task_id': doing}, format='json')
+        self.assertEqual(self.counts(), {'todo': 0, 'in_progress': 0, 'done': 1})
+        self.assertIsNotNone(self.project.last_activity_at)
+        # the counters agree with the tasks collection
+        self.assertEqual(list(recompute([self.project.id], write=False)), [(self.project.id, False)])
+
+    def test_project_list_shows_counters(self):
+        self.create_task('a')
+        self.create_task('b', status='done')
+        project = self.client.get('/api/projects/').data['projects'][0]
+        self.assertEqual(project['task_counts'], {'todo': 1, 'in_progress': 0, 'done': 1})
+
+    def test_recompute_reports_drift(self):
+        self.create_task('a')
+        Project._get_collection().update_one({'_id': self.project.id}, {'$set': {'task_counts.todo': 5}})
+        self.assertEqual(list(recompute([self.project.id], write=False)), [(self.project.id, True)])
+
+
+@override_settings(THROTTLING={'ENABLED': False})
+class TaskBulkTests(MongomockTestCase):
+    def bulk(self, *operations):
+        response = self.client.post('/api/tasks/bulk/', {'operations': list(operations)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self):
+        self.project.reload()
+        return self.project.task_counts.to_mongo().to_dict()
+
+    def test_partial_failure_reports_each_operation(self):
+        todo = self.create_task('a')
+        mallory = User(username='mallory', email='mallory@example.com', password='unused').save()
+        foreign = Project(name='Other', owner=mallory).save()
+        data = self.bulk(
+            {'op': 'create', 'project_id': self.project_id, 'title': 'b', 'status': 'done'},
+            {'op': 'update', 'task_id': todo, 'status': 'in_progress'},
+            {'op': 'update', 'task_id': todo, 'status': 'blocked'},
+            {'op': 'delete', 'task_id': str(ObjectId())},
+            {'op': 'create', 'project_id': str(foreign.id), 'title': 'c'},
+            {'op': 'archive', 'task_id': todo},
+            'not an object',
+        )
+        self.assertEqual([result['status'] for result in data['results']],
+                         ['ok', 'ok', 'error', 'error', 'error', 'error', 'error'])
+        self.assertEqual([result.get('message') for result in data['results'][3:5]], ['task not found', 'forbidden'])
+        self.assertEqual((data['succeeded'], data['failed']), (2, 5))
+        self.assertEqual(Task.objects(project=foreign.id).count(), 0)
+        self.assertEqual(Task.objects(id=todo).first().status, 'in_progress')
+        self.assertEqual(self.counts(), {'todo': 0, 'in_progress': 1, 'done': 1})
+
+    def test_counter_deltas_follow_the_batch(self):
+        todo = self.create_task('a')
+        done = self.create_task('b', status='done')
+        self.bulk(
+            {'op': 'create', 'project_id': self.project_id, 'title': 'c'},
+            {'op': 'update', 'task_id': todo, 'status': 'done'},
+            {'op': 'delete', 'task_id': done},
+            # an update of a task deleted earlier in the batch changes nothing
+            {'op': 'update', 'task_id': done, 'status': 'todo'},
+        )
+        self.assertEqual(self.counts(), {'todo': 1, 'in_progress': 0, 'done': 1})
+        self.assertEqual(list(recompute([self.project.id], write=False)), [(self.project.id, False)])
+
+    def test_listing_is_invalidated(self):
+        self.assertEqual(self.list_tasks().data['tasks'], [])
+        self.bulk({'op': 'create', 'project_id': self.project_id, 'title': 'a'})
+        self.assertEqual([task['title'] for task in self.list_tasks().data['tasks']], ['a'])
+
+
+class AuthorizationTests(MongomockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mallory = User(username='mallory', email='mallory@example.com', password='unused').save()
+        self.other = self.client_for(self.mallory)
+
+    def test_views_require_a_token(self):
+        anonymous = APIClient()
+        for path in ('/api/projects/', '/api/tasks/', '/api/dashboard/', '/api/export/', '/api/search/',
+                     '/api/search/suggest/', '/api/activity/stats/'):
+            response = anonymous.get(path, {'user_id': self.user_id, 'project_id': self.project_id})
+            self.assertEqual(response.status_code, 401, path)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        response = anonymous.post('/api/tasks/', {'user_id': self.user_id, 'project_id': self.project_id,
+                                                  'title': 'x'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_user_id_parameter_does_not_change_the_caller(self):
+        self.create_task('private')
+        response = self.other.get('/api/tasks/', {'project_id': self.project_id, 'user_id': self.user_id})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.other.get('/api/projects/', {'user_id': self.user_id}).data['projects'], [])
+        response = self.other.get('/api/tasks/', {'project_id__in': self.project_id, 'user_id': self.user_id})
+        self.assertEqual(response.data['tasks'], [])
+
+    def test_cached_listing_is_not_served_to_other_users(self):
+        self.create_task('private')
+        self.assertEqual(self.list_tasks().status_code, 200)
+        response = self.other.get('/api/tasks/', {'project_id': self.project_id})
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_project_is_not_found(self):
+        self.assertEqual(self.list_tasks(project_id=str(ObjectId())).status_code, 404)
+
+    def test_stats_views_are_staff_only(self):
+        for path in ('/api/cache/stats/', '/api/db/stats/', '/api/throttle/stats/'):
+            self.assertEqual(APIClient().get(path).status_code, 401, path)
+            self.assertEqual(self.client.get(path).status_code, 403, path)
+        User.objects(id=self.user.id).update_one(set__is_staff=True)
+        for path in ('/api/cache/stats/', '/api/db/stats/', '/api/throttle/stats/'):
+            self.assertEqual(self.client.get(path).status_code, 200, path)
+
+
+class DashboardTests(MongomockTestCase):
+    def test_counts_overdue_and_recent_tasks(self):
+        Project.objects(id=self.project.id).update_one(set__deployment_date=datetime(2024, 1, 1))
+        older = self.create_task('a')
+        Task.objects(id=older).update_one(set__created_at=datetime(2024, 1, 1))
+        self.create_task('b', status='done')
+        response = self.client.get('/api/dashboard/', {'recent': 1})
+        self.assertEqual(response.status_code, 200)
+        summary = response.data['projects'][0]
+        self.assertEqual(summary['counts'], {'todo': 1, 'in_progress': 0, 'done': 1})
+        self.assertEqual(summary['overdue'], 1)
+        # rendered like ProjectSerializer, not as a raw datetime
+        self.assertEqual(summary['deployment_date'], self.client.get('/api/projects/').data['projects'][0]['deployment_date'])
+        self.assertEqual([task['title'] for task in response.data['recent_tasks']], ['b'])
+        self.assertEqual(response.data['totals']['overdue'], 1)
+
+    def test_malformed_user_id_is_rejected(self):
+        client = self.client_for(SimpleNamespace(id='abc', token_version=0))
+        self.assertEqual(client.get('/api/dashboard/').status_code, 400)
+
+
+class ListingCacheTests(MongomockTestCase):
+    def test_invalidation_reaches_other_workers(self):
+        # two processes: separate entry caches, version tokens in MongoDB
+        worker_a = ListingCache(LRUCache(), MongoVersionStore())
+        worker_b = ListingCache(LRUCache(), MongoVersionStore())
+        key = worker_a.key('project', self.project_id, {'limit': '10'})
+        worker_a.set(key, {'tasks': []})
+        self.assertEqual(worker_b.key('project', self.project_id, {'limit': '10'}), key)
+        self.assertEqual(worker_a.get(key), {'tasks': []})
+
+        worker_b.invalidate('project', self.project_id)
+        self.assertIsNone(worker_a.get(worker_a.key('project', self.project_id, {'limit': '10'})))
+        self.assertEqual(worker_a.stats()['hit_ratio'], 0.5)
+
+
+# mongomock has no sessions: delete the way a standalone server does
+@mock.patch('projectapp.cascade._transactions_supported', False)
+class ProjectDeleteTests(MongomockTestCase):
+    def delete_project(self):
+        response = self.client.delete('/api/projects/', {'project_id': self.project_id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_tasks_go_with_their_project(self):
+        self.create_task('a')
+        self.create_task('b')
+        other = Project(name='Other', owner=self.user).save()
+        kept = Task(title='kept', project=other).save()
+        data = self.delete_project()
+        self.assertEqual((data['deleted_tasks'], data['tasks_pending_removal']), (2, False))
+        self.assertEqual(Project.objects(id=self.project.id).count(), 0)
+        self.assertEqual([task.id for task in Task.objects], [kept.id])
+
+    @override_settings(PROJECT_CASCADE={'INLINE_LIMIT': 1})
+    def test_large_project_is_left_to_the_reaper(self):
+        for title in 'abc':
+            self.create_task(title)
+        with mock.patch('projectapp.cascade.start_reaper') as start_reaper:
+            data = self.delete_project()
+        start_reaper.assert_called_once_with()
+        self.assertEqual((data['deleted_tasks'], data['tasks_pending_removal']), (0, True))
+        # the project is gone at once, its tasks wait for the reaper
+        self.assertEqual(self.client.get('/api/projects/').data['projects'], [])
+        self.assertEqual(ProjectTombstone.objects.count(), 1)
+
+        batches = []
+        self.assertEqual(reap(batch_size=2, progress=lambda project_id, deleted: batches.append(deleted)), 3)
+        self.assertEqual(batches, [2, 3])
+        self.assertEqual((Task.objects.count(), ProjectTombstone.objects.count()), (0, 0))
+
+    def test_sweep_removes_orphans_left_behind(self):
+        self.create_task('a')
+        Project._get_collection().delete_one({'_id': self.project.id})
+        out = StringIO()
+        call_command('sweep_orphan_tasks', batch_size=1, stdout=out)
+        self.assertIn(f'{self.project_id}: 1 task(s) deleted', out.getvalue())
+        self.assertEqual(Task.objects.count(), 0)
+
+
+class ArchiveTests(MongomockTestCase):
+    def insert_task(self, status, updated_at, project=None):
+        task_id = ObjectId()
+        Task._get_collection().insert_one({'_id': task_id, 'title': f'{status} task', 'project': project or self.project.id,
+                                           'status': status, 'created_at': updated_at, 'updated_at': updated_at})
+        return str(task_id)
+
+    def listed(self, **params):
+        return {task['id'] for task in self.list_tasks(**params).data['tasks']}
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        old = datetime.utcnow() - timedelta(days=60)
+        done = [self.insert_task('done', old + timedelta(minutes=position)) for position in range(3)]
+        hot = [self.insert_task('todo', old), self.insert_task('done', datetime.utcnow())]
+
+        def interrupt(archived):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            archive_tasks(days=30, batch_size=1, progress=interrupt)
+        self.assertEqual(ArchivedTask.objects.count(), 1)
+        # the second run picks up after the first batch and reports the whole run
+        self.assertEqual(archive_tasks(days=30, batch_size=1), 3)
+        self.assertEqual({str(doc['_id']) for doc in ArchivedTask._get_collection().find()}, set(done))
+        self.assertEqual({str(doc['_id']) for doc in Task._get_collection().find()}, set(hot))
+
+    def test_archiving_invalidates_cached_listings(self):
+        archived = self.insert_task('done', datetime.utcnow() - timedelta(days=60))
+        hot = self.insert_task('todo', datetime.utcnow())
+        self.assertEqual(self.listed(), {archived, hot})
+        call_command('archive_tasks', days=30, stdout=StringIO())
+        self.assertEqual(self.listed(), {hot})
+        self.assertEqual(self.listed(include_archived='1'), {archived, hot})
+
+    def test_export_includes_archived_tasks(self):
+        archived = self.insert_task('done', datetime.utcnow() - timedelta(days=60))
+        hot = self.insert_task('todo', datetime.utcnow())
+        archive_tasks(days=30)
+        response = self.client.get('/api/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(record['type'], record['id']) for record in records],
+                         [('project', self.project_id), ('task', hot), ('task', archived)])
+
+        response = self.client.get('/api/export/', {'output': 'csv'})
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([(row['type'], row['id'], row['status']) for row in rows],
+                         [('project', self.project_id, ''), ('task', hot, 'todo'), ('task', archived, 'done')])
+
+    def test_orphan_sweep_covers_archived_tasks(self):
+        missing = ObjectId()
+        self.insert_task('done', datetime.utcnow() - timedelta(days=60), project=missing)
+        self.insert_task('todo', datetime.utcnow(), project=missing)
+        archive_tasks(days=30)
+        kept = self.insert_task('todo', datetime.utcnow())
+        out = StringIO()
+        call_command('sweep_orphan_tasks', check=True, stdout=out)
+        self.assertIn('found 2 orphaned task(s) of 1 missing project(s)', out.getvalue())
+        call_command('sweep_orphan_tasks', stdout=StringIO())
+        self.assertEqual(ArchivedTask.objects.count(), 0)
+        self.assertEqual([str(doc['_id']) for doc in Task._get_collection().find()], [kept])
+
+
+class RecordingCollection:
+    """Collection stand-in for `$text` queries, which mongomock does not run."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return self
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, count):
+        return iter(self.rows[:count])
+
+
+class SearchTests(MongomockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.second = Project(name='Docs', owner=self.user).save()
+        self.mallory = User(username='mallory', email='mallory@example.com', password='unused').save()
+        self.secret = Project(name='Secret plan', owner=self.mallory).save()
+
+    def suggest(self, q, client=None):
+        response = (client or self.client).get('/api/search/suggest/', {'q': q, 'user_id': str(self.mallory.id)})
+        self.assertEqual(response.status_code, 200)
+        return [item['label'] for item in response.data['suggestions']]
+
+    def test_tasks_of_every_owned_project_are_searched_in_one_query(self):
+        row = {'_id': ObjectId(), 'title': 'Launch checklist', 'project': self.project.id, 'status': 'todo',
+               'created_at': datetime(2024, 1, 1), 'score': 1.5}
+        tasks = RecordingCollection([row])
+        with mock.patch.object(Task, '_get_collection', return_value=tasks):
+            results, has_more = text_search(self.user.id, 'launch', kinds=('task',))
+        self.assertEqual(len(tasks.queries), 1)
+        self.assertEqual(tasks.queries[0]['$text'], {'$search': 'launch'})
+        self.assertEqual(set(tasks.queries[0]['project']['$in']), {self.project.id, self.second.id})
+        self.assertEqual([(hit['type'], hit['id'], hit['score']) for hit in results], [('task', str(row['_id']), 1.5)])
+        self.assertFalse(has_more)
+
+    def test_search_is_scoped_to_the_token_owner(self):
+        with mock.patch('projectapp.views.text_search', return_value=([], False)) as search:
+            response = self.client.get('/api/search/', {'q': 'plan', 'user_id': str(self.mallory.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(search.call_args.args[0], self.user.id)
+
+    def test_suggestions_are_scoped_to_the_token_owner(self):
+        self.create_task('Security review')
+        self.assertEqual(self.suggest('se'), ['Security review'])
+        self.assertEqual(self.suggest('sec', self.client_for(self.mallory)), ['Secret plan'])
+
+    def test_suggestions_follow_writes_in_this_process(self):
+        self.assertEqual(self.suggest('la'), ['Launch'])
+        self.create_task('Landing page')
+        self.assertEqual(self.suggest('la'), ['Landing page', 'Launch'])
+
+
+class ActivityLogTests(MongomockTestCase):
+    def test_full_queue_drops_and_shutdown_flushes(self):
+        log = ActivityLog(max_queue=1, batch_size=10, flush_interval=60)
+        event = {'project': self.project.id, 'action': 'project.update', 'at': datetime.utcnow()}
+        with mock.patch.object(log, '_start'):
+            log.record(dict(event))
+            log.record(dict(event))
+        self.assertEqual((log.stats()['recorded'], log.stats()['dropped']), (1, 1))
+        log._start()
+        # well before FLUSH_INTERVAL
+        log.shutdown()
+        self.assertEqual((log.stats()['written'], log.stats()['queued']), (1, 0))
+        self.assertEqual(ActivityEvent.objects.count(), 1)
+
+    @override_settings(ACTIVITY_LOG={'ENABLED': True})
+    def test_status_moves_feed_cycle_time(self):
+        log = ActivityLog(batch_size=2, flush_interval=0.01)
+        with mock.patch('projectapp.activity._activity_log', log):
+            task_id = self.create_task('a')
+            self.client.patch('/api/tasks/', {'task_id': task_id, 'status': 'in_progress'}, format='json')
+            self.client.put('/api/tasks/', {'task_id': task_id, 'title': 'a2'}, format='json')
+            self.client.patch('/api/tasks/', {'task_id': task_id, 'status': 'done'}, format='json')
+            log.shutdown()
+        events = {doc['action'] + ':' + str(doc['to_status']): doc['_id'] for doc in ActivityEvent._get_collection().find()}
+        # the title edit is logged without statuses
+        self.assertEqual(set(events), {'task.create:todo', 'task.update:in_progress', 'task.update:None',
+                                       'task.update:done'})
+        now = datetime.utcnow()
+        for key, hours_ago in (('task.update:in_progress', 3), ('task.update:done', 1)):
+            ActivityEvent._get_collection().update_one({'_id': events[key]}, {'$set': {'at': now - timedelta(hours=hours_ago)}})
+
+        project = self.client.get('/api/activity/stats/', {'days': 1}).data['projects'][0]
+        self.assertEqual(project['throughput'], 1)
+        self.assertEqual(project['cycle_time_hours'], {'avg': 2.0, 'p50': 2.0, 'max': 2.0})
+
+
+class ListingPayloadTests(MongomockTestCase):
+    def test_columnar_layout_carries_the_same_tasks(self):
+        for title in ('a', 'b'):
+            self.create_task(title)
+        rows = self.list_tasks().data['tasks']
+        columnar = self.list_tasks(layout='columnar').data['tasks']
+        self.assertEqual(columnar['count'], 2)
+        self.assertEqual(columnar['refs'], {'project': [self.project_id]})
+        self.assertEqual(columnar['columns']['project'], [0, 0])
+        self.assertEqual(columnar['columns']['id'], [row['id'] for row in rows])
+        self.assertEqual(columnar['columns']['title'], ['a', 'b'])
+        created = [datetime.fromisoformat(row['created_at'].replace('Z', '+00:00')) for row in rows]
+        self.assertEqual(columnar['columns']['created_at'],
+                         [int(value.timestamp() * 1000) for value in created])
+        self.assertEqual(self.list_tasks(layout='table').status_code, 400)
+
+    @override_settings(RESPONSE_COMPRESSION={'ENABLED': True, 'MIN_SIZE': 200})
+    def test_large_responses_are_gzipped_on_request(self):
+        for position in range(5):
+            self.create_task(f'task {position}')
+        plain = self.list_tasks()
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.list_tasks(headers={'Accept-Encoding': 'br;q=0, gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), json.loads(plain.content))
+        # weak once compressed, and still matches for conditional requests
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        self.assertEqual(self.list_tasks(headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+        small = self.client.get('/api/projects/', {'fields': 'id'}, headers={'Accept-Encoding': 'gzip'})
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    @override_settings(RESPONSE_COMPRESSION={'ENABLED': True, 'MIN_SIZE': 200})
+    def test_export_is_gzipped_while_streaming(self):
+        self.create_task('a')
+        response = self.client.get('/api/export/', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual([json.loads(line)['type'] for line in lines], ['project', 'task'])
+
+
+class EventStreamTests(MongomockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.stream = FakeChangeStream()
+        self.feed = ChangeFeed(watch=self.stream.watch, owner_lookup=self.stream.owner_lookup)
+        patcher = mock.patch('projectapp.async_views.get_change_feed', return_value=self.feed)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def open_stream(self, **params):
+        return await self.async_client.get('/api/async/events/', params)
+
+    async def test_stream_opens_with_a_ticket(self):
+        ticket = (await sync_to_async(self.client.post)('/api/auth/stream-ticket/')).data['ticket']
+        response = await self.open_stream(ticket=ticket)
+        self.assertEqual(response.status_code, 200)
+        content = aiter(response.streaming_content)
+        self.assertEqual(await anext(content), b'retry: 3000\n\n')
+        await content.aclose()
+        self.feed._runner.cancel()
+
+    async def test_access_token_is_not_accepted_in_the_url(self):
+        for params in ({'token': issue_token(self.user)}, {'ticket': issue_token(self.user)}, {}):
+            response = await self.open_stream(**params)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+
+    def test_ticket_needs_an_access_token(self):
+        self.assertEqual(APIClient().post('/api/auth/stream-ticket/').status_code, 401)
@@ -1,7 +1,23 @@
 from django.urls import path
-from projectapp.views import ProjectView, TaskView
+from projectapp.async_views import AsyncProjectView, AsyncTaskView, AsyncEventStreamView
+from projectapp.views import (
+    ProjectView, TaskView, TaskBulkView, DashboardView, ExportView, CacheStatsView,
+    SearchView, SuggestView, DbStatsView, ThrottleStatsView, ActivityStatsView,
+)
 
 urlpatterns = [
     path('projects/', ProjectView.as_view(), name='project-list-create'),
     path('tasks/', TaskView.as_view(), name='task-list-create'),
+    path('tasks/bulk/', TaskBulkView.as_view(), name='task-bulk'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('search/suggest/', SuggestView.as_view(), name='search-suggest'),
+    path('activity/stats/', ActivityStatsView.as_view(), name='activity-stats'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('db/stats/', DbStatsView.as_view(), name='db-stats'),
+    path('throttle/stats/', ThrottleStatsView.as_view(), name='throttle-stats'),
+    path('async/projects/', AsyncProjectView.as_view(), name='async-project-list'),
+    path('async/tasks/', AsyncTaskView.as_view(), name='async-task-list'),
+    path('async/events/', AsyncEventStreamView.as_view(), name='async-events'),
 ]
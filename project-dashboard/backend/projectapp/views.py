@@ -1,10 +1,33 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from projectapp.models import Project, Task
-from projectapp.serializers import ProjectSerializer, TaskSerializer
-from authapp.models import User
-from datetime import datetime
+from rest_framework import serializers
+from projectapp.models import ArchivedTask, Project, Task
+from projectapp.serializers import ProjectSerializer, TaskSerializer, serialize_columns, serialize_rows
+from projectapp.references import ref_id
+from projectapp.activity import cycle_times, get_activity_log, log_project_change, log_task_change
+from projectapp.cache import get_listing_cache
+from projectapp.cascade import delete_project
+from projectapp.counters import STATUSES, apply_deltas, record_task_change, status_delta
+from projectapp.export import chunked, iter_csv, iter_ndjson, iter_records
+from projectapp.conditional import etag_matches, listing_etag, listing_response
+from projectapp.pagination import (
+    PaginationError, is_paginated, merge_rows, paginate, paginate_merged, parse_fields, parse_layout, parse_limit,
+    parse_sort, project_queryset,
+)
+from projectapp.search import KINDS, get_config as get_search_config, text_search, typeahead
+from authapp.authentication import authenticated_user_id
+from authapp.permissions import IsStaffUser
+from authapp.throttling import IPBucketThrottle, UserBucketThrottle, get_limiter
+from collections import Counter
+from datetime import datetime, timedelta
+from django.conf import settings
+from backend.db import get_metrics
+from django.http import StreamingHttpResponse
+from bson import ObjectId
+from mongoengine.errors import ValidationError
+from pymongo import InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
 
 def validate_keys(data, required_keys):
     missing_keys = [key for key in required_keys if key not in data]
@@ -19,25 +42,75 @@ def validate_keys(data, required_keys):
     return None
 
 
+def request_payload(request):
+    """`request.data` with `user_id` set to the token's user; a client-supplied one is ignored."""
+    data = request.data.copy() if isinstance(request.data, dict) else {}
+    data['user_id'] = authenticated_user_id(request)
+    return data
+
+
+def request_params(request):
+    """`request.GET` with `user_id` set to the token's user; a client-supplied one is ignored."""
+    params = request.GET.copy()
+    params['user_id'] = authenticated_user_id(request)
+    return params
+
+
+def flag(params, name):
+    """True for ``?name=1`` (or true/yes)."""
+    return str(params.get(name, '')).lower() in ('1', 'true', 'yes')
+
+
+def multi_value(params, name):
+    """Values of a repeatable parameter; ``?a=x&a=y`` and ``?a=x,y`` are equivalent."""
+    values = params.getlist(name) if hasattr(params, 'getlist') else [params.get(name) or '']
+    return [part.strip() for value in values for part in value.split(',') if part.strip()]
+
+
+def is_owner(project, user_id):
+    # compares the stored owner id, so no round-trip to auth_db
+    return str(ref_id(project, 'owner')) == str(user_id)
+
+
+def task_project(task):
+    """Load only the owner of a task's project (one query, no User dereference)."""
+    return Project.objects(id=ref_id(task, 'project')).only('owner').first()
+
+
 class ProjectView(APIView):
     def get(self, request):
-        request_user_id = request.GET.get('user_id') 
-        if not request_user_id:
-            return Response({'message': 'user id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        userObj=User.objects(id=request_user_id).first()
-        if not userObj:
-            return Response({'message': 'user not found'}, status=status.HTTP_404_NOT_FOUND)
-        projects=Project.objects(owner=request_user_id).all()
-        return Response(
-            {
-                "projects": ProjectSerializer(projects, many=True).data,
-                "message": "projects fetched successfully"
-            },
-            status=status.HTTP_200_OK
-        )
+        params = request_params(request)
+        request_user_id = params.get('user_id')
+        listing_cache = get_listing_cache()
+        cache_key = listing_cache.key('user', request_user_id, params)
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return listing_response(request, cached['etag'], cached['body'])
+        try:
+            fields = parse_fields(params.get('fields'), ProjectSerializer.Meta.fields)
+            layout = parse_layout(params.get('layout'))
+            projects = Project.objects(owner=request_user_id)
+            etag = listing_etag(projects, params)
+            if etag_matches(request, etag):
+                return listing_response(request, etag, None)
+            projects = project_queryset(projects, fields).as_pymongo()
+            next_cursor = None
+            if is_paginated(params):
+                projects, next_cursor = paginate(projects, params)
+        except PaginationError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        response_data = {
+            "projects": (serialize_columns(ProjectSerializer, projects, fields, interned=('owner',))
+                         if layout == 'columnar' else serialize_rows(ProjectSerializer, projects, fields)),
+            "message": "projects fetched successfully"
+        }
+        if is_paginated(params):
+            response_data["next_cursor"] = next_cursor
+        listing_cache.set(cache_key, {'etag': etag, 'body': response_data})
+        return listing_response(request, etag, response_data)
 
     def post(self, request):
-        request_data = request.data or {}
+        request_data = request_payload(request)
         request_user_id = request_data.get('user_id')       
         name = request_data.get('name')
         description = request_data.get('description')
@@ -48,11 +121,9 @@ class ProjectView(APIView):
         if validation_response:
             return validation_response
         
-        # Get the user object
-        user = User.objects(id=request_user_id).first()
-        if not user:
-            return Response({'message': 'user not found'}, status=status.HTTP_404_NOT_FOUND)
-        
+        # the verified token is enough to reference the user by id
+        user = ObjectId(request_user_id)
+
         project = Project()
         try:
             project.name = name
@@ -70,6 +141,8 @@ class ProjectView(APIView):
                     return Response({'message': 'invalid deployment_date format, expected YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
             project.owner = user  # Assign User object, not string
             project.save()
+            log_project_change('create', request_user_id, project.id)
+            get_listing_cache().invalidate('user', request_user_id)
             serialized_project = ProjectSerializer(project).data
         except Exception as e:
             return Response({'message': 'project creation failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -84,7 +157,7 @@ class ProjectView(APIView):
 
     def put(self, request):
         """Full update: requires `project_id`, `user_id`, and `name` (description optional)."""
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['project_id', 'user_id', 'name']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -95,7 +168,7 @@ class ProjectView(APIView):
         project = Project.objects.filter(id=project_id).first()
         if not project:
             return Response({'message': 'project not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(project.owner.id) != str(request_user_id):
+        if not is_owner(project, request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         project.name = request_data.get('name')
@@ -120,6 +193,8 @@ class ProjectView(APIView):
                 return Response({'message': 'invalid deployment_date format, expected YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         try:
             project.save()
+            log_project_change('update', request_user_id, project.id)
+            get_listing_cache().invalidate('user', request_user_id)
             serialized_project = ProjectSerializer(project).data
         except Exception as e:
             return Response({'message': 'project update failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -128,7 +203,7 @@ class ProjectView(APIView):
 
     def patch(self, request):
         """Partial update: requires `project_id` and `user_id`. Only supplied fields are updated."""
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['project_id', 'user_id']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -139,7 +214,7 @@ class ProjectView(APIView):
         project = Project.objects.filter(id=project_id).first()
         if not project:
             return Response({'message': 'project not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(project.owner.id) != str(request_user_id):
+        if not is_owner(project, request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         changed = False
@@ -175,6 +250,8 @@ class ProjectView(APIView):
 
         try:
             project.save()
+            log_project_change('update', request_user_id, project.id)
+            get_listing_cache().invalidate('user', request_user_id)
             serialized_project = ProjectSerializer(project).data
         except Exception as e:
             return Response({'message': 'project partial update failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -183,7 +260,7 @@ class ProjectView(APIView):
 
     def delete(self, request):
         """Delete a project: requires `project_id` and `user_id`."""
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['project_id', 'user_id']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -191,36 +268,124 @@ class ProjectView(APIView):
 
         project_id = request_data.get('project_id')
         request_user_id = request_data.get('user_id')
-        project = Project.objects.filter(id=project_id).first()
+        project = Project.objects.filter(id=project_id).only('owner').first()
         if not project:
             return Response({'message': 'project not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(project.owner.id) != str(request_user_id):
+        if not is_owner(project, request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            project.delete()
+            # tasks go with the project; very large projects are finished by the background reaper
+            deleted_tasks, deferred = delete_project(project.id, ref_id(project, 'owner'))
+            log_project_change('delete', request_user_id, project.id)
+            get_listing_cache().invalidate('user', request_user_id)
+            get_listing_cache().invalidate('project', project_id)
         except Exception as e:
             return Response({'message': 'project deletion failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response({'message': 'project deleted'}, status=status.HTTP_200_OK)
+        return Response(
+            {'message': 'project deleted', 'deleted_tasks': deleted_tasks, 'tasks_pending_removal': deferred},
+            status=status.HTTP_200_OK
+        )
 
 
 class TaskView(APIView):
+    # sort keys backed by the (project, created_at) / (project, updated_at) indexes
+    SORT_FIELDS = ('created_at', 'updated_at')
+
     def get(self, request):
-        user_id = request.GET.get('user_id')
-        project_id = request.GET.get('project_id')
-        if not user_id:
-            return Response({'message': 'user_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        if not project_id:
+        """List tasks of `project_id`, or of several projects with `project_id__in`.
+
+        Optional filters: `status` (repeatable or comma-separated),
+        `created_after`/`created_before` (ISO dates) and `sort`
+        (``created_at``, ``updated_at``, prefixed with ``-`` for descending).
+        Archived tasks (projectapp.archive) are included with `include_archived=1`;
+        `layout=columnar` returns column arrays instead of one object per task.
+        """
+        params = request_params(request)
+        user_id = params.get('user_id')
+        project_id = params.get('project_id')
+        project_ids = multi_value(params, 'project_id__in')
+        if not project_id and not project_ids:
             return Response({'message': 'project_id is required'}, status=status.HTTP_400_BAD_REQUEST)
-        tasks=Task.objects.filter(project=project_id).all()
-        serialized_tasks = TaskSerializer(tasks, many=True).data
-        return Response({"tasks": serialized_tasks}, status=status.HTTP_200_OK)
-        
-        
+        if project_id:
+            # before the cache: its entries are shared by everyone asking for the project
+            if not ObjectId.is_valid(project_id):
+                return Response({'message': 'project_id must be a project id'}, status=status.HTTP_400_BAD_REQUEST)
+            project = Project.objects(id=project_id).only('owner').first()
+            if not project:
+                return Response({'message': 'project not found'}, status=status.HTTP_404_NOT_FOUND)
+            if not is_owner(project, user_id):
+                return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
+        listing_cache = get_listing_cache()
+        if project_id:
+            cache_key = listing_cache.key('project', project_id, params)
+        else:
+            # every task write invalidates the owner's scope as well
+            cache_key = listing_cache.key('user', user_id, params, kind='tasks')
+        cached = listing_cache.get(cache_key)
+        if cached is not None:
+            return listing_response(request, cached['etag'], cached['body'])
+        try:
+            filters, sort = self._filters(params, project_id, project_ids, user_id)
+            fields = parse_fields(params.get('fields'), TaskSerializer.Meta.fields)
+            layout = parse_layout(params.get('layout'))
+            tasks = Task.objects.filter(**filters)
+            archived = ArchivedTask.objects.filter(**filters) if flag(params, 'include_archived') else None
+            etag = listing_etag(tasks, params, archived)
+            if etag_matches(request, etag):
+                return listing_response(request, etag, None)
+            sort_field, descending = sort or ('created_at', False)
+            tasks = project_queryset(tasks, fields, sort_field).as_pymongo()
+            next_cursor = None
+            if archived is not None:
+                archived = project_queryset(archived, fields, sort_field).as_pymongo()
+                if is_paginated(params):
+                    tasks, next_cursor = paginate_merged((tasks, archived), params, sort_field, descending)
+                else:
+                    tasks = merge_rows((tasks, archived), sort_field, descending)
+            elif is_paginated(params):
+                tasks, next_cursor = paginate(tasks, params, sort_field, descending)
+            elif sort:
+                tasks = tasks.order_by(('-' if descending else '+') + sort_field)
+        except PaginationError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if layout == 'columnar':
+            response_data = {"tasks": serialize_columns(TaskSerializer, tasks, fields, interned=('project',))}
+        else:
+            response_data = {"tasks": serialize_rows(TaskSerializer, tasks, fields)}
+        if is_paginated(params):
+            response_data["next_cursor"] = next_cursor
+        listing_cache.set(cache_key, {'etag': etag, 'body': response_data})
+        return listing_response(request, etag, response_data)
+
+    def _filters(self, params, project_id, project_ids, user_id):
+        """MongoEngine filter kwargs and parsed sort for the list query; raises PaginationError."""
+        if project_id:
+            filters = {'project': project_id}
+        else:
+            if not all(ObjectId.is_valid(value) for value in project_ids):
+                raise PaginationError('project_id__in must be a list of project ids')
+            # only the caller's projects, checked in one query
+            owned = [doc['_id'] for doc in Project._get_collection().find(
+                {'_id': {'$in': [ObjectId(value) for value in project_ids]}, 'owner': ObjectId(user_id)}, {'_id': 1})]
+            filters = {'project__in': owned}
+        statuses = multi_value(params, 'status')
+        if statuses:
+            unknown = [value for value in statuses if value not in Task.status.choices]
+            if unknown:
+                raise PaginationError("status must be one of: 'todo', 'in_progress', 'done'")
+            filters['status__in'] = statuses
+        for param, operator in (('created_after', 'gte'), ('created_before', 'lt')):
+            if params.get(param):
+                try:
+                    filters[f'created_at__{operator}'] = datetime.fromisoformat(params[param])
+                except ValueError:
+                    raise PaginationError(f'invalid {param} format, expected YYYY-MM-DD')
+        return filters, parse_sort(params.get('sort'), self.SORT_FIELDS)
 
     def post(self, request):
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['user_id', 'project_id', 'title']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -232,10 +397,10 @@ class TaskView(APIView):
         description = request_data.get('description')
         request_status = request_data.get('status', 'todo')
 
-        project = Project.objects.filter(id=project_id).first()
+        project = Project.objects.filter(id=project_id).only('owner').first()
         if not project:
             return Response({'message': 'project not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(project.owner.id) != str(request_user_id):
+        if not is_owner(project, request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         task = Task()
@@ -245,13 +410,18 @@ class TaskView(APIView):
             task.project = project #foreign key 
             task.status = request_status
             task.save()
+            record_task_change(project.id, after=task.status)
+            log_task_change(request_user_id, project.id, task.id, after=task.status)
+            get_listing_cache().invalidate('project', project_id)
+            # the project list carries the counters
+            get_listing_cache().invalidate('user', request_user_id)
         except Exception as e:
             return Response({'message': 'task creation failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response({"task": TaskSerializer(task).data, "message": "task created successfully"}, status=status.HTTP_201_CREATED)
 
     def put(self, request):
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['task_id', 'user_id', 'title']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -262,21 +432,26 @@ class TaskView(APIView):
         task = Task.objects.filter(id=task_id).first()
         if not task:
             return Response({'message': 'task not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(task.project.owner.id) != str(request_user_id):
+        if not is_owner(task_project(task), request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
+        previous_status = task.status
         task.title = request_data.get('title')
         task.description = request_data.get('description', '')
         task.status = request_data.get('status', task.status)
         try:
             task.save()
+            record_task_change(ref_id(task, 'project'), before=previous_status, after=task.status)
+            log_task_change(request_user_id, ref_id(task, 'project'), task.id, previous_status, task.status)
+            get_listing_cache().invalidate('project', ref_id(task, 'project'))
+            get_listing_cache().invalidate('user', request_user_id)
         except Exception as e:
             return Response({'message': 'task update failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response({"task": TaskSerializer(task).data, "message": "task updated"}, status=status.HTTP_200_OK)
 
     def patch(self, request):
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['task_id', 'user_id']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -287,9 +462,10 @@ class TaskView(APIView):
         task = Task.objects.filter(id=task_id).first()
         if not task:
             return Response({'message': 'task not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(task.project.owner.id) != str(request_user_id):
+        if not is_owner(task_project(task), request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
+        previous_status = task.status
         changed = False
         if 'title' in request_data:
             task.title = request_data.get('title')
@@ -306,13 +482,17 @@ class TaskView(APIView):
 
         try:
             task.save()
+            record_task_change(ref_id(task, 'project'), before=previous_status, after=task.status)
+            log_task_change(request_user_id, ref_id(task, 'project'), task.id, previous_status, task.status)
+            get_listing_cache().invalidate('project', ref_id(task, 'project'))
+            get_listing_cache().invalidate('user', request_user_id)
         except Exception as e:
             return Response({'message': 'task partial update failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response({"task": TaskSerializer(task).data, "message": "task partially updated"}, status=status.HTTP_200_OK)
 
     def delete(self, request):
-        request_data = request.data or {}
+        request_data = request_payload(request)
         required_keys = ['task_id', 'user_id']
         validation_response = validate_keys(request_data, required_keys)
         if validation_response:
@@ -323,13 +503,380 @@ class TaskView(APIView):
         task = Task.objects.filter(id=task_id).first()
         if not task:
             return Response({'message': 'task not found'}, status=status.HTTP_404_NOT_FOUND)
-        if str(task.project.owner.id) != str(request_user_id):
+        if not is_owner(task_project(task), request_user_id):
             return Response({'message': 'forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
             task.delete()
+            record_task_change(ref_id(task, 'project'), before=task.status)
+            log_task_change(request_user_id, ref_id(task, 'project'), task.id, before=task.status)
+            get_listing_cache().invalidate('project', ref_id(task, 'project'))
+            get_listing_cache().invalidate('user', request_user_id)
         except Exception as e:
             return Response({'message': 'task deletion failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         return Response({'message': 'task deleted'}, status=status.HTTP_200_OK)
-    
\ No newline at end of file
+    
+
+class TaskBulkView(APIView):
+    """Create, update and delete many tasks in one request.
+
+    Body: ``{"user_id": ..., "operations": [{"op": "create"|"update"|"delete", ...}]}``.
+    Ownership is checked once per distinct project and all valid operations run
+    as a single unordered ``bulk_write``; the response has one result per operation.
+    """
+    MAX_OPERATIONS = 10000
+    UPDATABLE_FIELDS = ('title', 'description', 'status')
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'bulk'
+    throttle_user_fields = ('user_id',)
+
+    def post(self, request):
+        request_data = request_payload(request)
+        validation_response = validate_keys(request_data, ['user_id', 'operations'])
+        if validation_response:
+            return validation_response
+        request_user_id = str(request_data.get('user_id'))
+        operations = request_data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response({'message': 'operations must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > self.MAX_OPERATIONS:
+            return Response({'message': f'at most {self.MAX_OPERATIONS} operations per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(operations)
+        parsed = []
+        for index, operation in enumerate(operations):
+            entry, error = self._parse(operation)
+            if error:
+                op = operation.get('op') if isinstance(operation, dict) else None
+                results[index] = {'index': index, 'op': op, 'status': 'error', 'message': error}
+            else:
+                parsed.append((index, entry))
+
+        # one query to map updated/deleted tasks to their project, one to load project owners
+        task_ids = [entry['task_id'] for _, entry in parsed if entry['op'] != 'create']
+        task_projects, task_statuses = {}, {}
+        if task_ids:
+            for doc in Task._get_collection().find({'_id': {'$in': task_ids}}, {'project': 1, 'status': 1}):
+                task_projects[doc['_id']] = doc['project']
+                task_statuses[doc['_id']] = doc.get('status')
+        project_ids = {entry['project_id'] for _, entry in parsed if entry['op'] == 'create'}
+        project_ids.update(task_projects.values())
+        project_owners = {}
+        if project_ids:
+            for doc in Project._get_collection().find({'_id': {'$in': list(project_ids)}}, {'owner': 1}):
+                project_owners[doc['_id']] = str(doc['owner'])
+
+        requests, request_indexes, touched_projects = [], [], set()
+        for index, entry in parsed:
+            if entry['op'] == 'create':
+                project_id = entry['project_id']
+            elif entry['task_id'] in task_projects:
+                project_id = task_projects[entry['task_id']]
+            else:
+                results[index] = {'index': index, 'op': entry['op'], 'status': 'error', 'message': 'task not found'}
+                continue
+            if project_id not in project_owners:
+                results[index] = {'index': index, 'op': entry['op'], 'status': 'error', 'message': 'project not found'}
+                continue
+            if project_owners[project_id] != request_user_id:
+                results[index] = {'index': index, 'op': entry['op'], 'status': 'error', 'message': 'forbidden'}
+                continue
+            entry['project_id'] = project_id
+            requests.append(entry['request'])
+            request_indexes.append(index)
+            touched_projects.add(project_id)
+            results[index] = {'index': index, 'op': entry['op'], 'status': 'ok', 'task_id': str(entry['task_id'])}
+
+        if requests:
+            try:
+                try:
+                    Task._get_collection().bulk_write(requests, ordered=False)
+                except BulkWriteError as e:
+                    for write_error in e.details.get('writeErrors', []):
+                        index = request_indexes[write_error['index']]
+                        results[index].update({'status': 'error', 'message': write_error.get('errmsg', 'write failed')})
+                self._record_changes(parsed, results, task_statuses, request_user_id)
+            except Exception as e:
+                return Response({'message': 'bulk operation failed', 'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            finally:
+                listing_cache = get_listing_cache()
+                for project_id in touched_projects:
+                    listing_cache.invalidate('project', project_id)
+                listing_cache.invalidate('user', request_user_id)
+
+        failed = sum(1 for result in results if result['status'] == 'error')
+        return Response(
+            {
+                'results': results,
+                'succeeded': len(results) - failed,
+                'failed': failed,
+                'message': 'bulk operation completed'
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def _record_changes(self, parsed, results, task_statuses, user_id):
+        """Fold the status changes of the successful operations into per-project counter deltas
+        and activity events."""
+        deltas = {}
+        statuses = dict(task_statuses)
+        for index, entry in parsed:
+            if results[index]['status'] != 'ok':
+                continue
+            task_id = entry['task_id']
+            if entry['op'] == 'create':
+                before, after = None, entry['status']
+                statuses[task_id] = after
+            elif entry['op'] == 'delete':
+                before, after = statuses.pop(task_id, None), None
+            else:
+                before = statuses.get(task_id)
+                # an update of a task deleted earlier in the batch matches nothing
+                after = (entry['status'] or before) if before is not None else None
+                statuses[task_id] = after
+            deltas.setdefault(entry['project_id'], Counter()).update(status_delta(before, after))
+            if before is not None or after is not None:
+                log_task_change(user_id, entry['project_id'], task_id, before, after)
+        apply_deltas(deltas)
+
+    def _parse(self, operation):
+        """Validate one operation; returns ``(entry, None)`` or ``(None, error message)``."""
+        if not isinstance(operation, dict):
+            return None, 'operation must be an object'
+        op = operation.get('op')
+        if op == 'create':
+            project_id = operation.get('project_id')
+            if not ObjectId.is_valid(project_id):
+                return None, 'valid project_id is required'
+            if not operation.get('title'):
+                return None, 'title is required'
+            project_id = ObjectId(project_id)
+            task = Task(
+                id=ObjectId(),
+                title=operation.get('title'),
+                description=operation.get('description'),
+                project=project_id,
+                status=operation.get('status', 'todo'),
+            )
+            try:
+                task.validate()
+            except Exception as e:
+                return None, str(e)
+            return {'op': op, 'task_id': task.id, 'project_id': project_id, 'status': task.status,
+                    'request': InsertOne(task.to_mongo().to_dict())}, None
+        if op in ('update', 'delete'):
+            task_id = operation.get('task_id')
+            if not ObjectId.is_valid(task_id):
+                return None, 'valid task_id is required'
+            task_id = ObjectId(task_id)
+            if op == 'delete':
+                return {'op': op, 'task_id': task_id, 'request': DeleteOne({'_id': task_id})}, None
+            changes = {key: operation[key] for key in self.UPDATABLE_FIELDS if key in operation}
+            if not changes:
+                return None, 'no updatable fields provided'
+            for key, value in changes.items():
+                # description may be cleared; title and status may not
+                if value is None and key == 'description':
+                    continue
+                if value is None or value == '':
+                    return None, f'{key} is required'
+                try:
+                    Task._fields[key].validate(value)
+                except ValidationError as e:
+                    return None, f'{key}: {e.message}'
+            if 'status' in changes and changes['status'] not in Task.status.choices:
+                return None, "Status must be one of: 'todo', 'in_progress', 'done'"
+            changes['updated_at'] = datetime.utcnow()
+            return {'op': op, 'task_id': task_id, 'status': changes.get('status'),
+                    'request': UpdateOne({'_id': task_id}, {'$set': changes})}, None
+        return None, "op must be one of: 'create', 'update', 'delete'"
+
+
+class DashboardView(APIView):
+    """Per-project status/overdue counts (from the project counters) and the most recent tasks."""
+    RECENT_DEFAULT = 10
+    RECENT_MAX = 50
+
+    def get(self, request):
+        params = request_params(request)
+        user_id = params.get('user_id')
+        if not ObjectId.is_valid(user_id):
+            return Response({'message': 'user_id must be a valid id'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            recent_limit = min(int(params.get('recent', self.RECENT_DEFAULT)), self.RECENT_MAX)
+        except ValueError:
+            return Response({'message': 'recent must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if recent_limit < 1:
+            return Response({'message': 'recent must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        projects = list(Project.objects(owner=user_id).only('id', 'name', 'deployment_date', 'task_counts', 'last_activity_at')
+                        .order_by('created_at'))
+        deadlines = {project.id: project.deployment_date for project in projects}
+        date_field = serializers.DateTimeField()
+        summaries = {}
+        for project in projects:
+            counts = {key: getattr(project.task_counts, key, 0) or 0 for key in STATUSES}
+            summaries[project.id] = {
+                'id': str(project.id),
+                'name': project.name,
+                'deployment_date': date_field.to_representation(project.deployment_date) if project.deployment_date else None,
+                'counts': counts,
+                'total': sum(counts.values()),
+                'last_activity_at': date_field.to_representation(project.last_activity_at) if project.last_activity_at else None,
+                'overdue': 0,
+            }
+        recent_tasks = []
+        if summaries:
+            # counts come from the project counters; only the recent tasks are read
+            recent = (Task.objects(project__in=list(summaries)).order_by('-created_at')
+                      .limit(recent_limit).as_pymongo())
+            recent_tasks = serialize_rows(TaskSerializer, recent)
+
+        now = datetime.utcnow()
+        totals = {'projects': len(summaries), 'tasks': 0, 'todo': 0, 'in_progress': 0, 'done': 0, 'overdue': 0}
+        for project_id, summary in summaries.items():
+            deadline = deadlines[project_id]
+            if deadline is not None and deadline < now:
+                summary['overdue'] = summary['total'] - summary['counts']['done']
+            totals['tasks'] += summary['total']
+            totals['overdue'] += summary['overdue']
+            for key, count in summary['counts'].items():
+                totals[key] = totals.get(key, 0) + count
+
+        return Response(
+            {
+                'projects': list(summaries.values()),
+                'recent_tasks': recent_tasks,
+                'totals': totals,
+                'message': 'dashboard fetched successfully'
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class ExportView(APIView):
+    """Stream every project and task of a user as NDJSON (default) or CSV (`output=csv`)."""
+    FORMATS = {
+        'ndjson': ('application/x-ndjson', 'ndjson', iter_ndjson),
+        'csv': ('text/csv', 'csv', iter_csv),
+    }
+
+    def get(self, request):
+        params = request_params(request)
+        user_id = params.get('user_id')
+        export_format = params.get('output', 'ndjson')
+        if export_format not in self.FORMATS:
+            return Response({'message': "output must be one of: 'ndjson', 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+        if not ObjectId.is_valid(user_id):
+            return Response({'message': 'user not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        content_type, extension, encode = self.FORMATS[export_format]
+        records = iter_records(ObjectId(user_id), getattr(settings, 'EXPORT_BATCH_SIZE', 1000))
+        response = StreamingHttpResponse(chunked(encode(records)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="export-{user_id}.{extension}"'
+        return response
+
+
+class SearchView(APIView):
+    """Ranked full-text search over the caller's projects and tasks.
+
+    `q` is required; `type=project|task` narrows the search. Results are paged
+    with `limit` and `offset` (``next_offset`` is None on the last page).
+    """
+    def get(self, request):
+        params = request_params(request)
+        owner_id = ObjectId(params['user_id'])
+        query = params.get('q', '').strip()
+        if not query:
+            return Response({'message': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = (params['type'],) if params.get('type') else KINDS
+        if any(kind not in KINDS for kind in kinds):
+            return Response({'message': "type must be one of: 'project', 'task'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = parse_limit(params.get('limit'))
+            offset = int(params.get('offset', 0))
+        except PaginationError as e:
+            return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'message': 'offset must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        max_results = get_search_config()['MAX_RESULTS']
+        if offset < 0 or offset >= max_results:
+            return Response({'message': f'offset must be between 0 and {max_results - 1}'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, max_results - offset)
+
+        results, has_more = text_search(owner_id, query, kinds, offset, limit)
+        next_offset = offset + limit if has_more and offset + limit < max_results else None
+        return Response(
+            {'results': results, 'next_offset': next_offset, 'message': 'search completed'},
+            status=status.HTTP_200_OK
+        )
+
+
+class SuggestView(APIView):
+    """Typeahead: project names and task titles with a word starting with `q`."""
+    LIMIT_DEFAULT = 10
+    LIMIT_MAX = 25
+
+    def get(self, request):
+        params = request_params(request)
+        owner_id = ObjectId(params['user_id'])
+        try:
+            limit = min(int(params.get('limit', self.LIMIT_DEFAULT)), self.LIMIT_MAX)
+        except ValueError:
+            return Response({'message': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'suggestions': typeahead(owner_id, params.get('q', ''), max(limit, 1))}, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the listing cache in this worker, for tuning TTL and size."""
+    permission_classes = [IsStaffUser]
+
+    def get(self, request):
+        return Response({'cache': get_listing_cache().stats()}, status=status.HTTP_200_OK)
+
+
+class ActivityStatsView(APIView):
+    """Tasks finished per project (throughput) and their cycle time, from the activity log.
+
+    Covers the caller's projects, or one with `project_id`, over the last
+    `days` days (default 30).
+    """
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 365
+
+    def get(self, request):
+        params = request_params(request)
+        owner_id = ObjectId(params['user_id'])
+        try:
+            days = min(max(int(params.get('days') or self.DEFAULT_DAYS), 1), self.MAX_DAYS)
+        except ValueError:
+            return Response({'message': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        query = {'owner': owner_id}
+        if params.get('project_id'):
+            if not ObjectId.is_valid(params['project_id']):
+                return Response({'message': 'project not found'}, status=status.HTTP_404_NOT_FOUND)
+            query['_id'] = ObjectId(params['project_id'])
+        names = {doc['_id']: doc.get('name') for doc in Project._get_collection().find(query, {'name': 1})}
+        since = datetime.utcnow() - timedelta(days=days)
+        stats = cycle_times(list(names), since) if names else {}
+        return Response({
+            'since': since,
+            'projects': [{'id': str(project_id), 'name': name, **stats[project_id]} for project_id, name in names.items()],
+        }, status=status.HTTP_200_OK)
+
+
+class DbStatsView(APIView):
+    """Connection pool and per-collection command metrics of this worker."""
+    permission_classes = [IsStaffUser]
+
+    def get(self, request):
+        return Response({'db': get_metrics(), 'activity_log': get_activity_log().stats()}, status=status.HTTP_200_OK)
+
+
+class ThrottleStatsView(APIView):
+    """Allowed/rejected request counts per throttle scope in this worker."""
+    permission_classes = [IsStaffUser]
+
+    def get(self, request):
+        return Response({'throttling': get_limiter().stats()}, status=status.HTTP_200_OK)